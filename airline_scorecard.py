@@ -0,0 +1,131 @@
+"""
+Airline Scorecard for AirFly Insights
+Per-airline delay, punctuality and volume metrics in one grouped pass
+
+Airlines are turned into integer codes once. Counts, sums and rates for
+every metric are then summed per code with np.bincount, and delay
+percentiles are read from a single sort of all arrival delays keyed by
+airline code, so no Python function is called per airline.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import numpy as np
+import pandas as pd
+
+# Every column the scorecard reads from the flights table
+SCORECARD_COLUMNS = ['AIRLINE', 'ARRIVAL_DELAY', 'DEPARTURE_DELAY', 'CANCELLED']
+
+# Arrival delay percentiles reported per airline
+PERCENTILES = (50, 90, 95)
+
+# Arrivals up to this many minutes late count as on time
+ON_TIME_MINUTES = 15
+
+
+def _airline_codes(airlines):
+    """Return integer codes (-1 for missing) and the airline for each code"""
+    if isinstance(airlines.dtype, pd.CategoricalDtype):
+        return airlines.cat.codes.to_numpy().astype('int64'), pd.Index(airlines.cat.categories)
+    codes, uniques = pd.factorize(airlines, sort=True)
+    return codes.astype('int64'), pd.Index(uniques)
+
+
+def grouped_percentiles(codes, values, n_groups, percentiles=PERCENTILES):
+    """
+    Compute percentiles of values per integer group code
+
+    All values are sorted once on a combined (group, value) key; each
+    group then occupies a contiguous run of the sorted array, and
+    percentiles are interpolated linearly like np.percentile.
+
+    Parameters:
+    -----------
+    codes : ndarray
+        Group code per value (negative codes are ignored)
+    values : ndarray
+        Values to summarise (NaN values are ignored)
+    n_groups : int
+        Number of group codes
+    percentiles : sequence
+        Percentiles to compute, between 0 and 100
+
+    Returns:
+    --------
+    ndarray : Array of shape (n_groups, len(percentiles)), NaN for empty groups
+    """
+
+    valid = (codes >= 0) & ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    result = np.full((n_groups, len(percentiles)), np.nan)
+    if len(values) == 0:
+        return result
+
+    # Shift every group into its own disjoint value range, then sort once
+    low = values.min()
+    span = values.max() - low + 1.0
+    ordered = np.sort(codes * span + (values - low))
+
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    present = counts > 0
+    for j, q in enumerate(percentiles):
+        position = (counts[present] - 1) * (q / 100.0)
+        below = np.floor(position).astype('int64')
+        above = np.minimum(below + 1, counts[present] - 1)
+        fraction = position - below
+        offset = np.flatnonzero(present) * span - low
+        lower = ordered[starts[present] + below] - offset
+        upper = ordered[starts[present] + above] - offset
+        result[present, j] = lower + (upper - lower) * fraction
+    return result
+
+
+def airline_scorecard(df, percentiles=PERCENTILES):
+    """
+    Compute the airline scorecard for a set of flights
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Flights holding the SCORECARD_COLUMNS
+    percentiles : sequence
+        Arrival delay percentiles to include
+
+    Returns:
+    --------
+    DataFrame : Indexed by AIRLINE with flights, avg_departure_delay,
+        avg_arrival_delay, on_time_pct, cancellation_pct and one
+        arrival_delay_p<q> column per percentile
+    """
+
+    codes, airlines = _airline_codes(df['AIRLINE'])
+    n = len(airlines)
+    known = codes >= 0
+    group = codes[known]
+
+    def per_airline(weights=None):
+        return np.bincount(group, weights=None if weights is None else weights[known], minlength=n)
+
+    arrival = df['ARRIVAL_DELAY'].to_numpy(dtype='float64', na_value=np.nan)
+    departure = df['DEPARTURE_DELAY'].to_numpy(dtype='float64', na_value=np.nan)
+    cancelled = df['CANCELLED'].to_numpy(dtype='float64', na_value=0.0)
+    arr_valid = ~np.isnan(arrival)
+    dep_valid = ~np.isnan(departure)
+
+    flights = per_airline().astype('float64')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scorecard = pd.DataFrame({
+            'flights': flights.astype('int64'),
+            'avg_departure_delay': per_airline(np.where(dep_valid, departure, 0.0)) / per_airline(dep_valid),
+            'avg_arrival_delay': per_airline(np.where(arr_valid, arrival, 0.0)) / per_airline(arr_valid),
+            'on_time_pct': per_airline(arrival <= ON_TIME_MINUTES) / flights * 100,
+            'cancellation_pct': per_airline(cancelled) / flights * 100,
+        }, index=pd.Index(airlines, name='AIRLINE'))
+
+    values = grouped_percentiles(codes, arrival, n, percentiles)
+    for j, q in enumerate(percentiles):
+        scorecard[f'arrival_delay_p{q:g}'] = values[:, j]
+
+    return scorecard[scorecard['flights'] > 0]
@@ -0,0 +1,224 @@
+"""
+Airport Index for AirFly Insights
+Spatial index for nearest-airport and radius queries
+
+Airports are stored as unit vectors on the sphere and organised in a KD-tree.
+The straight-line (chord) distance between unit vectors grows with the
+great-circle distance, so tree pruning on chord distance gives exact
+great-circle results.
+
+Queries are batched: all query points walk the tree together as arrays of
+(query, node) pairs, so thousands of lookups cost a handful of NumPy passes
+instead of a Python loop per point.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_MILES = 3958.8
+
+# Maximum airports per leaf node
+LEAF_SIZE = 16
+
+
+def to_unit_vectors(lat, lon):
+    """Convert latitude/longitude in degrees to (n, 3) unit vectors"""
+    lat = np.radians(np.asarray(lat, dtype='float64'))
+    lon = np.radians(np.asarray(lon, dtype='float64'))
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def miles_to_chord(miles):
+    """Convert a great-circle distance in miles to a chord length on the unit sphere"""
+    angle = np.minimum(np.asarray(miles, dtype='float64') / EARTH_RADIUS_MILES, np.pi)
+    return 2 * np.sin(angle / 2)
+
+
+def chord_to_miles(chord):
+    """Convert a chord length on the unit sphere to a great-circle distance in miles"""
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.clip(np.asarray(chord) / 2, 0.0, 1.0))
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """Great-circle distance in miles between points (broadcasts like NumPy)"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype='float64')) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _expand(starts, ends):
+    """Return (owner, position) for every position in the ranges starts[i]:ends[i]"""
+    lengths = ends - starts
+    owner = np.repeat(np.arange(len(starts)), lengths)
+    first = np.cumsum(lengths) - lengths
+    return owner, np.arange(lengths.sum()) + np.repeat(starts - first, lengths)
+
+
+class AirportIndex:
+    """
+    KD-tree over airport coordinates
+
+    Parameters:
+    -----------
+    airports_df : DataFrame
+        Airport data with IATA_CODE, LATITUDE and LONGITUDE (rows without
+        coordinates are left out)
+    leaf_size : int
+        Maximum airports per leaf node
+    """
+
+    def __init__(self, airports_df, leaf_size=LEAF_SIZE):
+        located = airports_df.dropna(subset=['LATITUDE', 'LONGITUDE'])
+        self.codes = located['IATA_CODE'].to_numpy()
+        self.lats = located['LATITUDE'].to_numpy(dtype='float64')
+        self.lons = located['LONGITUDE'].to_numpy(dtype='float64')
+        self.points = to_unit_vectors(self.lats, self.lons).reshape(-1, 3)
+        self.leaf_size = leaf_size
+        self._build()
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _build(self):
+        """Split the points recursively on their widest axis at the median"""
+        order = np.arange(len(self.points))
+        starts, ends, lo, hi, split_dim, split_val, children = [], [], [], [], [], [], []
+
+        def build(start, end):
+            node = len(starts)
+            block = self.points[order[start:end]]
+            starts.append(start)
+            ends.append(end)
+            lo.append(block.min(axis=0) if len(block) else np.zeros(3))
+            hi.append(block.max(axis=0) if len(block) else np.zeros(3))
+            split_dim.append(0)
+            split_val.append(0.0)
+            children.append([-1, -1])
+            if end - start > self.leaf_size:
+                dim = int(np.argmax(hi[node] - lo[node]))
+                mid = (start + end) // 2
+                part = np.argpartition(block[:, dim], mid - start)
+                order[start:end] = order[start:end][part]
+                split_dim[node] = dim
+                split_val[node] = self.points[order[mid], dim]
+                children[node] = [build(start, mid), build(mid, end)]
+            return node
+
+        build(0, len(order))
+        # Points stored in tree order so every node is one contiguous slice
+        self._order = order
+        self._sorted = self.points[order]
+        self._start = np.array(starts, dtype='int64')
+        self._end = np.array(ends, dtype='int64')
+        self._lo = np.array(lo)
+        self._hi = np.array(hi)
+        self._split_dim = np.array(split_dim, dtype='int64')
+        self._split_val = np.array(split_val)
+        self._children = np.array(children, dtype='int64').reshape(-1, 2)
+
+    def _radius_pairs(self, queries, chord):
+        """Return (query, tree position, chord distance) for all points within chord[query]"""
+        fq = np.arange(len(queries))
+        fn = np.zeros(len(queries), dtype='int64')
+        found_q, found_p = [], []
+        while len(fq):
+            # Distance from each query to its node's bounding box
+            x = queries[fq]
+            gap = np.maximum(self._lo[fn] - x, 0) + np.maximum(x - self._hi[fn], 0)
+            keep = np.einsum('ij,ij->i', gap, gap) <= chord[fq] ** 2
+            fq, fn = fq[keep], fn[keep]
+
+            leaf = self._children[fn, 0] < 0
+            owner, position = _expand(self._start[fn[leaf]], self._end[fn[leaf]])
+            found_q.append(fq[leaf][owner])
+            found_p.append(position)
+
+            inner = ~leaf
+            fq = np.repeat(fq[inner], 2)
+            fn = self._children[fn[inner]].ravel()
+
+        q = np.concatenate(found_q) if found_q else np.empty(0, dtype='int64')
+        p = np.concatenate(found_p) if found_p else np.empty(0, dtype='int64')
+        dist = np.linalg.norm(self._sorted[p] - queries[q], axis=1)
+        within = dist <= chord[q]
+        return q[within], p[within], dist[within]
+
+    def within(self, lat, lon, radius_miles):
+        """
+        Find all airports within a radius of each query point
+
+        Parameters:
+        -----------
+        lat, lon : float or array-like
+            Query point(s) in degrees
+        radius_miles : float or array-like
+            Search radius, shared or per query point
+
+        Returns:
+        --------
+        DataFrame : One row per match (QUERY, IATA_CODE, DISTANCE_MILES),
+            ordered by query and then distance
+        """
+
+        queries = to_unit_vectors(np.atleast_1d(lat), np.atleast_1d(lon)).reshape(-1, 3)
+        chord = np.broadcast_to(miles_to_chord(radius_miles), (len(queries),))
+        q, p, dist = self._radius_pairs(queries, chord)
+        order = np.lexsort((dist, q))
+        return pd.DataFrame({
+            'QUERY': q[order],
+            'IATA_CODE': self.codes[self._order[p[order]]],
+            'DISTANCE_MILES': chord_to_miles(dist[order]),
+        })
+
+    def nearest(self, lat, lon, k=1):
+        """
+        Find the k nearest airports to each query point
+
+        Each query first descends to the smallest node holding at least k
+        airports; the k-th distance inside it bounds the search radius, and
+        a radius query with that bound returns the exact k nearest.
+
+        Parameters:
+        -----------
+        lat, lon : float or array-like
+            Query point(s) in degrees
+        k : int
+            Number of airports per query point
+
+        Returns:
+        --------
+        tuple : (codes, distances) arrays of shape (n_queries, k), nearest first
+        """
+
+        queries = to_unit_vectors(np.atleast_1d(lat), np.atleast_1d(lon)).reshape(-1, 3)
+        k = min(k, len(self))
+        sizes = self._end - self._start
+
+        # Smallest node on each query's path that still holds k airports
+        node = np.zeros(len(queries), dtype='int64')
+        while True:
+            inner = self._children[node, 0] >= 0
+            right = queries[np.arange(len(queries)), self._split_dim[node]] > self._split_val[node]
+            child = self._children[node, right.astype('int64')]
+            deeper = inner & (sizes[np.where(inner, child, 0)] >= k)
+            if not deeper.any():
+                break
+            node = np.where(deeper, child, node)
+
+        owner, position = _expand(self._start[node], self._end[node])
+        dist = np.linalg.norm(self._sorted[position] - queries[owner], axis=1)
+        order = np.lexsort((dist, owner))
+        first = np.searchsorted(owner[order], np.arange(len(queries)))
+        bound = dist[order][first + k - 1]
+
+        # Exact search with a little slack for rounding
+        q, p, dist = self._radius_pairs(queries, bound * (1 + 1e-9) + 1e-12)
+        order = np.lexsort((dist, q))
+        q, p, dist = q[order], p[order], dist[order]
+        rank = np.arange(len(q)) - np.searchsorted(q, q)
+        top = rank < k
+        codes = self.codes[self._order[p[top]]].reshape(len(queries), k)
+        return codes, chord_to_miles(dist[top]).reshape(len(queries), k)
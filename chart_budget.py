@@ -0,0 +1,430 @@
+"""
+Chart Budget for AirFly Insights
+Bounded plotly payloads for the Streamlit dashboard
+
+Every figure is passed through bound_figure() before it is sent to the
+browser. Traces are reduced to a bounded number of marks that depends on
+the chart type and the width the chart is drawn at: raw histograms are
+binned on the server, long lines are decimated keeping each bucket's
+minimum and maximum, point clouds are thinned, bar charts keep their
+largest bars (in their original order, with a note on the chart saying how
+many were left out) and pie charts fold their smallest slices into "Other".
+plotly_chart() then logs the payload size of every chart, warning when a
+chart exceeds the payload budget. The size is estimated from the bounded
+trace arrays; the figure is only serialised to measure it exactly while
+profiling (see measure_payloads) or with debug logging on.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import logging
+import threading
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+logger = logging.getLogger('airfly.charts')
+
+# Width in pixels assumed for a full-width chart
+DEFAULT_CHART_WIDTH = 1200
+
+# Serialised figure size above which a chart is logged as over budget
+CHART_BUDGET_BYTES = 250_000
+
+# Trace type -> pixels per mark; the mark limit is chart width / pixels
+PIXELS_PER_MARK = {
+    'bar': 12,
+    'histogram': 8,
+    'line': 1,
+    'pie': 100,
+}
+
+# Point clouds and map lines are limited by area rather than width
+MAX_SCATTER_POINTS = 5000
+MAX_GEO_POINTS = 12000
+
+# Approximate JSON characters per element of a numeric array, by dtype kind
+JSON_BYTES_PER_NUMBER = {'f': 14, 'i': 6, 'u': 6, 'b': 5, 'M': 28}
+
+# Set per rerun thread by measure_payloads()
+_measuring = threading.local()
+
+# id of a plotly template -> (template, approximate JSON size)
+_template_sizes = {}
+
+
+def max_marks(kind, width=DEFAULT_CHART_WIDTH):
+    """Return the mark limit for a trace kind drawn at width pixels"""
+    if kind == 'scatter':
+        return MAX_SCATTER_POINTS
+    if kind == 'geo':
+        return MAX_GEO_POINTS
+    return max(int(width // PIXELS_PER_MARK[kind]), 2)
+
+
+def bin_values(values, max_bins):
+    """
+    Bin raw values into at most max_bins equal-width bins
+
+    Parameters:
+    -----------
+    values : array-like
+        Raw values (NaN values are dropped)
+    max_bins : int
+        Number of bins
+
+    Returns:
+    --------
+    tuple : (bin centers, counts, bin width)
+    """
+
+    values = np.asarray(values, dtype='float64')
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return np.empty(0), np.empty(0, dtype='int64'), 1.0
+    counts, edges = np.histogram(values, bins=max_bins)
+    return (edges[:-1] + edges[1:]) / 2, counts, edges[1] - edges[0]
+
+
+def decimate_line(x, y, max_points):
+    """
+    Reduce a line to at most max_points points, keeping every bucket's extremes
+
+    The points are split into max_points / 2 consecutive buckets and the
+    minimum and maximum of each bucket are kept in their original order, so
+    spikes survive the reduction.
+
+    Parameters:
+    -----------
+    x, y : array-like
+        Line coordinates in drawing order
+    max_points : int
+        Point limit
+
+    Returns:
+    --------
+    ndarray : Positions of the points to keep
+    """
+
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    y = np.asarray(y, dtype='float64')
+    buckets = max(max_points // 2, 1)
+    bucket = np.arange(n) * buckets // n
+    filled = np.where(np.isnan(y), np.inf, y)
+    by_value = np.lexsort((filled, bucket))
+    starts = np.searchsorted(bucket[by_value], np.arange(buckets))
+    ends = np.append(starts[1:], n) - 1
+    filled = np.where(np.isnan(y), -np.inf, y)
+    lows = by_value[starts]
+    highs = np.lexsort((filled, bucket))[ends]
+    return np.unique(np.concatenate([lows, highs]))
+
+
+def thin_points(n, max_points):
+    """Return evenly spaced positions of at most max_points out of n points"""
+    if n <= max_points:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n - 1, max_points).round().astype('int64'))
+
+
+def thin_polylines(lat, max_points):
+    """
+    Thin NaN-separated polylines to about max_points points
+
+    Every stride-th interior point of each polyline is kept, together with
+    its first and last point and the NaN separators, so every line still
+    connects the same endpoints.
+
+    Parameters:
+    -----------
+    lat : array-like
+        One coordinate of the polylines, NaN between lines
+    max_points : int
+        Point limit
+
+    Returns:
+    --------
+    ndarray : Positions of the points to keep
+    """
+
+    lat = np.asarray(lat, dtype='float64')
+    n = len(lat)
+    if n <= max_points:
+        return np.arange(n)
+    gap = np.isnan(lat)
+    stride = int(np.ceil(n / max_points))
+    # Distance of every point from the previous separator
+    position = np.arange(n)
+    step = position - np.maximum.accumulate(np.where(gap, position, 0))
+    first = ~gap & np.append(True, gap[:-1])
+    last = ~gap & np.append(gap[1:], True)
+    return np.flatnonzero(gap | first | last | (step % stride == 0))
+
+
+def largest_bars(values, limit):
+    """
+    Return the positions of the limit bars with the largest absolute values
+
+    The positions are returned in their original order, so a chart sorted
+    by value or by category stays sorted. Bars without numeric values are
+    kept from the start.
+
+    Parameters:
+    -----------
+    values : array-like or None
+        Bar lengths
+    limit : int
+        Bar limit
+
+    Returns:
+    --------
+    ndarray : Positions of the bars to keep
+    """
+
+    try:
+        magnitude = np.abs(np.asarray(values, dtype='float64'))
+    except (TypeError, ValueError):
+        return np.arange(limit)
+    if magnitude.ndim != 1:
+        return np.arange(limit)
+    magnitude = np.where(np.isnan(magnitude), -np.inf, magnitude)
+    return np.sort(np.argsort(-magnitude, kind='stable')[:limit])
+
+
+def _bar_categories(trace):
+    """Return the category axis values of a bar trace"""
+    return trace.y if trace.orientation == 'h' else trace.x
+
+
+def _take(values, keep):
+    """Subset a trace array (None stays None)"""
+    if values is None or np.ndim(values) == 0:
+        return values
+    return np.asarray(values)[keep]
+
+
+def _bound_trace(trace, width):
+    """Return the trace reduced to its mark limit and whether it was changed"""
+
+    if trace.type == 'histogram' and trace.x is not None and trace.histfunc in (None, 'count'):
+        limit = max_marks('histogram', width)
+        centers, counts, bin_width = bin_values(trace.x, min(trace.nbinsx or limit, limit))
+        bar = go.Bar(x=centers, y=counts, width=bin_width, name=trace.name,
+                     marker=trace.marker.to_plotly_json() if trace.marker is not None else None,
+                     showlegend=trace.showlegend, legendgroup=trace.legendgroup)
+        return bar, True
+
+    if trace.type in ('scatter', 'scattergl') and trace.y is not None:
+        n = len(trace.y)
+        if 'lines' in (trace.mode or 'lines'):
+            keep = decimate_line(trace.x, trace.y, max_marks('line', width))
+        else:
+            keep = thin_points(n, max_marks('scatter', width))
+        if len(keep) == n:
+            return trace, False
+        updates = {field: _take(getattr(trace, field), keep)
+                   for field in ('x', 'y', 'text', 'hovertext', 'customdata') if getattr(trace, field) is not None}
+        if trace.marker is not None:
+            for field in ('size', 'color'):
+                values = getattr(trace.marker, field)
+                if values is not None and np.ndim(values) == 1 and len(values) == n:
+                    updates[f'marker_{field}'] = _take(values, keep)
+        trace.update(**updates)
+        return trace, True
+
+    if trace.type == 'scattergeo' and trace.lat is not None and 'lines' in (trace.mode or ''):
+        keep = thin_polylines(trace.lat, max_marks('geo', width))
+        if len(keep) == len(trace.lat):
+            return trace, False
+        trace.update(lat=_take(trace.lat, keep), lon=_take(trace.lon, keep))
+        return trace, True
+
+    if trace.type == 'bar':
+        categories = _bar_categories(trace)
+        values = trace.x if trace.orientation == 'h' else trace.y
+        limit = max_marks('bar', width)
+        if categories is None or len(categories) <= limit:
+            return trace, False
+        keep = largest_bars(values, limit)
+        updates = {field: _take(getattr(trace, field), keep)
+                   for field in ('x', 'y', 'text', 'hovertext', 'customdata') if getattr(trace, field) is not None}
+        color = trace.marker.color if trace.marker is not None else None
+        if color is not None and np.ndim(color) == 1 and len(color) == len(categories):
+            updates['marker_color'] = _take(color, keep)
+        trace.update(**updates)
+        return trace, True
+
+    if trace.type == 'pie' and trace.values is not None:
+        limit = max_marks('pie', width)
+        values = np.asarray(trace.values, dtype='float64')
+        if len(values) <= limit:
+            return trace, False
+        order = np.argsort(-values, kind='stable')
+        top, rest = order[:limit - 1], order[limit - 1:]
+        trace.update(labels=list(np.asarray(trace.labels)[top]) + ['Other'],
+                     values=list(values[top]) + [values[rest].sum()])
+        return trace, True
+
+    return trace, False
+
+
+def bound_figure(fig, width=DEFAULT_CHART_WIDTH):
+    """
+    Reduce every trace of a figure to the mark limit for its type
+
+    Parameters:
+    -----------
+    fig : plotly Figure
+        Figure to bound (modified in place)
+    width : int
+        Width in pixels the chart is drawn at
+
+    Returns:
+    --------
+    bool : True if any trace was reduced
+    """
+
+    traces, reduced, bars = [], False, {}
+    for trace in fig.data:
+        is_bar = trace.type == 'bar'
+        if is_bar:
+            categories = _bar_categories(trace)
+            total = 0 if categories is None else len(categories)
+        bounded, changed = _bound_trace(trace, width)
+        traces.append(bounded)
+        reduced |= changed
+        if changed and is_bar:
+            shown = len(_bar_categories(bounded))
+            bars[shown] = max(bars.get(shown, 0), total)
+    if reduced:
+        fig.data = []
+        fig.add_traces(traces)
+    for shown, total in bars.items():
+        fig.add_annotation(text=f"Largest {shown:,} of {total:,} bars shown", xref='paper', yref='paper',
+                           x=1, y=1, xanchor='right', yanchor='bottom', showarrow=False,
+                           font={'size': 11, 'color': 'gray'})
+    return reduced
+
+
+def count_marks(fig):
+    """Return the number of data points across all traces of a figure"""
+    total = 0
+    for trace in fig.data:
+        for field in ('values', 'z', 'lat', 'y', 'x'):
+            values = getattr(trace, field, None)
+            if values is not None and np.ndim(values) > 0:
+                total += int(np.size(values))
+                break
+    return total
+
+
+def payload_bytes(fig):
+    """Return the size of the figure's JSON payload in bytes (serialises the figure)"""
+    return len(fig.to_json().encode('utf-8'))
+
+
+def _json_size(value):
+    """Approximate the JSON size of a plotly property value without serialising it"""
+    if isinstance(value, dict):
+        return sum(len(key) + 4 + _json_size(item) for key, item in value.items()) + 2
+    if isinstance(value, (list, tuple, np.ndarray)):
+        array = np.asarray(value) if not isinstance(value, np.ndarray) else value
+        if array.dtype.kind in JSON_BYTES_PER_NUMBER:
+            return array.size * JSON_BYTES_PER_NUMBER[array.dtype.kind] + 2
+        return sum(_json_size(item) + 1 for item in value) + 2
+    if isinstance(value, str):
+        return len(value.encode('utf-8')) + 2
+    return len(str(value))
+
+
+def _template_bytes(name):
+    """Approximate JSON size of a named plotly template (the same for every chart using it)"""
+    if not name:
+        return 0
+    template = pio.templates[name]
+    if id(template) not in _template_sizes:
+        _template_sizes[id(template)] = (template, _json_size(template.to_plotly_json()))
+    return _template_sizes[id(template)][1]
+
+
+def estimate_payload_bytes(fig):
+    """Estimate the size of the figure's JSON payload from its trace arrays and layout"""
+    layout = fig.layout.to_plotly_json()
+    layout.pop('template', None)
+    size = _json_size(layout) + _template_bytes(pio.templates.default)
+    return size + sum(_json_size(trace.to_plotly_json()) for trace in fig.data) + 20
+
+
+def measure_payloads(enabled=True):
+    """Measure the exact payload of the charts rendered on this thread (e.g. while profiling)"""
+    _measuring.enabled = enabled
+
+
+def enable_chart_log(level=logging.INFO):
+    """Print chart payload records to stderr (safe to call on every rerun)"""
+    if not any(getattr(handler, '_airfly_chart_log', False) for handler in logger.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(levelname)s %(message)s'))
+        handler._airfly_chart_log = True
+        logger.addHandler(handler)
+    logger.setLevel(level)
+
+
+def plotly_chart(fig, name=None, width=DEFAULT_CHART_WIDTH, budget=CHART_BUDGET_BYTES, measure=None, **kwargs):
+    """
+    Bound, measure and render a plotly figure in Streamlit
+
+    Parameters:
+    -----------
+    fig : plotly Figure
+        Figure to render
+    name : str, optional
+        Chart name for the log (default: the figure title)
+    width : int
+        Width in pixels the chart is drawn at
+    budget : int
+        Payload size in bytes above which a warning is logged
+    measure : bool, optional
+        Serialise the figure to measure its exact payload instead of
+        estimating it (default: while measure_payloads() is on for this
+        thread or debug logging is enabled)
+    **kwargs
+        Passed on to st.plotly_chart
+
+    Returns:
+    --------
+    dict : Chart name, traces, marks, payload bytes, whether the bytes were
+        measured rather than estimated, whether it was reduced and the seconds
+        spent bounding, measuring and rendering it
+    """
+
+    import streamlit as st
+
+    if measure is None:
+        measure = getattr(_measuring, 'enabled', False) or logger.isEnabledFor(logging.DEBUG)
+
+    start = time.perf_counter()
+    reduced = bound_figure(fig, width)
+    record = {
+        'chart': name or fig.layout.title.text or 'untitled',
+        'traces': len(fig.data),
+        'marks': count_marks(fig),
+        'bytes': payload_bytes(fig) if measure else estimate_payload_bytes(fig),
+        'measured': measure,
+        'reduced': reduced,
+    }
+    st.plotly_chart(fig, **kwargs)
+    record['seconds'] = time.perf_counter() - start
+
+    # The record travels with the log entry so render_profile can collect it
+    level = logging.WARNING if record['bytes'] > budget else logging.INFO
+    logger.log(level, "chart=%r traces=%d marks=%d bytes=%d reduced=%s%s",
+               record['chart'], record['traces'], record['marks'], record['bytes'], reduced,
+               f" over budget ({budget} bytes)" if level == logging.WARNING else "",
+               extra={'chart_record': record})
+    return record
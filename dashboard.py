@@ -8,6 +8,21 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import json
 import warnings
+from flight_store import FlightColumnStore
+from flight_cube import CUBE_COLUMNS, FLIGHT_CUBE_DIR, FlightCube, cube_available
+from kpi_engine import KPIEngine
+from filter_index import BitmapIndex
+from airport_index import AirportIndex
+from airline_scorecard import PERCENTILES, SCORECARD_COLUMNS, airline_scorecard
+from chart_budget import enable_chart_log, measure_payloads, plotly_chart
+from render_profile import RenderProfile, profiling_enabled, waterfall_figure
+from delay_sketch import DELAY_SKETCH_DIR, SKETCH_COLUMNS, DelaySketches, delay_sketches_available
+from dataset_manifest import FLIGHT_INPUTS, artifact_is_current, current_manifest, load_stamp
+from ingest import ingest_in_progress
+from route_network import LOD_TIERS, bundle_routes, load_route_arcs
+from page_warmup import PageWarmup, cancel_all, warmup_enabled, warmup_tasks
+from result_cache import ResultCache, result_key
+from summary_stats import SUMMARY_PATH
 warnings.filterwarnings('ignore')
 
 # Set page configuration
@@ -18,6 +33,12 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Log the payload size of every chart sent to the browser
+enable_chart_log()
+
+# Time every stage of this rerun; shown and logged when profiling is on
+profile = RenderProfile()
+
 # Custom CSS for better styling
 st.markdown("""
 <style>
@@ -43,28 +64,216 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Raw columns each page reads; charts answered from the aggregate cube need none
+FILTER_COLUMNS = ['AIRLINE', 'MONTH']
+PAGE_COLUMNS = {
+    "🏠 Overview": [],
+    "🛩️ Airline Performance": [],
+    "🛤️ Route Analysis": [],
+    "⏰ Temporal Patterns": [],
+    "📊 Delay Analysis": ['CANCELLED', 'CANCELLATION_REASON'],
+    "� Geographic Insights": [],
+    "🎯 Recommendations": [],
+}
+
+# Cube group-bys each page asks for, precomputed by the background warm-up
+PAGE_ROLLUPS = {
+    "🏠 Overview": [('MONTH',), ('AIRLINE',), ('DELAY_CATEGORY',), ('DISTANCE_CATEGORY',)],
+    "🛩️ Airline Performance": [],
+    "🛤️ Route Analysis": [('ROUTE',), ('ORIGIN_AIRPORT',), ('DESTINATION_AIRPORT',)],
+    "⏰ Temporal Patterns": [('DEP_HOUR',), ('DAY_NAME',), ('SEASON',), ('DEP_HOUR', 'DAY_NAME')],
+    "📊 Delay Analysis": [],
+    "� Geographic Insights": [('ORIGIN_AIRPORT',), ('DESTINATION_AIRPORT',), ('ROUTE',),
+                              ('DISTANCE_CATEGORY',), ('ORIGIN_AIRPORT', 'DESTINATION_AIRPORT')],
+    "🎯 Recommendations": [],
+}
+
 # Load data
+@st.cache_resource
+def get_flight_store():
+    """Create the flight column store shared by all sessions
+
+    st.cache_resource hands every session the same object instead of a pickled
+    copy; with a memory-mapped export the columns are also shared across processes.
+    """
+    return FlightColumnStore()
+
+@st.cache_resource
+def get_flight_cube():
+    """Load the pre-built aggregate cube, or build it once from the flight store if it is missing or outdated"""
+    if cube_available() and artifact_is_current(FLIGHT_CUBE_DIR):
+        return FlightCube.load()
+    return FlightCube.build(get_flight_store().frame(CUBE_COLUMNS))
+
+@st.cache_resource
+def get_delay_sketches():
+    """Load the delay distribution sketches, or build them once from the flight store if missing or outdated"""
+    if delay_sketches_available() and artifact_is_current(DELAY_SKETCH_DIR):
+        return DelaySketches.load()
+    return DelaySketches.build(get_flight_store().frame(SKETCH_COLUMNS))
+
+@st.cache_resource
+def get_filter_index():
+    """Build the bitmap index over the sidebar filter columns"""
+    return BitmapIndex(get_flight_store().frame(FILTER_COLUMNS), FILTER_COLUMNS)
+
+@st.cache_resource
+def get_kpi_engine():
+    """Build the per airline-month-hour KPI partials from the cube"""
+    return KPIEngine.from_cube(get_flight_cube())
+
+@st.cache_resource
+def get_airport_index():
+    """Build the spatial index over airport coordinates"""
+    return AirportIndex(load_data()[1])
+
+@st.cache_resource
+def get_route_arcs():
+    """Load the great-circle arcs for every route, computing any missing ones once"""
+    routes = get_flight_cube().rollup(['ORIGIN_AIRPORT', 'DESTINATION_AIRPORT']).reset_index()
+    pairs = bundle_routes(routes['ORIGIN_AIRPORT'], routes['DESTINATION_AIRPORT'], routes['flights'],
+                          routes['arr_delay_n'], routes['arr_delay_sum'], load_data()[1])
+    return load_route_arcs(pairs)
+
+@st.cache_resource
+def get_result_cache():
+    """Create the page result cache shared by all sessions
+
+    Sized by AIRFLY_RESULT_CACHE_MB; evicted results are spilled to
+    AIRFLY_RESULT_SPILL_DIR when it is set.
+    """
+    return ResultCache.from_env()
+
+@st.cache_resource
+def get_data_version():
+    """Dataset manifest version of the flight data the page results are computed from"""
+    return current_manifest(FLIGHT_INPUTS)['version']
+
+# Seconds between checks of the flight data for changes
+VERSION_CHECK_SECONDS = 30
+
+@st.cache_data(ttl=VERSION_CHECK_SECONDS, show_spinner=False)
+def latest_data_version():
+    """Current version of the flight data, or None while an ingestion is still writing it
+
+    Checked at most every VERSION_CHECK_SECONDS rather than on every rerun.
+    """
+    if ingest_in_progress():
+        return None
+    return current_manifest(FLIGHT_INPUTS)['version']
+
+def page_result(page, name, compute, airlines=(), months=()):
+    """Compute a named result of `page` once per airline/month filter set and data version"""
+    key = result_key(page, name, get_data_version(), AIRLINE=airlines, MONTH=months)
+    return get_result_cache().get_or_compute(key, compute)
+
+def get_airline_scorecard(airlines, months):
+    """Compute the airline scorecard once per airline/month filter combination"""
+    def compute():
+        selected = get_filter_index().select(AIRLINE=list(airlines), MONTH=list(months))
+        flights = get_flight_store().frame(SCORECARD_COLUMNS)
+        if selected is not None:
+            flights = flights.take(selected)
+        return airline_scorecard(flights)
+    return page_result("🛩️ Airline Performance", 'scorecard', compute, airlines, months)
+
+def get_rollup(page, by, airlines, months):
+    """Group the aggregate cube once per page, grouping and airline/month filter combination"""
+    return page_result(page, f"rollup {' x '.join(by)}",
+                       lambda: get_flight_cube().rollup(list(by), airlines=list(airlines), months=list(months)),
+                       airlines, months)
+
+def top_routes(route_stats, n=20):
+    """Flight counts of the n busiest routes in a ROUTE rollup"""
+    return route_stats['flights'].sort_values(ascending=False).head(n)
+
+def get_route_spread(routes, months):
+    """Median and 90th percentile arrival delay of each route, from the route x month sketch"""
+    routes = list(routes)
+    def compute():
+        route_sketch = get_delay_sketches()['route_month']
+        return pd.DataFrame([route_sketch.quantiles([0.5, 0.9], ROUTE=[route], MONTH=list(months)) for route in routes],
+                            index=routes, columns=['Median', '90th percentile'])
+    return page_result("🛤️ Route Analysis", f"delay percentiles {', '.join(map(str, routes))}", compute, months=months)
+
+# Arrival delay histogram range, 5-minute bins
+DELAY_HISTOGRAM_EDGES = np.arange(-62.5, 185, 5)
+
+def get_delay_distribution(airlines, months):
+    """Arrival delay percentiles and histogram counts from the airline x month sketch"""
+    def compute():
+        delay_sketch = get_delay_sketches()['airline_month']
+        filters = dict(AIRLINE=list(airlines), MONTH=list(months))
+        return (delay_sketch.quantiles([0.5, 0.9, 0.99], **filters),
+                delay_sketch.histogram(DELAY_HISTOGRAM_EDGES, **filters))
+    return page_result("📊 Delay Analysis", 'delay distribution', compute, airlines, months)
+
+def warm_page(page, airlines=(), months=()):
+    """Compute the cached results `page` reads under the given filters"""
+    get_kpi_engine()
+    get_flight_store().frame(PAGE_COLUMNS[page])
+    for by in PAGE_ROLLUPS[page]:
+        if all(get_flight_cube().has_dimension(dim) for dim in by):
+            get_rollup(page, by, airlines, months)
+    if page == "🛩️ Airline Performance":
+        get_airline_scorecard(airlines, months)
+    elif page == "🛤️ Route Analysis" and not airlines:
+        get_route_spread(top_routes(get_rollup(page, ('ROUTE',), airlines, months)).index, months)
+    elif page == "📊 Delay Analysis":
+        get_delay_distribution(airlines, months)
+    elif page == "� Geographic Insights":
+        get_route_arcs()
+        get_airport_index()
+
+@st.cache_resource
+def get_page_warmup():
+    """Warm every page's default results, then each single-airline filter, in the background
+
+    Cleared together with the data caches (see clear_data_caches), so
+    reloading the data cancels the running warm-up and the next rerun starts
+    a new one.
+    """
+    prefetch = [((airline,), ()) for airline in get_filter_index().values('AIRLINE')]
+    return PageWarmup(warmup_tasks(list(PAGE_COLUMNS), warm_page, prefetch)).start()
+
+def clear_data_caches():
+    """Cancel the background warm-up, then drop every cached dataset and result"""
+    cancel_all()
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
 @st.cache_data
 def load_data():
-    """Load and cache the processed flight data"""
+    """Load and cache the reference data and analysis summary"""
     try:
-        flights_df = pd.read_csv('dataset/final_processed_flights.csv')
         airlines_df = pd.read_csv('dataset/airlines.csv')
         airports_df = pd.read_csv('dataset/airports.csv')
 
         # Load analysis summary
-        with open('configuration/analysis_summary.json', 'r') as f:
+        with open(SUMMARY_PATH, 'r') as f:
             summary_stats = json.load(f)
 
-        return flights_df, airlines_df, airports_df, summary_stats
+        return airlines_df, airports_df, summary_stats
     except Exception as e:
         st.error(f"Error loading data: {e}")
-        return None, None, None, None
+        return None, None, None
 
 # Load data
-flights_df, airlines_df, airports_df, summary_stats = load_data()
+with profile.stage("load data", 'data'):
+    # The flight data changed since it was loaded (e.g. after an ingest): drop everything built from it
+    if latest_data_version() not in (None, get_data_version()):
+        clear_data_caches()
+        st.rerun()
+    airlines_df, airports_df, summary_stats = load_data()
+    try:
+        flight_store = get_flight_store()
+        flight_cube = get_flight_cube()
+        filter_index = get_filter_index()
+    except Exception as e:
+        st.error(f"Error loading data: {e}")
+        flight_store = None
 
-if flights_df is None:
+if flight_store is None or summary_stats is None:
     st.error("Failed to load data. Please ensure the dataset files are available.")
     st.stop()
 
@@ -77,6 +286,12 @@ page = st.sidebar.radio(
     ["🏠 Overview", "🛩️ Airline Performance", "🛤️ Route Analysis", "⏰ Temporal Patterns", "📊 Delay Analysis", "� Geographic Insights", "🎯 Recommendations"]
 )
 
+profile.page = page
+
+# Only materialise the columns the selected page declares
+with profile.stage("page columns", 'data'):
+    flights_df = flight_store.frame(PAGE_COLUMNS[page])
+
 # Add filters
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 🔍 Filters")
@@ -84,7 +299,7 @@ st.sidebar.markdown("### 🔍 Filters")
 # Airline filter
 selected_airlines = st.sidebar.multiselect(
     "Select Airlines",
-    options=sorted(flights_df['AIRLINE'].unique()),
+    options=filter_index.values('AIRLINE'),
     default=None,
     help="Filter data by specific airlines"
 )
@@ -98,18 +313,35 @@ selected_months = st.sidebar.multiselect(
     help="Filter data by specific months"
 )
 
-# Apply filters
-filtered_df = flights_df.copy()
-if selected_airlines:
-    filtered_df = filtered_df[filtered_df['AIRLINE'].isin(selected_airlines)]
-if selected_months:
-    filtered_df = filtered_df[filtered_df['MONTH'].isin(selected_months)]
+# Apply filters: resolve the selection from the bitmap index, then gather
+# only the selected rows of the page's own columns
+with profile.stage("filter", 'filter'):
+    selected_rows = filter_index.select(AIRLINE=selected_airlines, MONTH=selected_months)
+
+    # Update display based on filters
+    if selected_rows is not None:
+        filtered_df = flights_df.take(selected_rows) if len(flights_df.columns) else flights_df
+        # Drop categories that no longer occur so counts and group-bys only show filtered values
+        for col in filtered_df.select_dtypes(include='category').columns:
+            filtered_df[col] = filtered_df[col].cat.remove_unused_categories()
+        st.sidebar.success(f"Filtered: {len(selected_rows):,} / {filter_index.n_rows:,} flights")
+    else:
+        filtered_df = flights_df  # Use all data if no filters
+
+def rollup(by):
+    """Group the aggregate cube by `by` under the current sidebar filters"""
+    with profile.stage(f"rollup {' x '.join(by)}", 'aggregate'):
+        return get_rollup(page, by, selected_airlines, selected_months)
 
-# Update display based on filters
-if selected_airlines or selected_months:
-    st.sidebar.success(f"Filtered: {len(filtered_df):,} / {len(flights_df):,} flights")
-else:
-    filtered_df = flights_df  # Use all data if no filters
+def hour_label(hour, span=0):
+    """Format an hour (or an hour window of `span` hours) as HH:00, or N/A without data"""
+    if hour is None:
+        return "N/A"
+    return f"{hour}:00" if not span else f"{hour}:00-{(hour + span) % 24}:00"
+
+# Headline KPIs follow the sidebar filters instead of the full-dataset summary
+with profile.stage("headline KPIs", 'aggregate'):
+    summary_stats = {**summary_stats, **get_kpi_engine().compute(selected_airlines, selected_months)}
 
 st.sidebar.markdown("---")
 st.sidebar.markdown("### Key Metrics")
@@ -124,8 +356,20 @@ st.sidebar.markdown("---")
 st.sidebar.markdown("### Quick Insights")
 st.sidebar.markdown(f"**Best Airline**: {summary_stats.get('best_airline', {}).get('code', 'N/A')}")
 st.sidebar.markdown(f"**Worst Airline**: {summary_stats.get('worst_airline', {}).get('code', 'N/A')}")
-st.sidebar.markdown(f"**Best Hour**: {summary_stats.get('best_hour', 'N/A')}:00")
+st.sidebar.markdown(f"**Best Hour**: {hour_label(summary_stats.get('best_hour'))}")
 st.sidebar.markdown(f"**Busiest Airport**: {list(summary_stats.get('busiest_airports', {}).keys())[0] if summary_stats.get('busiest_airports') else 'N/A'}")
+if load_stamp(SUMMARY_PATH) and not artifact_is_current(SUMMARY_PATH):
+    st.sidebar.caption("⚠️ The summary statistics are older than the flight data; "
+                       "run `python testing/generate_stats.py` to refresh them")
+
+st.sidebar.markdown("---")
+profiling = st.sidebar.toggle("⏱️ Profile this page", value=profiling_enabled(),
+                              help="Time every stage of the page and log it to logs/render_profile.jsonl")
+# Serialise charts to measure their exact payload only while profiling; estimate it otherwise
+measure_payloads(profiling)
+if st.sidebar.button("🔄 Reload data", help="Drop all cached data and results and load the dataset again"):
+    clear_data_caches()
+    st.rerun()
 
 # Main content
 if page == "🏠 Overview":
@@ -167,21 +411,21 @@ if page == "🏠 Overview":
 
     with col1:
         st.subheader("📅 Monthly Flight Distribution")
-        monthly_flights = filtered_df.groupby('MONTH').size()
+        monthly_flights = rollup(['MONTH'])['flights']
         month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
                       'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
 
-        fig = px.bar(x=month_names, y=monthly_flights.values,
+        fig = px.bar(x=[month_names[m - 1] for m in monthly_flights.index], y=monthly_flights.values,
                     title="Monthly Flight Volume",
                     labels={'x': 'Month', 'y': 'Number of Flights'},
                     color=monthly_flights.values,
                     color_continuous_scale='Blues')
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
     with col2:
         st.subheader("🛩️ Top Airlines by Volume")
-        airline_counts = filtered_df['AIRLINE'].value_counts().head(10)
+        airline_counts = rollup(['AIRLINE'])['flights'].sort_values(ascending=False).head(10)
 
         fig = px.bar(x=airline_counts.values, y=airline_counts.index,
                     title="Top 10 Airlines by Flight Volume",
@@ -190,38 +434,41 @@ if page == "🏠 Overview":
                     color=airline_counts.values,
                     color_continuous_scale='Viridis')
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
     # Delay categories
     st.subheader("⏱️ Flight Delay Categories")
     col1, col2 = st.columns(2)
     
     with col1:
-        delay_cat = filtered_df['DELAY_CATEGORY'].value_counts()
+        delay_cat = rollup(['DELAY_CATEGORY'])['flights'].sort_values(ascending=False)
 
         fig = px.pie(values=delay_cat.values, names=delay_cat.index,
                     title="Distribution of Flight Delays",
                     color_discrete_sequence=px.colors.qualitative.Set3)
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
     
     with col2:
         # Distance categories
-        if 'DISTANCE_CATEGORY' in filtered_df.columns:
-            dist_cat = filtered_df['DISTANCE_CATEGORY'].value_counts()
+        if flight_cube.has_dimension('DISTANCE_CATEGORY'):
+            dist_cat = rollup(['DISTANCE_CATEGORY'])['flights'].sort_values(ascending=False)
             
             fig = px.pie(values=dist_cat.values, names=dist_cat.index,
                         title="Distribution by Distance Category",
                         color_discrete_sequence=px.colors.qualitative.Pastel)
             fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
 
 elif page == "🛩️ Airline Performance":
     st.header("🛩️ Airline Performance Analysis")
 
-    # Airline delay comparison
+    # Airline delay comparison: every chart below reads the one-pass scorecard
+    with profile.stage("airline scorecard", 'aggregate'):
+        airline_stats = get_airline_scorecard(tuple(selected_airlines), tuple(selected_months))
+
     st.subheader("Average Delay by Airline")
-    airline_delays = filtered_df.groupby('AIRLINE')['ARRIVAL_DELAY'].mean().sort_values(ascending=False)
+    airline_delays = airline_stats['avg_arrival_delay'].sort_values(ascending=False)
 
     fig = px.bar(x=airline_delays.values, y=airline_delays.index,
                 title="Average Arrival Delay by Airline",
@@ -231,16 +478,14 @@ elif page == "🛩️ Airline Performance":
                 color_continuous_scale='RdYlGn_r')
     fig.add_vline(x=0, line_dash="dash", line_color="gray", annotation_text="On Time")
     fig.update_layout(height=600)
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
 
     col1, col2 = st.columns(2)
 
     with col1:
         # Airline on-time performance
         st.subheader("On-Time Performance by Airline")
-        airline_ontime = filtered_df.groupby('AIRLINE').apply(
-            lambda x: (x['ARRIVAL_DELAY'] <= 15).mean() * 100
-        ).sort_values(ascending=False)
+        airline_ontime = airline_stats['on_time_pct'].sort_values(ascending=False)
 
         fig = px.bar(x=airline_ontime.values, y=airline_ontime.index,
                     title="On-Time Performance by Airline (%)",
@@ -249,12 +494,12 @@ elif page == "🛩️ Airline Performance":
                     color=airline_ontime.values,
                     color_continuous_scale='RdYlGn')
         fig.update_layout(height=500)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
     with col2:
         # Flight volume by airline
         st.subheader("Flight Volume by Airline")
-        airline_counts = filtered_df['AIRLINE'].value_counts()
+        airline_counts = airline_stats['flights'].sort_values(ascending=False)
 
         fig = px.bar(x=airline_counts.values, y=airline_counts.index,
                     title="Number of Flights by Airline",
@@ -263,11 +508,11 @@ elif page == "🛩️ Airline Performance":
                     color=airline_counts.values,
                     color_continuous_scale='Blues')
         fig.update_layout(height=500)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
     # Airline cancellation rates
     st.subheader("Cancellation Rates by Airline")
-    airline_cancel = filtered_df.groupby('AIRLINE')['CANCELLED'].mean() * 100
+    airline_cancel = airline_stats['cancellation_pct']
     airline_cancel = airline_cancel[airline_cancel > 0].sort_values(ascending=False)
 
     if len(airline_cancel) > 0:
@@ -278,14 +523,14 @@ elif page == "🛩️ Airline Performance":
                     color=airline_cancel.values,
                     color_continuous_scale='Reds')
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
     else:
         st.info("No cancellations found in the filtered dataset.")
     
     # Departure delay vs Arrival delay comparison
     st.subheader("Departure vs Arrival Delay Comparison")
-    airline_dep_delays = filtered_df.groupby('AIRLINE')['DEPARTURE_DELAY'].mean()
-    airline_arr_delays = filtered_df.groupby('AIRLINE')['ARRIVAL_DELAY'].mean()
+    airline_dep_delays = airline_stats['avg_departure_delay']
+    airline_arr_delays = airline_stats['avg_arrival_delay']
     
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -307,14 +552,49 @@ elif page == "🛩️ Airline Performance":
         barmode='group',
         height=500
     )
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
+
+    # Delay distribution: typical and worst-case arrival delays
+    st.subheader("Arrival Delay Percentiles by Airline")
+    percentile_cols = [f'arrival_delay_p{q:g}' for q in PERCENTILES]
+    airline_percentiles = airline_stats[percentile_cols].sort_values(percentile_cols[-1], ascending=False)
+
+    fig = go.Figure()
+    for col, q, color in zip(percentile_cols, PERCENTILES, ['lightsalmon', 'tomato', 'darkred']):
+        fig.add_trace(go.Bar(
+            name=f'{q}th percentile',
+            x=airline_percentiles.index,
+            y=airline_percentiles[col].values,
+            marker_color=color
+        ))
+    fig.update_layout(
+        title="Arrival Delay Percentiles by Airline",
+        xaxis_title="Airline",
+        yaxis_title="Arrival Delay (minutes)",
+        barmode='group',
+        height=500
+    )
+    plotly_chart(fig, use_container_width=True)
+
+    st.dataframe(
+        airline_stats.rename(columns={
+            'flights': 'Flights', 'avg_departure_delay': 'Avg Dep Delay (min)',
+            'avg_arrival_delay': 'Avg Arr Delay (min)', 'on_time_pct': 'On-Time %',
+            'cancellation_pct': 'Cancelled %',
+            **{col: f'P{q} Arr Delay (min)' for col, q in zip(percentile_cols, PERCENTILES)}
+        }).round(1),
+        use_container_width=True
+    )
 
 elif page == "🛤️ Route Analysis":
     st.header("🛤️ Route and Airport Analysis")
 
     # Top routes by volume
+    route_stats = rollup(['ROUTE'])
+    origin_stats = rollup(['ORIGIN_AIRPORT'])
+
     st.subheader("Top Routes by Flight Volume")
-    route_counts = filtered_df['ROUTE'].value_counts().head(20)
+    route_counts = top_routes(route_stats)
 
     fig = px.bar(x=route_counts.values, y=route_counts.index,
                 title="Top 20 Busiest Routes",
@@ -323,17 +603,36 @@ elif page == "🛤️ Route Analysis":
                 color=route_counts.values,
                 color_continuous_scale='Blues')
     fig.update_layout(height=700)
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
+
+    # Delay spread on the busiest routes, from the route x month delay sketch
+    st.subheader("Delay Spread on the Busiest Routes")
+    if selected_airlines:
+        st.info("Route delay percentiles are kept per route and month; clear the airline filter to show them.")
+    else:
+        with profile.stage("route delay percentiles", 'aggregate'):
+            route_spread = get_route_spread(route_counts.index, selected_months)
+
+        fig = go.Figure()
+        for col, color in [('Median', 'lightsalmon'), ('90th percentile', 'darkred')]:
+            fig.add_trace(go.Bar(name=col, x=route_spread.index, y=route_spread[col].values,
+                                 marker_color=color))
+        fig.update_layout(
+            title="Arrival Delay Percentiles on the Top 20 Routes",
+            xaxis_title="Route",
+            yaxis_title="Arrival Delay (minutes)",
+            barmode='group',
+            height=500
+        )
+        plotly_chart(fig, use_container_width=True)
 
     col1, col2 = st.columns(2)
 
     with col1:
         # Route delay analysis
         st.subheader("Route Delay Analysis")
-        route_delays = filtered_df.groupby('ROUTE').agg({
-            'ARRIVAL_DELAY': 'mean',
-            'ROUTE': 'count'
-        }).rename(columns={'ROUTE': 'count'})
+        route_delays = route_stats[['avg_arrival_delay', 'flights']].rename(
+            columns={'avg_arrival_delay': 'ARRIVAL_DELAY', 'flights': 'count'})
 
         # Filter routes with sufficient flights
         significant_routes = route_delays[route_delays['count'] >= 50].sort_values('ARRIVAL_DELAY', ascending=False).head(15)
@@ -345,7 +644,7 @@ elif page == "🛤️ Route Analysis":
                     color=significant_routes['ARRIVAL_DELAY'].values,
                     color_continuous_scale='RdYlGn_r')
         fig.update_layout(height=500)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
     with col2:
         # Best performing routes
@@ -359,7 +658,7 @@ elif page == "🛤️ Route Analysis":
                     color=best_routes['ARRIVAL_DELAY'].values,
                     color_continuous_scale='RdYlGn')
         fig.update_layout(height=500)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
     # Airport performance
     st.subheader("Airport Performance Analysis")
@@ -367,7 +666,7 @@ elif page == "🛤️ Route Analysis":
     col1, col2 = st.columns(2)
     
     with col1:
-        origin_counts = filtered_df['ORIGIN_AIRPORT'].value_counts().head(15)
+        origin_counts = origin_stats['flights'].sort_values(ascending=False).head(15)
 
         fig = px.bar(x=origin_counts.values, y=origin_counts.index,
                     title="Top 15 Airports by Departures",
@@ -376,10 +675,10 @@ elif page == "🛤️ Route Analysis":
                     color=origin_counts.values,
                     color_continuous_scale='Greens')
         fig.update_layout(height=600)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
     with col2:
-        dest_counts = filtered_df['DESTINATION_AIRPORT'].value_counts().head(15)
+        dest_counts = rollup(['DESTINATION_AIRPORT'])['flights'].sort_values(ascending=False).head(15)
 
         fig = px.bar(x=dest_counts.values, y=dest_counts.index,
                     title="Top 15 Airports by Arrivals",
@@ -388,11 +687,11 @@ elif page == "🛤️ Route Analysis":
                     color=dest_counts.values,
                     color_continuous_scale='Oranges')
         fig.update_layout(height=600)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
     # Airport delay analysis
     st.subheader("Airport Delay Performance")
-    airport_delays = filtered_df.groupby('ORIGIN_AIRPORT')['DEPARTURE_DELAY'].mean().sort_values(ascending=False).head(15)
+    airport_delays = origin_stats['avg_departure_delay'].sort_values(ascending=False).head(15)
 
     fig = px.bar(x=airport_delays.values, y=airport_delays.index,
                 title="Top 15 Airports by Average Departure Delay",
@@ -401,17 +700,18 @@ elif page == "🛤️ Route Analysis":
                 color=airport_delays.values,
                 color_continuous_scale='RdYlGn_r')
     fig.update_layout(height=600)
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
 
 elif page == "⏰ Temporal Patterns":
     st.header("⏰ Temporal Patterns Analysis")
 
     # Hourly patterns
     st.subheader("Flight Patterns by Hour")
+    hourly_stats = rollup(['DEP_HOUR'])
     col1, col2 = st.columns(2)
 
     with col1:
-        hourly_flights = filtered_df['DEP_HOUR'].value_counts().sort_index()
+        hourly_flights = hourly_stats['flights']
 
         fig = px.bar(x=hourly_flights.index, y=hourly_flights.values,
                     title="Flight Distribution by Hour",
@@ -419,10 +719,10 @@ elif page == "⏰ Temporal Patterns":
                     color=hourly_flights.values,
                     color_continuous_scale='Blues')
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
     with col2:
-        hourly_delays = filtered_df.groupby('DEP_HOUR')['ARRIVAL_DELAY'].mean()
+        hourly_delays = hourly_stats['avg_arrival_delay']
 
         fig = px.line(x=hourly_delays.index, y=hourly_delays.values,
                      title="Average Delay by Departure Hour",
@@ -430,13 +730,14 @@ elif page == "⏰ Temporal Patterns":
                      markers=True)
         fig.add_hline(y=0, line_dash="dash", line_color="red", annotation_text="On Time")
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
     # Daily patterns
     st.subheader("Flight Patterns by Day of Week")
     day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    daily_flights = filtered_df['DAY_NAME'].value_counts().reindex(day_order)
-    daily_delays = filtered_df.groupby('DAY_NAME')['ARRIVAL_DELAY'].mean().reindex(day_order)
+    daily_stats = rollup(['DAY_NAME']).reindex(day_order)
+    daily_flights = daily_stats['flights']
+    daily_delays = daily_stats['avg_arrival_delay']
 
     col1, col2 = st.columns(2)
 
@@ -447,7 +748,7 @@ elif page == "⏰ Temporal Patterns":
                     color=daily_flights.values,
                     color_continuous_scale='Blues')
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
     with col2:
         fig = px.bar(x=day_order, y=daily_delays.values,
@@ -457,15 +758,15 @@ elif page == "⏰ Temporal Patterns":
                     color_continuous_scale='RdYlGn_r')
         fig.add_hline(y=0, line_dash="dash", line_color="red")
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
     # Seasonal patterns
     st.subheader("Seasonal Patterns")
     season_order = ['Winter', 'Spring', 'Summer', 'Fall']
-    seasonal_delays = filtered_df.groupby('SEASON')['ARRIVAL_DELAY'].mean().reindex(season_order)
-    seasonal_flights = filtered_df.groupby('SEASON').size().reindex(season_order)
-    seasonal_cancellations = filtered_df.groupby('SEASON')['CANCELLED'].mean() * 100
-    seasonal_cancellations = seasonal_cancellations.reindex(season_order)
+    seasonal_stats = rollup(['SEASON']).reindex(season_order)
+    seasonal_delays = seasonal_stats['avg_arrival_delay']
+    seasonal_flights = seasonal_stats['flights']
+    seasonal_cancellations = seasonal_stats['cancellation_pct']
 
     col1, col2, col3 = st.columns(3)
 
@@ -476,7 +777,7 @@ elif page == "⏰ Temporal Patterns":
                     color=seasonal_flights.values,
                     color_continuous_scale='Greens')
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
     with col2:
         fig = px.bar(x=season_order, y=seasonal_delays.values,
@@ -486,7 +787,7 @@ elif page == "⏰ Temporal Patterns":
                     color_continuous_scale='RdYlGn_r')
         fig.add_hline(y=0, line_dash="dash", line_color="red")
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
     with col3:
         fig = px.bar(x=season_order, y=seasonal_cancellations.values,
@@ -495,17 +796,12 @@ elif page == "⏰ Temporal Patterns":
                     color=seasonal_cancellations.values,
                     color_continuous_scale='Reds')
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
     # Heatmap: Hour vs Day of Week
     st.subheader("Delay Patterns: Hour vs Day of Week")
     
-    pivot_delays = filtered_df.pivot_table(
-        values='ARRIVAL_DELAY',
-        index='DEP_HOUR',
-        columns='DAY_NAME',
-        aggfunc='mean'
-    )
+    pivot_delays = rollup(['DEP_HOUR', 'DAY_NAME'])['avg_arrival_delay'].unstack('DAY_NAME')
     pivot_delays = pivot_delays[day_order]
     
     fig = px.imshow(pivot_delays,
@@ -514,7 +810,7 @@ elif page == "⏰ Temporal Patterns":
                     color_continuous_scale='RdYlGn_r',
                     aspect="auto")
     fig.update_layout(height=600)
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
 
 elif page == "📊 Delay Analysis":
     st.header("📊 Delay Analysis")
@@ -544,29 +840,35 @@ elif page == "📊 Delay Analysis":
                         color=delay_values,
                         color_continuous_scale='Oranges')
             fig.update_layout(height=500)
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
 
         with col2:
             fig = px.pie(values=delay_values, names=delay_names,
                         title="Delay Components Distribution",
                         color_discrete_sequence=px.colors.qualitative.Set3)
             fig.update_layout(height=500)
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
     else:
         st.info("Delay component data not available in the current dataset.")
 
-    # Delay distribution
+    # Delay distribution, answered from the airline x month delay sketch
     st.subheader("Delay Distribution Analysis")
-    delay_data = filtered_df['ARRIVAL_DELAY'].dropna()
-    delay_data = delay_data[(delay_data >= -60) & (delay_data <= 180)]  # Reasonable range
-
-    fig = px.histogram(delay_data, nbins=50,
-                      title="Arrival Delay Distribution",
-                      labels={'value': 'Delay (minutes)', 'count': 'Frequency'})
+    with profile.stage("delay distribution", 'aggregate'):
+        delay_percentiles, bin_counts = get_delay_distribution(selected_airlines, selected_months)
+    labels = ["Median Arrival Delay", "90th Percentile Delay", "99th Percentile Delay"]
+    for col, label, value in zip(st.columns(3), labels, delay_percentiles):
+        with col:
+            st.metric(label, "N/A" if np.isnan(value) else f"{value:.0f} min")
+
+    bin_edges = DELAY_HISTOGRAM_EDGES
+    fig = px.bar(x=(bin_edges[:-1] + bin_edges[1:]) / 2, y=bin_counts,
+                 title="Arrival Delay Distribution",
+                 labels={'x': 'Delay (minutes)', 'y': 'Frequency'})
+    fig.update_traces(width=5)
     fig.add_vline(x=0, line_dash="dash", line_color="red", annotation_text="On Time")
     fig.add_vline(x=15, line_dash="dash", line_color="orange", annotation_text="Minor Delay")
     fig.update_layout(height=500)
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
 
     # Delay categories breakdown
     st.subheader("Delay Categories Distribution")
@@ -579,7 +881,7 @@ elif page == "📊 Delay Analysis":
                     color=list(delay_cat_data.values()),
                     color_continuous_scale='Blues')
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
     # Cancellation reasons
     st.subheader("Cancellation Analysis")
@@ -592,7 +894,7 @@ elif page == "📊 Delay Analysis":
                         title="Cancellation Reasons Distribution",
                         color_discrete_sequence=px.colors.qualitative.Set2)
             fig.update_layout(height=500)
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
         else:
             st.info("No cancellations found in the sample data.")
     else:
@@ -605,7 +907,7 @@ elif page == "📊 Delay Analysis":
                         title="Cancellation Reasons Distribution",
                         color_discrete_sequence=px.colors.qualitative.Set2)
             fig.update_layout(height=500)
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
         else:
             st.info("Cancellation reason data not available.")
 
@@ -615,8 +917,9 @@ elif page == "� Geographic Insights":
     st.subheader("Airport Traffic Analysis")
     
     # Calculate total airport traffic
-    origin_counts = filtered_df['ORIGIN_AIRPORT'].value_counts()
-    dest_counts = filtered_df['DESTINATION_AIRPORT'].value_counts()
+    origin_stats = rollup(['ORIGIN_AIRPORT'])
+    origin_counts = origin_stats['flights']
+    dest_counts = rollup(['DESTINATION_AIRPORT'])['flights']
     total_traffic = origin_counts.add(dest_counts, fill_value=0).sort_values(ascending=False)
     
     col1, col2 = st.columns(2)
@@ -632,17 +935,15 @@ elif page == "� Geographic Insights":
                     color=top_airports.values,
                     color_continuous_scale='Viridis')
         fig.update_layout(height=700)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.subheader("Airport Delay Performance")
         
         # Calculate average delays by airport
-        airport_stats = filtered_df.groupby('ORIGIN_AIRPORT').agg({
-            'DEPARTURE_DELAY': 'mean',
-            'ARRIVAL_DELAY': 'mean',
-            'ORIGIN_AIRPORT': 'count'
-        }).rename(columns={'ORIGIN_AIRPORT': 'count'})
+        airport_stats = origin_stats[['avg_departure_delay', 'avg_arrival_delay', 'flights']].rename(
+            columns={'avg_departure_delay': 'DEPARTURE_DELAY', 'avg_arrival_delay': 'ARRIVAL_DELAY',
+                     'flights': 'count'})
         
         # Filter airports with significant traffic
         significant_airports = airport_stats[airport_stats['count'] >= 100].sort_values('DEPARTURE_DELAY', ascending=False).head(20)
@@ -654,17 +955,14 @@ elif page == "� Geographic Insights":
                     color=significant_airports['DEPARTURE_DELAY'].values,
                     color_continuous_scale='Reds')
         fig.update_layout(height=700)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
     
     # Route flow visualization
     st.subheader("Top Route Flows")
     
     # Get top routes with their metrics
-    route_metrics = filtered_df.groupby('ROUTE').agg({
-        'ROUTE': 'count',
-        'ARRIVAL_DELAY': 'mean',
-        'DISTANCE': 'mean'
-    }).rename(columns={'ROUTE': 'count', 'DISTANCE': 'avg_distance'})
+    route_metrics = rollup(['ROUTE'])[['flights', 'avg_arrival_delay', 'avg_distance']].rename(
+        columns={'flights': 'count', 'avg_arrival_delay': 'ARRIVAL_DELAY'})
     
     top_routes_metrics = route_metrics.sort_values('count', ascending=False).head(30)
     
@@ -682,17 +980,14 @@ elif page == "� Geographic Insights":
     )
     fig.add_hline(y=0, line_dash="dash", line_color="gray", annotation_text="On Time")
     fig.update_layout(height=600)
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
     
     # Distance category analysis
     st.subheader("Distance Category Analysis")
     
-    if 'DISTANCE_CATEGORY' in filtered_df.columns:
-        dist_stats = filtered_df.groupby('DISTANCE_CATEGORY').agg({
-            'DISTANCE_CATEGORY': 'count',
-            'ARRIVAL_DELAY': 'mean',
-            'DISTANCE': 'mean'
-        }).rename(columns={'DISTANCE_CATEGORY': 'count'})
+    if flight_cube.has_dimension('DISTANCE_CATEGORY'):
+        dist_stats = rollup(['DISTANCE_CATEGORY'])[['flights', 'avg_arrival_delay', 'avg_distance']].rename(
+            columns={'flights': 'count', 'avg_arrival_delay': 'ARRIVAL_DELAY', 'avg_distance': 'DISTANCE'})
         
         col1, col2 = st.columns(2)
         
@@ -703,7 +998,7 @@ elif page == "� Geographic Insights":
                         color=dist_stats['count'],
                         color_continuous_scale='Blues')
             fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
         
         with col2:
             fig = px.bar(x=dist_stats.index, y=dist_stats['ARRIVAL_DELAY'],
@@ -713,18 +1008,106 @@ elif page == "� Geographic Insights":
                         color_continuous_scale='RdYlGn_r')
             fig.add_hline(y=0, line_dash="dash", line_color="gray")
             fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
+    
+    # Full route network: great-circle arcs, busiest routes first
+    st.subheader("🕸️ Route Network")
+    
+    route_pairs = rollup(['ORIGIN_AIRPORT', 'DESTINATION_AIRPORT']).reset_index()
+    route_pairs = bundle_routes(route_pairs['ORIGIN_AIRPORT'], route_pairs['DESTINATION_AIRPORT'],
+                                route_pairs['flights'], route_pairs['arr_delay_n'],
+                                route_pairs['arr_delay_sum'], airports_df)
+    
+    # One detail level per level-of-detail tier
+    detail_levels = {}
+    shown = 0
+    for tier, (size, _) in enumerate(LOD_TIERS):
+        shown = shown + size if size is not None else None
+        detail_levels[f"Top {shown:,} routes" if shown is not None else "All routes"] = tier
+    detail = st.select_slider("Level of detail", options=list(detail_levels))
+    network = route_pairs[route_pairs['TIER'] <= detail_levels[detail]]
+    
+    with profile.stage("route arcs", 'data'):
+        route_arcs = get_route_arcs()
+    fig = go.Figure()
+    delay_buckets = [('Good (< 5 min)', 'green', network['avg_delay'] < 5),
+                     ('Fair (5-15 min)', 'orange', network['avg_delay'].between(5, 15)),
+                     ('Poor (> 15 min)', 'red', network['avg_delay'] > 15)]
+    # One trace per delay bucket and tier, busier tiers drawn thicker
+    for label, color, in_bucket in delay_buckets:
+        for tier in sorted(network['TIER'].unique(), reverse=True):
+            keys = network.loc[in_bucket & (network['TIER'] == tier), 'PAIR']
+            if keys.empty:
+                continue
+            lats, lons = route_arcs.line_trace(keys)
+            fig.add_trace(go.Scattergeo(
+                lat=lats, lon=lons, mode='lines', hoverinfo='skip',
+                line=dict(width=2.0 / (tier + 1), color=color),
+                opacity=0.8 if tier == 0 else 0.4,
+                name=label, legendgroup=label, showlegend=bool(tier == network['TIER'].min())
+            ))
+    # Hover labels at the airports, so the lines need no per-point hover data
+    airport_traffic = total_traffic.rename('flights').to_frame().join(
+        airports_df.set_index('IATA_CODE')[['LATITUDE', 'LONGITUDE']], how='inner')
+    fig.add_trace(go.Scattergeo(
+        lat=airport_traffic['LATITUDE'], lon=airport_traffic['LONGITUDE'], mode='markers',
+        marker=dict(size=3, color='black'), name='Airports', showlegend=False,
+        text=[f"{code}: {int(n):,} flights" for code, n in airport_traffic['flights'].items()],
+        hoverinfo='text'
+    ))
+    fig.update_geos(scope='north america', showland=True, landcolor='rgb(243, 243, 243)',
+                    lataxis_range=[15, 72], lonaxis_range=[-170, -60])
+    fig.update_layout(height=650, title=f"{len(network):,} of {len(route_pairs):,} airport pairs",
+                      margin=dict(l=0, r=0, t=40, b=0))
+    plotly_chart(fig, use_container_width=True)
+    
+    # Radius search around an airport
+    st.subheader("📡 Airports Within Range")
+    
+    airport_index = get_airport_index()
+    col1, col2 = st.columns(2)
+    with col1:
+        indexed = set(airport_index.codes)
+        center_options = [code for code in total_traffic.index if code in indexed]
+        center = st.selectbox("Center airport", options=center_options)
+    with col2:
+        radius = st.slider("Radius (miles)", min_value=25, max_value=500, value=150, step=25)
+    
+    if center is not None:
+        center_row = airports_df.loc[airports_df['IATA_CODE'] == center].iloc[0]
+        with profile.stage("airports within range", 'aggregate'):
+            nearby = airport_index.within(center_row['LATITUDE'], center_row['LONGITUDE'], radius)
+        nearby = nearby.drop(columns='QUERY').set_index('IATA_CODE').join(
+            origin_stats[['flights', 'avg_departure_delay', 'dep_delay_n', 'dep_delay_sum']], how='inner')
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Airports in Range", f"{len(nearby):,}")
+        with col2:
+            st.metric("Departures in Range", f"{int(nearby['flights'].sum()):,}")
+        with col3:
+            delay_n = nearby['dep_delay_n'].sum()
+            st.metric("Avg Departure Delay",
+                      f"{nearby['dep_delay_sum'].sum() / delay_n:.1f} min" if delay_n else "N/A")
+        
+        st.dataframe(
+            nearby.drop(columns=['dep_delay_n', 'dep_delay_sum']).rename(columns={'DISTANCE_MILES': 'Distance (mi)', 'flights': 'Departures',
+                                   'avg_departure_delay': 'Avg Dep Delay (min)'}).round(1),
+            use_container_width=True
+        )
     
     # Interactive map link
     st.subheader("📍 Interactive Maps")
     st.info("Pre-generated interactive maps are available in the 'maps/' folder:")
     
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
         st.markdown("- **Airport Delay Map**: View geographic distribution")
     with col2:
         st.markdown("- **Route Flow Map**: Explore flight connections")
     with col3:
+        st.markdown("- **Route Network Map**: Every route, more detail as you zoom")
+    with col4:
         st.markdown("- **Traffic Heatmap**: See traffic density patterns")
 
 elif page == "�🎯 Recommendations":
@@ -736,8 +1119,8 @@ elif page == "�🎯 Recommendations":
     # Calculate real-time statistics
     best_airline = summary_stats.get('best_airline', {})
     worst_airline = summary_stats.get('worst_airline', {})
-    best_hour = summary_stats.get('best_hour', 3)
-    worst_hour = summary_stats.get('worst_hour', 19)
+    best_hour = summary_stats.get('best_hour')
+    worst_hour = summary_stats.get('worst_hour')
     
     # Get best season
     seasonal_delays = summary_stats.get('seasonal_delays', {})
@@ -772,8 +1155,8 @@ elif page == "�🎯 Recommendations":
     with col2:
         st.markdown(f"""
         ### Temporal Patterns
-        - **Best Hour**: {best_hour}:00 departures with lowest delays
-        - **Worst Hour**: {worst_hour}:00 departures with highest delays
+        - **Best Hour**: {hour_label(best_hour)} departures with lowest delays
+        - **Worst Hour**: {hour_label(worst_hour)} departures with highest delays
         - **Best Season**: {best_season} ({seasonal_delays.get(best_season, 0):.1f} min avg delay)
         - **Worst Season**: {worst_season} ({seasonal_delays.get(worst_season, 0):.1f} min avg delay)
 
@@ -793,7 +1176,7 @@ elif page == "�🎯 Recommendations":
     with tab1:
         st.markdown(f"""
         ### For Airlines:
-        1. **Schedule Optimization**: Avoid peak delay hours ({worst_hour}:00-{(worst_hour+2)%24}:00) for new routes
+        1. **Schedule Optimization**: Avoid peak delay hours ({hour_label(worst_hour, 2)}) for new routes
         2. **Weather Preparedness**: Enhanced contingency planning for {worst_season} operations
         3. **Benchmark Performance**: Learn from {best_airline.get('code', 'top performers')} operational excellence
         4. **Route Performance**: Prioritize high-traffic routes like {busiest_route} for reliability improvements
@@ -807,7 +1190,7 @@ elif page == "�🎯 Recommendations":
         ### For Airports:
         1. **Capacity Management**: Address congestion at {busiest_airport} and other high-traffic airports during peak hours
         2. **Infrastructure Investment**: Focus on airports with consistently high delay rates
-        3. **Peak Hour Management**: Implement slot controls during high-delay periods ({worst_hour}:00-{(worst_hour+2)%24}:00)
+        3. **Peak Hour Management**: Implement slot controls during high-delay periods ({hour_label(worst_hour, 2)})
         4. **Seasonal Preparation**: Upgrade facilities for {worst_season} weather challenges
         5. **Air Traffic Coordination**: Improve NAS (National Airspace System) efficiency during peak times
         6. **Ground Operations**: Reduce taxi times and improve gate availability
@@ -818,10 +1201,10 @@ elif page == "�🎯 Recommendations":
         st.markdown(f"""
         ### For Passengers:
         1. **Airline Selection**: Choose {best_airline.get('code', 'reliable airlines')} for most reliable service (avg delay: {best_airline.get('avg_delay', 0):.1f} min)
-        2. **Timing Strategy**: Opt for {best_hour}:00-{(best_hour+3)%24}:00 departures when possible
+        2. **Timing Strategy**: Opt for {hour_label(best_hour, 3)} departures when possible
         3. **Seasonal Planning**: Travel during {best_season} for best punctuality rates
         4. **Route Selection**: Consider alternative routes if primary routes show consistent delays
-        5. **Buffer Time**: Allow extra time for flights departing between {worst_hour}:00-{(worst_hour+2)%24}:00
+        5. **Buffer Time**: Allow extra time for flights departing between {hour_label(worst_hour, 2)}
         6. **Avoid High-Risk**: Skip {worst_airline.get('code', 'poorly performing airlines')} if punctuality is critical
         7. **Monitor Weather**: Check forecasts during {worst_season} for potential disruptions
         8. **Flight Insurance**: Consider travel insurance for trips during peak cancellation periods
@@ -901,4 +1284,31 @@ elif page == "�🎯 Recommendations":
 
 # Footer
 st.markdown("---")
-st.markdown("**AirFly Insights Dashboard** | Built with Streamlit | Data: U.S. Department of Transportation (2015) | Dashboard Generated: 2026")
\ No newline at end of file
+st.markdown("**AirFly Insights Dashboard** | Built with Streamlit | Data: U.S. Department of Transportation (2015) | Dashboard Generated: 2026")
+
+# Render profile: per-stage waterfall for this rerun, appended to the profile log
+if profiling:
+    rerun = profile.finish(airlines=selected_airlines, months=selected_months,
+                           result_cache=get_result_cache().stats())
+    with st.expander(f"⏱️ Render profile: {rerun['total_seconds'] * 1000:.0f} ms, "
+                     f"{rerun['chart_bytes'] / 1024:.0f} KB of charts"):
+        stages = profile.frame()
+        cols = st.columns(len(rerun['kinds']))
+        for col, (kind, seconds) in zip(cols, rerun['kinds'].items()):
+            col.metric(kind.title(), f"{seconds * 1000:.0f} ms")
+        cache = rerun['result_cache']
+        st.caption(f"Result cache: {cache['hits']:,} hits, {cache['misses']:,} misses, "
+                   f"{cache['evictions']:,} evictions; {cache['entries']:,} results in "
+                   f"{cache['bytes'] / 1024 ** 2:.1f} of {cache['max_bytes'] / 1024 ** 2:.0f} MB")
+        st.plotly_chart(waterfall_figure(stages), use_container_width=True)
+        st.dataframe(stages.assign(ms=stages['seconds'] * 1000).drop(columns=['start', 'seconds']),
+                     use_container_width=True, hide_index=True)
+else:
+    profile.close()
+
+# Precompute the other pages in the background once this one has rendered
+if warmup_enabled():
+    warmup = get_page_warmup()
+    if warmup.running:
+        completed, total = warmup.progress()
+        st.sidebar.caption(f"Warming up pages in the background: {completed}/{total}")
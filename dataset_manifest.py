@@ -0,0 +1,296 @@
+"""
+Dataset Manifest for AirFly Insights
+Content fingerprints of the dataset and provenance of derived artifacts
+
+The manifest records, for every input (the processed flights CSV, the
+Parquet store, the memory-mapped export and the reference tables), a content
+fingerprint and its row count. Fingerprints are cheap: a file is hashed from
+its size and a fixed number of sampled blocks, and is only re-read when its
+size or modification time changed since the manifest was last saved, so
+checking an unchanged dataset costs one stat() per file. Row counts come
+from the Parquet and .npy metadata; counting the rows of a CSV means reading
+all of it, so that is only done when an artifact is stamped or the manifest
+is printed, never by a routine version check.
+
+Derived artifacts (analysis_summary.json, the flight cube, the delay
+sketches, the maps) are stamped with the fingerprints of the inputs they
+were built from. artifact_is_current() compares the stamp with the current
+fingerprints, so artifacts are rebuilt only when their inputs actually
+changed, and a stale artifact is never mistaken for a fresh one.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+from flight_store import FLIGHTS_CSV, FLIGHTS_MMAP, FLIGHTS_PARQUET
+
+MANIFEST_PATH = 'dataset/manifest.json'
+
+# Every representation of the processed flights table
+FLIGHT_INPUTS = [FLIGHTS_CSV, FLIGHTS_PARQUET, FLIGHTS_MMAP]
+
+# Reference tables joined to the flights for display
+REFERENCE_INPUTS = ['dataset/airports.csv', 'dataset/airlines.csv']
+
+# Blocks hashed per file; smaller files are hashed in full
+SAMPLE_BLOCKS = 16
+SAMPLE_BLOCK_BYTES = 64 * 1024
+
+# Stamp file inside an artifact directory (files get a <name>.source.json sibling)
+DIRECTORY_STAMP = '_source_manifest.json'
+
+
+def sampled_fingerprint(path, samples=SAMPLE_BLOCKS, block_size=SAMPLE_BLOCK_BYTES):
+    """
+    Return a content fingerprint of a file from its size and sampled blocks
+
+    The first and last blocks and evenly spaced blocks in between are
+    hashed, so appends, truncations and rewrites are detected without
+    reading the whole file.
+
+    Parameters:
+    -----------
+    path : str
+        File to fingerprint
+    samples : int
+        Number of blocks to hash
+    block_size : int
+        Bytes per block
+
+    Returns:
+    --------
+    str : SHA-256 hex digest
+    """
+
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(f"{size}\n".encode('utf-8'))
+    with open(path, 'rb') as f:
+        if size <= samples * block_size:
+            digest.update(f.read())
+        else:
+            step = (size - block_size) / (samples - 1)
+            for i in range(samples):
+                f.seek(int(i * step))
+                digest.update(f.read(block_size))
+    return digest.hexdigest()
+
+
+def count_rows(path, block_size=16 * 1024 ** 2):
+    """Return the data rows of a CSV, Parquet or .npy file (None for other files)"""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    if path.endswith('.npy'):
+        import numpy as np
+        return int(np.load(path, mmap_mode='r').shape[0])
+    if path.endswith('.csv'):
+        lines, last = 0, b'\n'
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                lines += block.count(b'\n')
+                last = block[-1:]
+        lines += last != b'\n'
+        return max(lines - 1, 0)
+    return None
+
+
+def _input_files(path):
+    """Return {relative name: path} of the files that make up an input"""
+    if os.path.isfile(path):
+        return {os.path.basename(path): path}
+    files = {}
+    for root, _, names in os.walk(path):
+        for name in names:
+            file = os.path.join(root, name)
+            files[os.path.relpath(file, path).replace(os.sep, '/')] = file
+    return dict(sorted(files.items()))
+
+
+def scan_input(path, previous=None, csv_rows=False):
+    """
+    Fingerprint one input file or directory
+
+    Parameters:
+    -----------
+    path : str
+        Input file or directory (e.g. a partitioned Parquet store)
+    previous : dict, optional
+        This input's entry from an earlier manifest; files whose size and
+        modification time are unchanged keep their fingerprint and row count
+    csv_rows : bool
+        Count the rows of CSV files (a full read); otherwise their row count
+        is None unless it is known from the previous entry
+
+    Returns:
+    --------
+    dict : fingerprint, rows, and per-file size, mtime_ns, fingerprint and rows
+    """
+
+    known = (previous or {}).get('files', {})
+    files = {}
+    for name, file in _input_files(path).items():
+        stat = os.stat(file)
+        entry = known.get(name)
+        count = csv_rows or not name.endswith('.csv')
+        if not entry or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+            entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                     'fingerprint': sampled_fingerprint(file), 'rows': count_rows(file) if count else None}
+        elif entry['rows'] is None and count:
+            entry = dict(entry, rows=count_rows(file))
+        files[name] = entry
+
+    digest = hashlib.sha256()
+    for name, entry in files.items():
+        digest.update(f"{name}|{entry['fingerprint']}\n".encode('utf-8'))
+    # Table rows: CSV and Parquet parts add up, memory-mapped columns each hold every row
+    table_rows = [e['rows'] for n, e in files.items() if e['rows'] is not None and not n.endswith('.npy')]
+    column_rows = [e['rows'] for n, e in files.items() if e['rows'] is not None and n.endswith('.npy')]
+    rows = sum(table_rows) if table_rows else max(column_rows, default=None)
+    return {'fingerprint': digest.hexdigest(), 'rows': rows, 'files': files}
+
+
+def _write_json(path, payload):
+    """Write JSON atomically so concurrent readers never see a partial file"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    """Return the saved manifest (an empty one if none was saved)"""
+    if manifest_path and os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+    return {'inputs': {}}
+
+
+def current_manifest(inputs=FLIGHT_INPUTS + REFERENCE_INPUTS, manifest_path=MANIFEST_PATH, csv_rows=False):
+    """
+    Return the manifest of the given inputs, refreshing the saved one
+
+    Only files whose size or modification time changed are fingerprinted
+    again; the saved manifest is rewritten when anything changed.
+
+    Parameters:
+    -----------
+    inputs : list
+        Input files and directories (missing ones are left out)
+    manifest_path : str or None
+        Saved manifest to reuse and update (None to fingerprint from scratch)
+    csv_rows : bool
+        Count the rows of changed CSV files as well (reads them in full)
+
+    Returns:
+    --------
+    dict : version (one hash over all the inputs' fingerprints) and inputs
+        (input path -> fingerprint, rows and files)
+    """
+
+    saved = load_manifest(manifest_path)
+    entries = {}
+    for path in dict.fromkeys(inputs):
+        if os.path.exists(path):
+            entries[path] = scan_input(path, saved['inputs'].get(path), csv_rows)
+
+    if manifest_path and any(saved['inputs'].get(path) != entry for path, entry in entries.items()):
+        saved['inputs'].update(entries)
+        saved['updated'] = datetime.now().isoformat(timespec='seconds')
+        _write_json(manifest_path, saved)
+
+    digest = hashlib.sha256()
+    for path, entry in entries.items():
+        digest.update(f"{path}|{entry['fingerprint']}\n".encode('utf-8'))
+    return {'version': digest.hexdigest()[:16], 'inputs': entries}
+
+
+def stamp_path(artifact):
+    """Return where the provenance stamp of an artifact file or directory is kept"""
+    artifact = artifact.rstrip('/\\')
+    if os.path.isdir(artifact):
+        return os.path.join(artifact, DIRECTORY_STAMP)
+    return os.path.splitext(artifact)[0] + '.source.json'
+
+
+def record_artifact(artifact, inputs=FLIGHT_INPUTS, manifest_path=MANIFEST_PATH):
+    """
+    Stamp an artifact with the current fingerprints of the inputs it was built from
+
+    Parameters:
+    -----------
+    artifact : str
+        Artifact file or directory that was just written
+    inputs : list
+        Inputs it was built from (missing ones are left out)
+    manifest_path : str or None
+        Saved manifest to reuse and update
+
+    Returns:
+    --------
+    dict : The stamp
+    """
+
+    manifest = current_manifest(inputs, manifest_path, csv_rows=True)
+    stamp = {
+        'version': manifest['version'],
+        'inputs': {path: {'fingerprint': entry['fingerprint'], 'rows': entry['rows']}
+                   for path, entry in manifest['inputs'].items()},
+        'built_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    _write_json(stamp_path(artifact), stamp)
+    return stamp
+
+
+def load_stamp(artifact):
+    """Return the provenance stamp of an artifact, or None if it has none"""
+    path = stamp_path(artifact)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def artifact_is_current(artifact, manifest_path=MANIFEST_PATH):
+    """
+    Return True if an artifact exists and none of its inputs changed since it was built
+
+    Artifacts without a stamp (e.g. built before stamping was introduced)
+    count as outdated.
+    """
+
+    stamp = load_stamp(artifact) if os.path.exists(artifact) else None
+    if not stamp or not stamp['inputs']:
+        return False
+    current = current_manifest(list(stamp['inputs']), manifest_path)['inputs']
+    return (current.keys() == stamp['inputs'].keys()
+            and all(current[path]['fingerprint'] == entry['fingerprint']
+                    for path, entry in stamp['inputs'].items()))
+
+
+if __name__ == "__main__":
+    from delay_sketch import DELAY_SKETCH_DIR
+    from flight_cube import FLIGHT_CUBE_DIR
+    from summary_stats import SUMMARY_PATH
+
+    manifest = current_manifest(csv_rows=True)
+    print(f"Dataset version {manifest['version']} (saved to {MANIFEST_PATH})")
+    for path, entry in manifest['inputs'].items():
+        rows = 'n/a' if entry['rows'] is None else f"{entry['rows']:,}"
+        print(f"   {path:<45} {rows:>12} rows  {len(entry['files']):>4} files  {entry['fingerprint'][:12]}")
+
+    print("\nDerived artifacts:")
+    for artifact in [SUMMARY_PATH, FLIGHT_CUBE_DIR, DELAY_SKETCH_DIR, 'maps']:
+        if not os.path.exists(artifact):
+            status = 'missing'
+        elif artifact_is_current(artifact):
+            status = f"up to date (built {load_stamp(artifact)['built_at']})"
+        else:
+            status = 'outdated' if load_stamp(artifact) else 'not stamped'
+        print(f"   {artifact:<45} {status}")
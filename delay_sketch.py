@@ -0,0 +1,369 @@
+"""
+Delay Sketches for AirFly Insights
+Mergeable histogram sketches of the arrival delay distribution
+
+Arrival delays are counted into fixed bins per key (airline x month and
+route x month). Counts for the same key simply add up, so sketches built
+from separate chunks, worker processes or newly ingested files merge
+exactly, and any airline/month filter is answered by summing the selected
+rows. Percentiles are interpolated within the bin holding the requested
+rank, and histograms for charts are re-binned from the stored counts, so
+distribution charts never need the raw delay values.
+
+Fine sketches use one bin per minute over the usual delay range, so
+percentiles are within half a minute of the exact value; route sketches
+use 5-minute bins to stay small. Both switch to logarithmic bins for the
+long tail of extreme delays.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+DELAY_SKETCH_DIR = 'dataset/delay_sketches'
+
+# Largest delay covered by a finite bin; later delays go to the overflow bin
+MAX_DELAY_MINUTES = 2000
+
+
+def delay_bin_edges(start, stop, width, tail_ratio, limit=MAX_DELAY_MINUTES):
+    """
+    Return bin edges: fixed-width bins centered on multiples of width from
+    start to stop, then bins growing by tail_ratio up to limit
+    """
+    linear = np.arange(start - width / 2, stop + width, width)
+    tail = [linear[-1]]
+    while tail[-1] < limit:
+        tail.append(tail[-1] * tail_ratio)
+    return np.concatenate([linear, tail[1:]])
+
+
+FINE_EDGES = delay_bin_edges(-90, 360, 1, 1.05)
+COARSE_EDGES = delay_bin_edges(-60, 180, 5, 1.15)
+
+# Sketch name -> (key dimensions, bin edges)
+SKETCH_LEVELS = {
+    'airline_month': (['AIRLINE', 'MONTH'], FINE_EDGES),
+    'route_month': (['ROUTE', 'MONTH'], COARSE_EDGES),
+}
+
+# Every column the sketch build reads from the flights table
+SKETCH_COLUMNS = list(dict.fromkeys(
+    [dim for dims, _ in SKETCH_LEVELS.values() for dim in dims] + ['ARRIVAL_DELAY']
+))
+
+
+def _key_codes(df, dims):
+    """
+    Return one integer code per row for the combination of dims, and the
+    key values for each code in sorted order (rows with a missing key get -1)
+    """
+    codes = np.zeros(len(df), dtype='int64')
+    missing = np.zeros(len(df), dtype=bool)
+    uniques = []
+    for dim in dims:
+        values = df[dim]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            dim_codes, dim_uniques = values.cat.codes.to_numpy().astype('int64'), values.cat.categories
+        else:
+            dim_codes, dim_uniques = pd.factorize(values, sort=True)
+        missing |= dim_codes < 0
+        codes = codes * len(dim_uniques) + dim_codes
+        uniques.append(pd.Index(dim_uniques))
+
+    # Renumber the combinations that occur, keeping their sorted order
+    codes = codes[~missing]
+    size = int(np.prod([len(u) for u in uniques]))
+    if size <= 4 * len(codes) + 1024:
+        present = np.flatnonzero(np.bincount(codes, minlength=size))
+        renumber = np.full(size, -1, dtype='int64')
+        renumber[present] = np.arange(len(present))
+        codes = renumber[codes]
+    else:
+        present, codes = np.unique(codes, return_inverse=True)
+
+    keys = {}
+    for dim, dim_uniques in zip(reversed(dims), reversed(uniques)):
+        present, position = np.divmod(present, len(dim_uniques))
+        keys[dim] = dim_uniques.take(position).to_numpy()
+    row_codes = np.full(len(df), -1, dtype='int64')
+    row_codes[~missing] = codes
+    return row_codes, pd.DataFrame({dim: keys[dim] for dim in dims})
+
+
+class DelayHistogram:
+    """
+    Per-key delay counts over fixed bins
+
+    Parameters:
+    -----------
+    keys : DataFrame
+        One row per key, one column per dimension
+    edges : ndarray
+        Bin edges; bin 0 holds delays below edges[0], bin len(edges) those
+        at or above edges[-1]
+    counts : ndarray
+        Array of shape (len(keys), len(edges) + 1)
+    low, high : ndarray
+        Smallest and largest delay seen per key
+    """
+
+    def __init__(self, keys, edges, counts, low, high):
+        self.keys = keys
+        self.edges = np.asarray(edges, dtype='float64')
+        self.counts = counts
+        self.low = low
+        self.high = high
+
+    @property
+    def dims(self):
+        return list(self.keys.columns)
+
+    @classmethod
+    def build(cls, df, dims, edges, column='ARRIVAL_DELAY'):
+        """
+        Count the delays of a batch of flights per key
+
+        Parameters:
+        -----------
+        df : DataFrame
+            Flights holding the dims and the delay column
+        dims : list
+            Key dimensions, e.g. ['AIRLINE', 'MONTH']
+        edges : ndarray
+            Bin edges
+        column : str
+            Delay column to sketch
+
+        Returns:
+        --------
+        DelayHistogram : Counts for every key present in df
+        """
+
+        codes, keys = _key_codes(df, dims)
+        delays = df[column].to_numpy(dtype='float64', na_value=np.nan)
+        valid = ~np.isnan(delays) & (codes >= 0)
+        delays, codes = delays[valid], codes[valid]
+
+        n_bins = len(edges) + 1
+        bins = np.searchsorted(edges, delays, side='right')
+        counts = np.bincount(codes * n_bins + bins, minlength=len(keys) * n_bins)
+        low = np.full(len(keys), np.inf)
+        high = np.full(len(keys), -np.inf)
+        np.minimum.at(low, codes, delays)
+        np.maximum.at(high, codes, delays)
+        return cls(keys, edges, counts.reshape(len(keys), n_bins).astype('int64'), low, high)
+
+    def merge(self, other):
+        """
+        Add the counts of another histogram with the same dimensions and bins
+
+        Parameters:
+        -----------
+        other : DelayHistogram
+            Counts for more flights (e.g. another chunk or an ingested file)
+
+        Returns:
+        --------
+        DelayHistogram : Counts of both histograms
+        """
+
+        if self.dims != other.dims or not np.array_equal(self.edges, other.edges):
+            raise ValueError("Only histograms with the same dimensions and bins can be merged")
+        stacked = pd.concat([self.keys, other.keys], ignore_index=True)
+        grouped = stacked.groupby(self.dims, sort=True)
+        codes = grouped.ngroup().to_numpy()
+        keys = grouped.size().index.to_frame(index=False).reset_index(drop=True)
+
+        # Keys are unique within each side, so plain fancy-index updates are safe
+        mine, theirs = codes[:len(self.keys)], codes[len(self.keys):]
+        counts = np.zeros((len(keys), len(self.edges) + 1), dtype='int64')
+        counts[mine] += self.counts
+        counts[theirs] += other.counts
+        low = np.full(len(keys), np.inf)
+        high = np.full(len(keys), -np.inf)
+        low[mine] = self.low
+        low[theirs] = np.minimum(low[theirs], other.low)
+        high[mine] = self.high
+        high[theirs] = np.maximum(high[theirs], other.high)
+        return DelayHistogram(keys, self.edges, counts, low, high)
+
+    def select(self, **filters):
+        """
+        Sum the counts of the keys matching the filters
+
+        Parameters:
+        -----------
+        **filters : list
+            Dimension -> allowed values (None or empty for all), e.g.
+            AIRLINE=['AA', 'DL'], MONTH=[1, 2]
+
+        Returns:
+        --------
+        tuple : (counts, low, high) for the selected flights
+        """
+
+        mask = np.ones(len(self.keys), dtype=bool)
+        for dim, values in filters.items():
+            if values:
+                mask &= self.keys[dim].isin(values).to_numpy()
+        if not mask.any():
+            return np.zeros(len(self.edges) + 1, dtype='int64'), np.nan, np.nan
+        return self.counts[mask].sum(axis=0), self.low[mask].min(), self.high[mask].max()
+
+    def quantiles(self, qs, **filters):
+        """
+        Estimate delay quantiles for the flights matching the filters
+
+        Parameters:
+        -----------
+        qs : sequence
+            Quantiles between 0 and 1, e.g. [0.5, 0.9, 0.99]
+        **filters : list
+            Dimension filters, as for select()
+
+        Returns:
+        --------
+        ndarray : One estimate per quantile (NaN without flights)
+        """
+
+        return histogram_quantiles(self.edges, *self.select(**filters), qs)
+
+    def histogram(self, display_edges, **filters):
+        """
+        Re-bin the selected counts for a chart
+
+        Each finite sketch bin is assigned to the display bin holding its
+        center; display edges should therefore line up with the sketch
+        bins (e.g. 5-minute bins over [-60, 180] for either level).
+
+        Parameters:
+        -----------
+        display_edges : array-like
+            Edges of the chart bins
+        **filters : list
+            Dimension filters, as for select()
+
+        Returns:
+        --------
+        ndarray : Flights per display bin
+        """
+
+        counts, _, _ = self.select(**filters)
+        display_edges = np.asarray(display_edges, dtype='float64')
+        centers = (self.edges[:-1] + self.edges[1:]) / 2
+        target = np.searchsorted(display_edges, centers, side='right') - 1
+        inside = (target >= 0) & (target < len(display_edges) - 1)
+        return np.bincount(target[inside], weights=counts[1:-1][inside],
+                           minlength=len(display_edges) - 1).astype('int64')
+
+    def save(self, path):
+        """Write the histogram to a compressed .npz file"""
+        arrays = {f'key_{dim}': self.keys[dim].to_numpy() for dim in self.dims}
+        arrays = {name: values.astype(str) if values.dtype == object else values
+                  for name, values in arrays.items()}
+        np.savez_compressed(path, edges=self.edges, counts=self.counts.astype('int32'),
+                            low=self.low, high=self.high, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Read a histogram written by save()"""
+        with np.load(path) as data:
+            keys = pd.DataFrame({name[len('key_'):]: data[name] for name in data.files
+                                 if name.startswith('key_')})
+            for col in keys.columns:
+                if keys[col].dtype.kind == 'U':
+                    keys[col] = keys[col].astype(str)
+            return cls(keys, data['edges'], data['counts'].astype('int64'), data['low'], data['high'])
+
+
+def histogram_quantiles(edges, counts, low, high, qs):
+    """
+    Interpolate quantiles from binned counts
+
+    Parameters:
+    -----------
+    edges : ndarray
+        Bin edges of the counts
+    counts : ndarray
+        Counts per bin, including the under- and overflow bins
+    low, high : float
+        Smallest and largest value counted, bounding the open-ended bins
+    qs : sequence
+        Quantiles between 0 and 1
+
+    Returns:
+    --------
+    ndarray : One estimate per quantile (NaN if nothing was counted)
+    """
+
+    qs = np.asarray(qs, dtype='float64')
+    total = counts.sum()
+    if total == 0:
+        return np.full(len(qs), np.nan)
+
+    lower = np.clip(np.concatenate([[low], edges]), low, high)
+    upper = np.clip(np.concatenate([edges, [high]]), low, high)
+    cumulative = np.cumsum(counts)
+    rank = qs * total
+    last = np.flatnonzero(counts)[-1]
+    b = np.minimum(np.searchsorted(cumulative, rank, side='right'), last)
+    fraction = np.clip((rank - (cumulative[b] - counts[b])) / counts[b], 0.0, 1.0)
+    return lower[b] + fraction * (upper[b] - lower[b])
+
+
+class DelaySketches:
+    """
+    Delay histograms for every level in SKETCH_LEVELS
+
+    Parameters:
+    -----------
+    histograms : dict
+        Sketch name -> DelayHistogram
+    """
+
+    def __init__(self, histograms):
+        self.histograms = histograms
+
+    def __getitem__(self, name):
+        return self.histograms[name]
+
+    @classmethod
+    def build(cls, flights_df):
+        """Sketch a batch of flights at every level whose dimensions are present"""
+        return cls({
+            name: DelayHistogram.build(flights_df, dims, edges)
+            for name, (dims, edges) in SKETCH_LEVELS.items()
+            if all(dim in flights_df.columns for dim in dims)
+        })
+
+    def merge(self, other):
+        """Return sketches holding the counts of both inputs"""
+        merged = dict(self.histograms)
+        for name, histogram in other.histograms.items():
+            merged[name] = merged[name].merge(histogram) if name in merged else histogram
+        return DelaySketches(merged)
+
+    def save(self, sketch_dir=DELAY_SKETCH_DIR):
+        """Write one .npz file per sketch level to sketch_dir"""
+        os.makedirs(sketch_dir, exist_ok=True)
+        for name, histogram in self.histograms.items():
+            histogram.save(os.path.join(sketch_dir, f'{name}.npz'))
+
+    @classmethod
+    def load(cls, sketch_dir=DELAY_SKETCH_DIR):
+        """Read the sketch levels saved in sketch_dir"""
+        return cls({
+            name: DelayHistogram.load(os.path.join(sketch_dir, f'{name}.npz'))
+            for name in SKETCH_LEVELS
+            if os.path.exists(os.path.join(sketch_dir, f'{name}.npz'))
+        })
+
+
+def delay_sketches_available(sketch_dir=DELAY_SKETCH_DIR):
+    """Return True if every sketch level has been saved in sketch_dir"""
+    return all(os.path.exists(os.path.join(sketch_dir, f'{name}.npz')) for name in SKETCH_LEVELS)
@@ -0,0 +1,109 @@
+"""
+Filter Index for AirFly Insights
+Bitmap index over the dashboard's filter columns
+
+Each distinct value of an indexed column gets a packed bitmap with one bit
+per flight. A filter is resolved by OR-ing the bitmaps of the selected values
+within a column and AND-ing the results across columns, which yields the
+matching row ids without copying or scanning the flights table.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import numpy as np
+import pandas as pd
+
+# Number of set bits for every possible byte value
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+class BitmapIndex:
+    """
+    Packed bitmaps per (column, value) over a fixed set of rows
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Flights data holding the columns to index
+    columns : list
+        Columns to index, e.g. ['AIRLINE', 'MONTH']
+    """
+
+    def __init__(self, df, columns):
+        self.n_rows = len(df)
+        self._bitmaps = {}
+        for col in columns:
+            self.add_column(col, df[col])
+
+    def add_column(self, name, values):
+        """
+        Index another column (e.g. ORIGIN_AIRPORT, DESTINATION_AIRPORT, SEASON)
+
+        Parameters:
+        -----------
+        name : str
+            Name used to filter on this column
+        values : Series
+            Column values, aligned with the indexed rows
+        """
+
+        if len(values) != self.n_rows:
+            raise ValueError(f"Column {name} has {len(values)} rows, expected {self.n_rows}")
+
+        codes, uniques = pd.factorize(values, sort=True)
+        self._bitmaps[name] = {
+            value: np.packbits(codes == i)
+            for i, value in enumerate(uniques.tolist())
+        }
+
+    def values(self, name):
+        """Return the sorted distinct values of an indexed column"""
+        return list(self._bitmaps[name])
+
+    def _combine(self, filters):
+        """AND the per-column OR of selected bitmaps; None means no filter"""
+        result = None
+        for col, selected in filters.items():
+            if not selected:
+                continue
+            bitmaps = self._bitmaps[col]
+            col_bits = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+            for value in selected:
+                if value in bitmaps:
+                    np.bitwise_or(col_bits, bitmaps[value], out=col_bits)
+            if result is None:
+                result = col_bits
+            else:
+                np.bitwise_and(result, col_bits, out=result)
+        return result
+
+    def select(self, **filters):
+        """
+        Resolve a filter to the matching row positions
+
+        Parameters:
+        -----------
+        **filters : list
+            Column name -> selected values; empty selections are ignored
+
+        Returns:
+        --------
+        ndarray or None : Sorted row positions, or None if no filter is active
+        """
+
+        bits = self._combine(filters)
+        if bits is None:
+            return None
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
+
+    def count(self, **filters):
+        """Return the number of rows matching a filter without materialising them"""
+        bits = self._combine(filters)
+        if bits is None:
+            return self.n_rows
+        return int(_POPCOUNT[bits].sum(dtype=np.int64))
+
+    def memory_usage(self):
+        """Return the total bytes held by all bitmaps"""
+        return sum(b.nbytes for bitmaps in self._bitmaps.values() for b in bitmaps.values())
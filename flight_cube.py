@@ -0,0 +1,237 @@
+"""
+Flight Aggregate Cube for AirFly Insights
+Pre-aggregated additive measures behind the dashboard charts
+
+The cube is a small lattice of cuboids. Every cuboid is keyed by the filter
+dimensions (AIRLINE, MONTH) plus the dimensions a group of charts needs, and
+stores only additive measures (counts, sums and sums of squares). Any chart
+can therefore be answered by filtering a cuboid and summing it up, instead of
+scanning the raw flights table.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataset_manifest import FLIGHT_INPUTS, record_artifact
+from flight_store import list_flight_columns, load_flights
+
+FLIGHT_CUBE_DIR = 'dataset/flight_cube'
+
+FILTER_DIMENSIONS = ['AIRLINE', 'MONTH']
+
+# Cuboid name -> grouping dimensions (the filter dimensions are always included)
+CUBOIDS = {
+    'temporal': FILTER_DIMENSIONS + ['DEP_HOUR', 'DAY_NAME', 'SEASON'],
+    'route': FILTER_DIMENSIONS + ['ROUTE', 'ORIGIN_AIRPORT', 'DESTINATION_AIRPORT'],
+    'category': FILTER_DIMENSIONS + ['DELAY_CATEGORY', 'DISTANCE_CATEGORY'],
+}
+
+# Measure prefix -> delay column summarised with count, sum and sum of squares
+DELAY_MEASURES = {
+    'arr_delay': 'ARRIVAL_DELAY',
+    'dep_delay': 'DEPARTURE_DELAY',
+}
+
+MEASURE_COLUMNS = ['ARRIVAL_DELAY', 'DEPARTURE_DELAY', 'CANCELLED', 'DIVERTED', 'DISTANCE']
+
+# Every column the cube build reads from the flights table
+CUBE_COLUMNS = list(dict.fromkeys(
+    [dim for dims in CUBOIDS.values() for dim in dims] + MEASURE_COLUMNS
+))
+
+
+def _measure_frame(df):
+    """Turn raw flight rows into per-row additive measures"""
+
+    measures = pd.DataFrame(index=df.index)
+    measures['flights'] = np.ones(len(df), dtype='int64')
+    for prefix, col in DELAY_MEASURES.items():
+        values = df[col].astype('float64')
+        measures[f'{prefix}_n'] = values.notna().astype('int64')
+        measures[f'{prefix}_sum'] = values.fillna(0.0)
+        measures[f'{prefix}_sumsq'] = values.fillna(0.0) ** 2
+    measures['cancelled'] = df['CANCELLED'].fillna(0).astype('int64')
+    measures['diverted'] = df['DIVERTED'].fillna(0).astype('int64')
+    measures['on_time'] = (df['ARRIVAL_DELAY'] <= 15).astype('int64')
+    measures['distance_sum'] = df['DISTANCE'].astype('float64')
+    return measures
+
+
+def derive_metrics(agg):
+    """
+    Add the dashboard metrics derived from summed cube measures
+
+    Parameters:
+    -----------
+    agg : DataFrame
+        Rolled-up cube measures
+
+    Returns:
+    --------
+    DataFrame : The measures plus average delays, delay standard deviation,
+        on-time %, cancellation %, diversion % and average distance
+    """
+
+    out = agg.copy()
+    for prefix, name in [('arr_delay', 'arrival'), ('dep_delay', 'departure')]:
+        n = agg[f'{prefix}_n'].where(agg[f'{prefix}_n'] > 0)
+        mean = agg[f'{prefix}_sum'] / n
+        out[f'avg_{name}_delay'] = mean
+        out[f'{name}_delay_std'] = np.sqrt((agg[f'{prefix}_sumsq'] / n - mean ** 2).clip(lower=0))
+    flights = agg['flights'].where(agg['flights'] > 0)
+    out['on_time_pct'] = agg['on_time'] / flights * 100
+    out['cancellation_pct'] = agg['cancelled'] / flights * 100
+    out['diversion_pct'] = agg['diverted'] / flights * 100
+    out['avg_distance'] = agg['distance_sum'] / flights
+    return out
+
+
+class FlightCube:
+    """
+    Lattice of pre-aggregated cuboids over the flights table
+
+    Parameters:
+    -----------
+    cuboids : dict
+        Cuboid name -> DataFrame of dimensions and summed measures
+    """
+
+    def __init__(self, cuboids):
+        self.cuboids = cuboids
+
+    @classmethod
+    def build(cls, flights_df):
+        """
+        Aggregate raw flights into every cuboid
+
+        Dimensions missing from flights_df are left out of the cuboids
+        that reference them.
+
+        Parameters:
+        -----------
+        flights_df : DataFrame
+            Flights data containing (a subset of) CUBE_COLUMNS
+
+        Returns:
+        --------
+        FlightCube : The built cube
+        """
+
+        measures = _measure_frame(flights_df)
+        cuboids = {}
+        for name, dims in CUBOIDS.items():
+            dims = [d for d in dims if d in flights_df.columns]
+            keys = [flights_df[d] for d in dims]
+            cuboid = measures.groupby(keys, observed=True, dropna=False, sort=True).sum()
+            cuboids[name] = cuboid.reset_index()
+        return cls(cuboids)
+
+    @classmethod
+    def load(cls, cube_dir=FLIGHT_CUBE_DIR):
+        """Load a cube previously written with save()"""
+        cuboids = {
+            name: pd.read_parquet(os.path.join(cube_dir, f'{name}.parquet'))
+            for name in CUBOIDS
+        }
+        return cls(cuboids)
+
+    def save(self, cube_dir=FLIGHT_CUBE_DIR):
+        """Write every cuboid as a Parquet file under cube_dir"""
+        os.makedirs(cube_dir, exist_ok=True)
+        for name, cuboid in self.cuboids.items():
+            cuboid.to_parquet(os.path.join(cube_dir, f'{name}.parquet'), index=False)
+
+    def merge(self, other):
+        """
+        Combine two cubes built over disjoint sets of flights
+
+        Parameters:
+        -----------
+        other : FlightCube
+            Cube holding the measures to add
+
+        Returns:
+        --------
+        FlightCube : Cube whose measures are the sum of both cubes
+        """
+
+        cuboids = {}
+        for name, cuboid in self.cuboids.items():
+            dims = [c for c in cuboid.columns if c in CUBE_COLUMNS]
+            combined = pd.concat([cuboid, other.cuboids[name]], ignore_index=True)
+            merged = combined.groupby(dims, observed=True, dropna=False, sort=True).sum()
+            cuboids[name] = merged.reset_index()
+        return FlightCube(cuboids)
+
+    def has_dimension(self, dim):
+        """Return True if any cuboid can group by dim"""
+        return any(dim in cuboid.columns for cuboid in self.cuboids.values())
+
+    def _select_cuboid(self, dims):
+        """Pick the smallest cuboid that contains all of dims"""
+        candidates = [c for c in self.cuboids.values() if all(d in c.columns for d in dims)]
+        if not candidates:
+            raise KeyError(f"No cuboid covers dimensions {dims}")
+        return min(candidates, key=len)
+
+    def rollup(self, by, airlines=None, months=None):
+        """
+        Answer a group-by from the cube
+
+        Parameters:
+        -----------
+        by : list
+            Dimensions to group by (empty list for a grand total)
+        airlines : list, optional
+            Restrict to these airlines
+        months : list, optional
+            Restrict to these months
+
+        Returns:
+        --------
+        DataFrame : Summed measures and derived metrics indexed by `by`
+        """
+
+        by = list(by)
+        cuboid = self._select_cuboid(by + FILTER_DIMENSIONS)
+        mask = np.ones(len(cuboid), dtype=bool)
+        if airlines:
+            mask &= cuboid['AIRLINE'].isin(airlines).to_numpy()
+        if months:
+            mask &= cuboid['MONTH'].isin(months).to_numpy()
+        selected = cuboid[mask]
+
+        measure_cols = [c for c in selected.columns if c not in CUBE_COLUMNS]
+        if by:
+            agg = selected.groupby(by, observed=True)[measure_cols].sum()
+        else:
+            agg = selected[measure_cols].sum().to_frame().T
+        return derive_metrics(agg)
+
+
+def build_flight_cube(cube_dir=FLIGHT_CUBE_DIR):
+    """Build the cube from the flight store, save it to cube_dir and stamp it with the store's fingerprints"""
+    available = list_flight_columns()
+    columns = [c for c in CUBE_COLUMNS if c in available]
+    cube = FlightCube.build(load_flights(columns=columns))
+    cube.save(cube_dir)
+    record_artifact(cube_dir, FLIGHT_INPUTS)
+    return cube
+
+
+def cube_available(cube_dir=FLIGHT_CUBE_DIR):
+    """Return True if a saved cube exists in cube_dir"""
+    return all(os.path.exists(os.path.join(cube_dir, f'{name}.parquet')) for name in CUBOIDS)
+
+
+if __name__ == "__main__":
+    print("Building flight aggregate cube...")
+    cube = build_flight_cube()
+    for name, cuboid in cube.cuboids.items():
+        print(f"   {name}: {len(cuboid):,} cells")
+    print(f"Cube saved to {FLIGHT_CUBE_DIR}")
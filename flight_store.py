@@ -0,0 +1,533 @@
+"""
+Flight Data Store for AirFly Insights
+Typed, columnar storage for the processed flights dataset
+
+The processed dataset is converted once from CSV into a Parquet dataset
+partitioned by MONTH, with a fixed schema (categorical codes, int8 time
+fields, float32 delays). All consumers read through load_flights(), which
+falls back to the original CSV when the Parquet store is not available.
+
+Loaded frames are narrowed further by compact_flights(): text columns become
+categoricals, small integers int8/int16, the cancelled/diverted flags
+booleans and the integral time and duration columns nullable int16, each
+only when every value fits, so the in-memory layout stays lossless.
+
+For multi-process deployments the table can also be exported as one
+memory-mapped NumPy file per column. Readers then get zero-copy, read-only
+views backed by the OS page cache, so every process and session shares a
+single copy of the data.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, CSV fallback is used instead
+    pa = None
+    ds = None
+    pq = None
+
+# Default dataset locations (relative to the project root)
+FLIGHTS_CSV = 'dataset/final_processed_flights.csv'
+FLIGHTS_PARQUET = 'dataset/final_processed_flights.parquet'
+FLIGHTS_MMAP = 'dataset/final_processed_flights.mmap'
+
+# Fixed schema for the processed flights table
+CATEGORICAL_COLUMNS = ['AIRLINE', 'ORIGIN_AIRPORT', 'DESTINATION_AIRPORT', 'ROUTE', 'DAY_NAME']
+INT8_COLUMNS = ['MONTH', 'DEP_HOUR']
+FLOAT32_COLUMNS = [
+    'DEPARTURE_DELAY', 'ARRIVAL_DELAY', 'AIR_SYSTEM_DELAY', 'SECURITY_DELAY',
+    'AIRLINE_DELAY', 'LATE_AIRCRAFT_DELAY', 'WEATHER_DELAY', 'TOTAL_DELAY'
+]
+
+# Text columns that may be entirely empty within a single CSV chunk
+STRING_COLUMNS = CATEGORICAL_COLUMNS + [
+    'TAIL_NUMBER', 'CANCELLATION_REASON', 'FL_DATE', 'SEASON',
+    'DELAY_CATEGORY', 'DISTANCE_CATEGORY'
+]
+
+FLIGHTS_SCHEMA = {
+    **{col: 'category' for col in CATEGORICAL_COLUMNS},
+    **{col: 'int8' for col in INT8_COLUMNS},
+    **{col: 'float32' for col in FLOAT32_COLUMNS},
+}
+
+# Compact in-memory layout applied on load (see compact_flights)
+FLAG_COLUMNS = ['CANCELLED', 'DIVERTED']
+NULLABLE_INT16_COLUMNS = [
+    'DEPARTURE_TIME', 'TAXI_OUT', 'WHEELS_OFF', 'SCHEDULED_TIME', 'ELAPSED_TIME',
+    'AIR_TIME', 'WHEELS_ON', 'TAXI_IN', 'ARRIVAL_TIME'
+]
+COMPACT_SCHEMA = {
+    **{col: 'category' for col in STRING_COLUMNS},
+    **{col: 'int8' for col in INT8_COLUMNS + ['DAY', 'DAY_OF_WEEK', 'DEP_MINUTE']},
+    **{col: 'int16' for col in ['YEAR', 'FLIGHT_NUMBER', 'SCHEDULED_DEPARTURE', 'SCHEDULED_ARRIVAL', 'DISTANCE']},
+    **{col: 'Int16' for col in NULLABLE_INT16_COLUMNS},
+    **{col: 'bool' for col in FLAG_COLUMNS},
+}
+
+PARTITION_COLUMNS = ['MONTH']
+
+
+def apply_schema(df, categoricals=True):
+    """
+    Cast the columns of a flights DataFrame to the fixed storage schema
+
+    Columns that are not part of the schema, or not present in the
+    DataFrame, are left untouched.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Flights data as read from CSV or Parquet
+    categoricals : bool
+        Also convert the code columns to categoricals
+
+    Returns:
+    --------
+    DataFrame : The same DataFrame with typed columns
+    """
+
+    for col, dtype in FLIGHTS_SCHEMA.items():
+        if dtype == 'category' and not categoricals:
+            continue
+        if col in df.columns and df[col].dtype != dtype:
+            if dtype == 'int8' and isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype('int64')
+            df[col] = df[col].astype(dtype)
+        if dtype == 'category' and col in df.columns:
+            # Parquet dictionaries come back in order of appearance; sort them
+            # so group-bys list codes alphabetically, as with plain strings
+            categories = df[col].cat.categories
+            if not categories.is_monotonic_increasing:
+                df[col] = df[col].cat.reorder_categories(categories.sort_values())
+    return df
+
+
+def _fits(series, dtype):
+    """Return True if every value of a numeric column is representable in dtype"""
+    values = series.to_numpy(dtype='float64', na_value=np.nan)
+    present = values[~np.isnan(values)]
+    if dtype == 'bool':
+        return len(present) == len(values) and np.isin(present, [0, 1]).all()
+    if dtype != 'Int16' and len(present) < len(values):
+        return False
+    info = np.iinfo(dtype.lower())
+    return (len(present) == 0 or (present.min() >= info.min and present.max() <= info.max
+                                  and (present == np.round(present)).all()))
+
+
+def compact_flights(df, memory=None):
+    """
+    Narrow the columns of a flights DataFrame to the compact in-memory layout
+
+    Text columns become categoricals and numeric columns the smallest type of
+    COMPACT_SCHEMA. A numeric column is only converted when every value fits
+    its target type (integral, in range and, except for nullable int16,
+    without missing values); otherwise it is left unchanged.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Flights data with the storage schema applied
+    memory : dict, optional
+        Filled with the bytes held before and after ('before', 'after')
+
+    Returns:
+    --------
+    DataFrame : The same DataFrame with compact columns
+    """
+
+    if memory is not None:
+        memory['before'] = int(df.memory_usage(deep=True, index=False).sum())
+    for col, dtype in COMPACT_SCHEMA.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        if dtype == 'category':
+            df[col] = df[col].astype('category')
+        elif pd.api.types.is_numeric_dtype(df[col]) and _fits(df[col], dtype):
+            df[col] = df[col].astype(dtype)
+    if memory is not None:
+        memory['after'] = int(df.memory_usage(deep=True, index=False).sum())
+    return df
+
+
+def parquet_available(parquet_path=FLIGHTS_PARQUET):
+    """Return True if a converted Parquet store exists and pyarrow is installed"""
+    return pq is not None and os.path.isdir(parquet_path)
+
+
+def convert_csv_to_parquet(csv_path=FLIGHTS_CSV, output_dir=FLIGHTS_PARQUET,
+                           chunksize=500_000, overwrite=True):
+    """
+    Convert the processed flights CSV into a partitioned Parquet dataset
+
+    The CSV is streamed in chunks so the full file never has to fit in
+    memory. Each chunk is cast to the fixed schema and appended to a
+    MONTH-partitioned Parquet dataset.
+
+    Parameters:
+    -----------
+    csv_path : str
+        Source CSV file
+    output_dir : str
+        Target directory for the Parquet dataset
+    chunksize : int
+        Number of CSV rows processed per batch
+    overwrite : bool
+        Remove an existing dataset at output_dir before writing
+
+    Returns:
+    --------
+    int : Number of rows written
+    """
+
+    if pq is None:
+        raise ImportError("pyarrow is required to write the Parquet flight store")
+
+    if overwrite and os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    csv_dtypes = {col: 'string' for col in STRING_COLUMNS}
+    arrow_schema = None
+    total_rows = 0
+
+    reader = pd.read_csv(csv_path, chunksize=chunksize, dtype=csv_dtypes, low_memory=False)
+    for i, chunk in enumerate(reader):
+        # Categories differ between chunks, so code columns are stored as
+        # plain strings (Parquet dictionary-encodes them) and restored on read
+        chunk = apply_schema(chunk, categoricals=False)
+
+        arrow_schema = _write_parquet_part(chunk, output_dir, f'part-{i:05d}', arrow_schema)
+        total_rows += len(chunk)
+
+    # Keep the original column order so loaded frames match the CSV layout
+    if arrow_schema is not None:
+        with open(os.path.join(output_dir, '_columns.json'), 'w') as f:
+            json.dump(arrow_schema.names, f)
+
+    print(f"Wrote {total_rows:,} rows to {output_dir}")
+    return total_rows
+
+
+def _write_parquet_part(df, output_dir, basename, arrow_schema=None):
+    """Write one typed batch into the partitioned dataset and return its Arrow schema"""
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if arrow_schema is None:
+        arrow_schema = table.schema
+    else:
+        table = table.cast(arrow_schema)
+
+    pq.write_to_dataset(
+        table,
+        root_path=output_dir,
+        partition_cols=[c for c in PARTITION_COLUMNS if c in df.columns],
+        basename_template=f'{basename}-{{i}}.parquet'
+    )
+    return arrow_schema
+
+
+def append_to_parquet(df, parquet_path=FLIGHTS_PARQUET, basename='append'):
+    """
+    Append processed flights to an existing Parquet flight store
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Processed flights with the store's columns
+    parquet_path : str
+        Location of the Parquet dataset
+    basename : str
+        Unique prefix for the new part files
+
+    Returns:
+    --------
+    int : Number of rows appended
+    """
+
+    with open(os.path.join(parquet_path, '_columns.json'), 'r') as f:
+        columns = json.load(f)
+    df = apply_schema(df[columns].copy(), categoricals=False)
+
+    # Cast to the types already on disk so all parts read back as one table
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    stored = ds.dataset(parquet_path, format='parquet').schema
+    arrow_schema = pa.schema([
+        stored.field(f.name) if f.name in stored.names else f for f in table.schema
+    ])
+    _write_parquet_part(df, parquet_path, basename, arrow_schema)
+    return len(df)
+
+
+def _read_parquet(parquet_path, columns=None, months=None):
+    """Read (a projection of) the Parquet flight store into pandas"""
+
+    partitioning = ds.partitioning(pa.schema([('MONTH', pa.int8())]), flavor='hive')
+    filters = [('MONTH', 'in', [int(m) for m in months])] if months else None
+    read_dictionary = [c for c in CATEGORICAL_COLUMNS if columns is None or c in columns]
+
+    table = pq.read_table(
+        parquet_path,
+        columns=list(columns) if columns is not None else None,
+        filters=filters,
+        partitioning=partitioning,
+        read_dictionary=read_dictionary
+    )
+    df = table.to_pandas()
+
+    # Restore the original column order (the partition column is appended last)
+    order_file = os.path.join(parquet_path, '_columns.json')
+    if columns is not None:
+        order = list(columns)
+    elif os.path.exists(order_file):
+        with open(order_file, 'r') as f:
+            order = [c for c in json.load(f) if c in df.columns]
+    else:
+        order = list(df.columns)
+    return df[order]
+
+
+def load_flights(columns=None, months=None, parquet_path=FLIGHTS_PARQUET, csv_path=FLIGHTS_CSV,
+                 mmap_path=FLIGHTS_MMAP, compact=True, memory=None):
+    """
+    Load the processed flights data with the fixed schema applied
+
+    Reads from the memory-mapped export when it exists (zero-copy,
+    read-only columns), then the Parquet store, and otherwise falls back
+    to parsing the CSV file. Parquet and CSV reads are narrowed to the
+    compact layout; memory-mapped columns are already compact and stay
+    shared views.
+
+    Parameters:
+    -----------
+    columns : list, optional
+        Subset of columns to load (all columns if None)
+    months : list, optional
+        Only load rows for these months
+    parquet_path : str
+        Location of the Parquet dataset
+    csv_path : str
+        Location of the CSV fallback
+    mmap_path : str or None
+        Location of the memory-mapped export (None to skip it)
+    compact : bool
+        Narrow the columns with compact_flights()
+    memory : dict, optional
+        Filled with the bytes held before and after compaction
+
+    Returns:
+    --------
+    DataFrame : Typed flights data
+    """
+
+    # MONTH is read to filter on even when it is not one of the requested columns
+    drop_month = bool(months) and columns is not None and 'MONTH' not in columns
+    read_columns = [*columns, 'MONTH'] if drop_month else columns
+    mapped = bool(mmap_path) and memory_map_available(mmap_path)
+    if mapped:
+        df = _read_memory_mapped(mmap_path, columns=read_columns)
+        if months:
+            df = df[df['MONTH'].isin(months).to_numpy()].reset_index(drop=True)
+    elif parquet_available(parquet_path):
+        df = _read_parquet(parquet_path, columns=columns, months=months)
+    else:
+        usecols = list(read_columns) if read_columns is not None else None
+        df = pd.read_csv(csv_path, usecols=usecols, low_memory=False)
+        if months:
+            df = df[df['MONTH'].isin(months)].reset_index(drop=True)
+    if drop_month and 'MONTH' in df.columns:
+        df = df.drop(columns='MONTH')
+
+    df = apply_schema(df)
+    if compact and not mapped:
+        df = compact_flights(df, memory)
+    return df
+
+
+def memory_map_available(mmap_path=FLIGHTS_MMAP):
+    """Return True if a memory-mapped column export exists"""
+    return os.path.exists(os.path.join(mmap_path, '_columns.json'))
+
+
+def export_memory_mapped(output_dir=FLIGHTS_MMAP, parquet_path=FLIGHTS_PARQUET, csv_path=FLIGHTS_CSV):
+    """
+    Export the flights table as one memory-mappable NumPy file per column
+
+    Numeric columns are written as <COLUMN>.npy in the compact layout
+    (nullable int16 columns as float32 with NaN for missing values).
+    Categorical and text columns are written as <COLUMN>.codes.npy plus
+    <COLUMN>.categories.json. Columns are exported one at a time to bound
+    peak memory.
+
+    Parameters:
+    -----------
+    output_dir : str
+        Target directory for the column files
+    parquet_path : str
+        Location of the Parquet dataset to read from
+    csv_path : str
+        Location of the CSV fallback
+
+    Returns:
+    --------
+    list : Names of the exported columns
+    """
+
+    os.makedirs(output_dir, exist_ok=True)
+    columns = list_flight_columns(parquet_path, csv_path, mmap_path=None)
+    for col in columns:
+        series = load_flights(columns=[col], parquet_path=parquet_path,
+                              csv_path=csv_path, mmap_path=None)[col]
+        if pd.api.types.is_numeric_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+            if isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+                series = series.astype('float32')
+            np.save(os.path.join(output_dir, f'{col}.npy'), series.to_numpy())
+            continue
+        if not isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype('category')
+        np.save(os.path.join(output_dir, f'{col}.codes.npy'), series.array.codes)
+        with open(os.path.join(output_dir, f'{col}.categories.json'), 'w') as f:
+            json.dump(series.cat.categories.tolist(), f)
+
+    # Written last so a partial export is never picked up by readers
+    with open(os.path.join(output_dir, '_columns.json'), 'w') as f:
+        json.dump(columns, f)
+    print(f"Exported {len(columns)} memory-mapped columns to {output_dir}")
+    return columns
+
+
+def _read_memory_mapped(mmap_path, columns=None):
+    """Open (a projection of) the column export as zero-copy, read-only views"""
+
+    if columns is None:
+        with open(os.path.join(mmap_path, '_columns.json'), 'r') as f:
+            columns = json.load(f)
+
+    data = {}
+    for col in columns:
+        values_file = os.path.join(mmap_path, f'{col}.npy')
+        if os.path.exists(values_file):
+            data[col] = pd.Series(np.load(values_file, mmap_mode='r'), name=col, copy=False)
+        else:
+            codes = np.load(os.path.join(mmap_path, f'{col}.codes.npy'), mmap_mode='r')
+            with open(os.path.join(mmap_path, f'{col}.categories.json'), 'r') as f:
+                categories = json.load(f)
+            data[col] = pd.Series(pd.Categorical.from_codes(codes, categories=categories),
+                                  name=col, copy=False)
+    return pd.DataFrame(data, copy=False)
+
+
+def list_flight_columns(parquet_path=FLIGHTS_PARQUET, csv_path=FLIGHTS_CSV, mmap_path=FLIGHTS_MMAP):
+    """Return the column names of the flights table without loading any rows"""
+
+    if mmap_path and memory_map_available(mmap_path):
+        with open(os.path.join(mmap_path, '_columns.json'), 'r') as f:
+            return json.load(f)
+    if parquet_available(parquet_path):
+        order_file = os.path.join(parquet_path, '_columns.json')
+        if os.path.exists(order_file):
+            with open(order_file, 'r') as f:
+                return json.load(f)
+        return ds.dataset(parquet_path, partitioning='hive').schema.names
+    return list(pd.read_csv(csv_path, nrows=0).columns)
+
+
+class FlightColumnStore:
+    """
+    Lazily loaded, per-column cache of the flights table
+
+    Columns are read from the flight store the first time any caller asks
+    for them and kept in memory afterwards, so a page that only needs a
+    handful of columns never pays for materialising the full table.
+    Instances are thread-safe and meant to be shared across sessions.
+
+    When a memory-mapped export exists, cached columns are read-only views
+    of the mapped files, so all processes on the host share one copy.
+
+    Parameters:
+    -----------
+    parquet_path : str
+        Location of the Parquet dataset
+    csv_path : str
+        Location of the CSV fallback
+    mmap_path : str or None
+        Location of the memory-mapped export
+    """
+
+    def __init__(self, parquet_path=FLIGHTS_PARQUET, csv_path=FLIGHTS_CSV, mmap_path=FLIGHTS_MMAP):
+        self.parquet_path = parquet_path
+        self.csv_path = csv_path
+        self.mmap_path = mmap_path
+        self.available_columns = list_flight_columns(parquet_path, csv_path, mmap_path)
+        self._columns = {}
+        self._lock = threading.Lock()
+
+    @property
+    def loaded_columns(self):
+        """Names of the columns currently held in memory"""
+        return list(self._columns)
+
+    def frame(self, columns):
+        """
+        Return a DataFrame holding the requested columns
+
+        Columns that are not cached yet are loaded in a single projected
+        read. Columns that do not exist in the dataset are skipped, so
+        callers can keep checking for optional columns with `in df.columns`.
+
+        Parameters:
+        -----------
+        columns : list
+            Column names needed by the caller
+
+        Returns:
+        --------
+        DataFrame : Flights data restricted to the requested columns
+        """
+
+        wanted = [c for c in dict.fromkeys(columns) if c in self.available_columns]
+        with self._lock:
+            missing = [c for c in wanted if c not in self._columns]
+            if missing:
+                loaded = load_flights(columns=missing, parquet_path=self.parquet_path,
+                                      csv_path=self.csv_path, mmap_path=self.mmap_path)
+                for col in missing:
+                    self._columns[col] = loaded[col]
+        return pd.DataFrame({c: self._columns[c] for c in wanted}, copy=False)
+
+    def memory_usage(self):
+        """Return the bytes held by each cached column"""
+        return {c: int(s.memory_usage(deep=True, index=False)) for c, s in self._columns.items()}
+
+
+if __name__ == "__main__":
+    import sys
+
+    print(f"Converting {FLIGHTS_CSV} to Parquet...")
+    convert_csv_to_parquet()
+    print(f"Parquet flight store ready at {FLIGHTS_PARQUET}")
+
+    if '--mmap' in sys.argv:
+        print("Exporting memory-mapped columns...")
+        export_memory_mapped()
+        print(f"Shared-memory flight store ready at {FLIGHTS_MMAP}")
+
+    if '--memory' in sys.argv:
+        memory = {}
+        rows = len(load_flights(mmap_path=None, memory=memory))
+        print(f"In-memory layout for {rows:,} rows: {memory['before'] / rows:.1f} bytes/row as stored, "
+              f"{memory['after'] / rows:.1f} bytes/row compacted "
+              f"({memory['before'] / 1024 ** 2:,.0f} MB -> {memory['after'] / 1024 ** 2:,.0f} MB)")
@@ -0,0 +1,299 @@
+"""
+Incremental Ingestion for AirFly Insights
+Append new raw flight files to the processed store
+
+A new raw flights file (e.g. one more month of flights.csv rows) is
+preprocessed in chunks and appended to the processed CSV and, when present,
+the Parquet flight store. The flight cube, the delay sketches and the
+summary statistics are updated by merging partial results for the new rows
+only, so nothing is recomputed over the existing data. Saved partial
+results that no longer match the store they were built from (see
+dataset_manifest) are recomputed from the store before merging.
+
+Each ingested file is recorded in an ingestion log by content fingerprint;
+ingesting the same file again is a no-op. Before the first row is appended,
+an in-progress entry records the CSV's length and the prefix of the new
+Parquet parts. If the ingestion fails (or the process dies), the store is
+rolled back to that point, either right away or on the next run, so a retry
+never appends the same rows twice.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import csv
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+from dataset_manifest import MANIFEST_PATH, artifact_is_current, record_artifact, stamp_path
+from delay_sketch import (DELAY_SKETCH_DIR, SKETCH_COLUMNS, DelaySketches,
+                          delay_sketches_available)
+from flight_cube import CUBE_COLUMNS, FLIGHT_CUBE_DIR, FlightCube, cube_available
+from flight_store import (FLIGHTS_CSV, FLIGHTS_MMAP, FLIGHTS_PARQUET, append_to_parquet,
+                          export_memory_mapped, list_flight_columns, load_flights,
+                          memory_map_available, parquet_available)
+from preprocessing import DEFAULT_CHUNKSIZE, iter_preprocessed_chunks
+from summary_stats import (SUMMARY_COLUMNS, SUMMARY_PARTIALS, SUMMARY_PATH, compute_partials,
+                           finalize_summary, load_partials, merge_partials, save_partials,
+                           save_summary)
+
+INGEST_LOG = 'dataset/ingest_log.json'
+
+
+def file_fingerprint(path, block_size=1024 ** 2):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_ingest_log(log_path=INGEST_LOG):
+    """Return the list of ingested file records (empty if nothing was ingested)"""
+    if not os.path.exists(log_path):
+        return []
+    with open(log_path, 'r') as f:
+        return json.load(f)
+
+
+def _save_ingest_log(log, log_path=INGEST_LOG):
+    """Write the ingestion log atomically so an interrupted write never loses it"""
+    tmp_path = f"{log_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(log, f, indent=2)
+    os.replace(tmp_path, log_path)
+
+
+def _is_completed(entry):
+    """Return True for log entries of finished ingestions (older logs have no status)"""
+    return entry.get('status', 'done') == 'done'
+
+
+def ingest_in_progress(log_path=INGEST_LOG):
+    """Return True while an ingestion is appending to the store (or was interrupted doing so)"""
+    return not all(_is_completed(entry) for entry in load_ingest_log(log_path))
+
+
+def _existing_store(csv_path, parquet_path):
+    """Return (columns, kwargs) for reading the current store, or (None, None) if empty"""
+    if not (os.path.exists(csv_path) or parquet_available(parquet_path)):
+        return None, None
+    kwargs = {'parquet_path': parquet_path, 'csv_path': csv_path, 'mmap_path': None}
+    return list_flight_columns(parquet_path, csv_path, mmap_path=None), kwargs
+
+
+def _append_to_csv(df, csv_path):
+    """Append processed rows to the CSV store in its existing column order"""
+    if os.path.exists(csv_path):
+        with open(csv_path, 'r', newline='') as f:
+            header = next(csv.reader(f), [])
+        missing = [c for c in header if c not in df.columns]
+        if missing:
+            raise ValueError(f"Processed rows lack columns of {csv_path}: {', '.join(missing)}")
+        df[header].to_csv(csv_path, mode='a', header=False, index=False)
+    else:
+        df.to_csv(csv_path, index=False)
+
+
+def _refresh_memory_map(mmap_path, parquet_path, csv_path):
+    """Re-export the memory-mapped columns and swap them in place of the old export"""
+    staging = mmap_path + '.new'
+    shutil.rmtree(staging, ignore_errors=True)
+    export_memory_mapped(staging, parquet_path, csv_path)
+    retired = mmap_path + '.old'
+    shutil.rmtree(retired, ignore_errors=True)
+    # Files already mapped by running readers stay valid after the rename
+    os.rename(mmap_path, retired)
+    os.rename(staging, mmap_path)
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+def _parquet_parts(parquet_path, prefix):
+    """Return the part files of the Parquet store whose names start with prefix"""
+    parts = []
+    for root, _, names in os.walk(parquet_path):
+        parts += [os.path.join(root, name) for name in names if name.startswith(prefix)]
+    return parts
+
+
+def _roll_back(entry, csv_path, parquet_path, mmap_path, artifacts):
+    """
+    Undo a failed ingestion recorded by an in-progress log entry
+
+    The CSV is truncated to its length before the ingestion (or removed if
+    the ingestion created it) and the new Parquet parts are deleted. If the
+    merged artifacts were being written, their stamps are removed so they are
+    rebuilt from the restored store, and the memory-mapped export is
+    refreshed from it.
+    """
+
+    if entry['csv_bytes'] is None:
+        if os.path.exists(csv_path):
+            os.remove(csv_path)
+    elif os.path.exists(csv_path) and os.path.getsize(csv_path) > entry['csv_bytes']:
+        with open(csv_path, 'r+b') as f:
+            f.truncate(entry['csv_bytes'])
+
+    if os.path.isdir(parquet_path):
+        for part in _parquet_parts(parquet_path, entry['parquet_prefix']):
+            os.remove(part)
+            # Drop partition directories that only held the new rows
+            partition = os.path.dirname(part)
+            if partition != parquet_path and not os.listdir(partition):
+                os.rmdir(partition)
+
+    if entry.get('stage') == 'artifacts':
+        for artifact in artifacts:
+            if os.path.exists(stamp_path(artifact)):
+                os.remove(stamp_path(artifact))
+        if memory_map_available(mmap_path):
+            _refresh_memory_map(mmap_path, parquet_path, csv_path)
+
+
+def ingest_flights(raw_path, csv_path=FLIGHTS_CSV, parquet_path=FLIGHTS_PARQUET,
+                   mmap_path=FLIGHTS_MMAP, cube_dir=FLIGHT_CUBE_DIR,
+                   sketch_dir=DELAY_SKETCH_DIR, partials_path=SUMMARY_PARTIALS, summary_path=SUMMARY_PATH,
+                   log_path=INGEST_LOG, chunksize=DEFAULT_CHUNKSIZE, manifest_path=MANIFEST_PATH):
+    """
+    Ingest a new raw flights file into the processed store
+
+    Parameters:
+    -----------
+    raw_path : str
+        Raw flights CSV with the columns of dataset/flights.csv
+    csv_path : str
+        Processed flights CSV to append to
+    parquet_path : str
+        Parquet flight store to append to (skipped if it does not exist)
+    mmap_path : str
+        Memory-mapped export to refresh (skipped if it does not exist)
+    cube_dir : str
+        Saved flight cube to merge the new rows into
+    sketch_dir : str
+        Saved delay sketches to merge the new rows into
+    partials_path : str
+        Saved summary partial results to merge the new rows into
+    summary_path : str
+        analysis_summary.json to rewrite from the merged partials
+    log_path : str
+        Ingestion log used to skip files that were already ingested
+    chunksize : int
+        Raw rows preprocessed per batch
+    manifest_path : str
+        Dataset manifest the saved artifacts are checked against and stamped with
+
+    Returns:
+    --------
+    int : Number of rows ingested (0 if the file was already ingested)
+    """
+
+    artifacts = [cube_dir, sketch_dir, partials_path, summary_path]
+    fingerprint = file_fingerprint(raw_path)
+    log = load_ingest_log(log_path)
+
+    # Undo ingestions that were interrupted before they could clean up
+    interrupted = [entry for entry in log if not _is_completed(entry)]
+    for entry in interrupted:
+        print(f"Rolling back the interrupted ingestion of {entry['file']}")
+        _roll_back(entry, csv_path, parquet_path, mmap_path, artifacts)
+    if interrupted:
+        log = [entry for entry in log if _is_completed(entry)]
+        _save_ingest_log(log, log_path)
+
+    if any(entry['fingerprint'] == fingerprint for entry in log):
+        print(f"{raw_path} was already ingested, skipping")
+        return 0
+
+    # Partial results for the existing data, computed once if not saved yet
+    # or saved for a store that has changed since
+    existing_columns, store_kwargs = _existing_store(csv_path, parquet_path)
+    partials = load_partials(partials_path) if artifact_is_current(partials_path, manifest_path) else None
+    if partials is None and existing_columns is not None:
+        columns = [c for c in SUMMARY_COLUMNS if c in existing_columns]
+        partials = compute_partials(load_flights(columns=columns, **store_kwargs))
+    if cube_available(cube_dir) and artifact_is_current(cube_dir, manifest_path):
+        cube = FlightCube.load(cube_dir)
+    elif existing_columns is not None:
+        columns = [c for c in CUBE_COLUMNS if c in existing_columns]
+        cube = FlightCube.build(load_flights(columns=columns, **store_kwargs))
+    else:
+        cube = None
+    if delay_sketches_available(sketch_dir) and artifact_is_current(sketch_dir, manifest_path):
+        sketches = DelaySketches.load(sketch_dir)
+    elif existing_columns is not None:
+        columns = [c for c in SKETCH_COLUMNS if c in existing_columns]
+        sketches = DelaySketches.build(load_flights(columns=columns, **store_kwargs))
+    else:
+        sketches = None
+
+    # Where the store ends now, so a failed ingestion can be undone
+    entry = {
+        'file': os.path.basename(raw_path),
+        'fingerprint': fingerprint,
+        'status': 'in_progress',
+        'csv_bytes': os.path.getsize(csv_path) if os.path.exists(csv_path) else None,
+        'parquet_prefix': f'ingest-{fingerprint[:12]}-',
+    }
+    log.append(entry)
+    _save_ingest_log(log, log_path)
+
+    try:
+        append_parquet = parquet_available(parquet_path)
+        total_rows = 0
+        for i, chunk in enumerate(iter_preprocessed_chunks(raw_path, chunksize)):
+            _append_to_csv(chunk, csv_path)
+            if append_parquet:
+                append_to_parquet(chunk, parquet_path, basename=f"{entry['parquet_prefix']}{i:05d}")
+
+            chunk_cube = FlightCube.build(chunk[[c for c in CUBE_COLUMNS if c in chunk.columns]])
+            cube = chunk_cube if cube is None else cube.merge(chunk_cube)
+            chunk_sketches = DelaySketches.build(chunk)
+            sketches = chunk_sketches if sketches is None else sketches.merge(chunk_sketches)
+            partials = merge_partials(partials, compute_partials(chunk))
+            total_rows += len(chunk)
+
+        if total_rows:
+            entry['stage'] = 'artifacts'
+            _save_ingest_log(log, log_path)
+            cube.save(cube_dir)
+            sketches.save(sketch_dir)
+            save_partials(partials, partials_path)
+            save_summary(finalize_summary(partials), summary_path)
+            if memory_map_available(mmap_path):
+                _refresh_memory_map(mmap_path, parquet_path, csv_path)
+            for artifact in artifacts:
+                record_artifact(artifact, [csv_path, parquet_path, mmap_path], manifest_path)
+    except BaseException:
+        _roll_back(entry, csv_path, parquet_path, mmap_path, artifacts)
+        log.remove(entry)
+        _save_ingest_log(log, log_path)
+        raise
+
+    # Completed only once the rows, cube and summary have all been written
+    log[-1] = {
+        'file': entry['file'],
+        'fingerprint': fingerprint,
+        'rows': total_rows,
+        'ingested_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    _save_ingest_log(log, log_path)
+
+    return total_rows
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python ingest.py <new_flights.csv> [...]")
+        sys.exit(1)
+
+    for raw_path in sys.argv[1:]:
+        print(f"Ingesting {raw_path}...")
+        rows = ingest_flights(raw_path)
+        if rows:
+            print(f"✅ Appended {rows:,} flights; cube, delay sketches and summary statistics updated")
@@ -0,0 +1,158 @@
+"""
+KPI Engine for AirFly Insights
+Filter-aware headline metrics from mergeable partial aggregates
+
+The engine keeps one block of additive partials (flights, on-time,
+cancelled and diverted counts, delay count and sum) per
+airline x month x departure hour. Any airline/month filter is answered by
+summing the selected blocks, so the sidebar and the Recommendations page
+reflect the active filters without touching the raw flight rows.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import numpy as np
+
+KPI_MEASURES = ['flights', 'on_time', 'arr_delay_n', 'arr_delay_sum', 'cancelled', 'diverted']
+
+
+def _mean(total, count):
+    """Element-wise total / count with NaN where count is zero"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, total / np.where(count > 0, count, 1), np.nan)
+
+
+class KPIEngine:
+    """
+    Dense partial aggregates indexed by airline, month and departure hour
+
+    Parameters:
+    -----------
+    airlines : list
+        Airline codes along the first axis
+    months : list
+        Months along the second axis
+    hours : list
+        Departure hours along the third axis
+    partials : ndarray
+        Array of shape (airlines, months, hours, len(KPI_MEASURES))
+    """
+
+    def __init__(self, airlines, months, hours, partials):
+        self.airlines = list(airlines)
+        self.months = list(months)
+        self.hours = list(hours)
+        self.partials = partials
+        self._airline_pos = {a: i for i, a in enumerate(self.airlines)}
+        self._month_pos = {m: i for i, m in enumerate(self.months)}
+
+    @classmethod
+    def from_cube(cls, cube):
+        """
+        Build the partials from a FlightCube
+
+        Parameters:
+        -----------
+        cube : FlightCube
+            Aggregate cube holding the temporal cuboid
+
+        Returns:
+        --------
+        KPIEngine : Engine ready to answer filter combinations
+        """
+
+        agg = cube.rollup(['AIRLINE', 'MONTH', 'DEP_HOUR'])[KPI_MEASURES].reset_index()
+        airlines = sorted(agg['AIRLINE'].astype(str).unique())
+        months = sorted(int(m) for m in agg['MONTH'].unique())
+        hours = sorted(int(h) for h in agg['DEP_HOUR'].unique())
+
+        a_idx = agg['AIRLINE'].astype(str).map({a: i for i, a in enumerate(airlines)}).to_numpy()
+        m_idx = agg['MONTH'].astype(int).map({m: i for i, m in enumerate(months)}).to_numpy()
+        h_idx = agg['DEP_HOUR'].astype(int).map({h: i for i, h in enumerate(hours)}).to_numpy()
+
+        partials = np.zeros((len(airlines), len(months), len(hours), len(KPI_MEASURES)))
+        np.add.at(partials, (a_idx, m_idx, h_idx), agg[KPI_MEASURES].to_numpy(dtype='float64'))
+        return cls(airlines, months, hours, partials)
+
+    def merge(self, other):
+        """
+        Combine two engines built from disjoint sets of flights
+
+        Parameters:
+        -----------
+        other : KPIEngine
+            Partials for additional flights (e.g. a newly ingested month)
+
+        Returns:
+        --------
+        KPIEngine : Engine covering the flights of both inputs
+        """
+
+        airlines = sorted(set(self.airlines) | set(other.airlines))
+        months = sorted(set(self.months) | set(other.months))
+        hours = sorted(set(self.hours) | set(other.hours))
+        partials = np.zeros((len(airlines), len(months), len(hours), len(KPI_MEASURES)))
+        for engine in (self, other):
+            a = [airlines.index(x) for x in engine.airlines]
+            m = [months.index(x) for x in engine.months]
+            h = [hours.index(x) for x in engine.hours]
+            partials[np.ix_(a, m, h)] += engine.partials
+        return KPIEngine(airlines, months, hours, partials)
+
+    def compute(self, airlines=None, months=None):
+        """
+        Compute the headline KPIs for an airline/month filter
+
+        Parameters:
+        -----------
+        airlines : list, optional
+            Restrict to these airlines (all airlines if empty)
+        months : list, optional
+            Restrict to these months (all months if empty)
+
+        Returns:
+        --------
+        dict : Metrics keyed like configuration/analysis_summary.json; the best
+            and worst airline are {} and the best and worst hour None when
+            the filter leaves no arrival delays
+        """
+
+        a_sel = [self._airline_pos[a] for a in airlines if a in self._airline_pos] \
+            if airlines else list(range(len(self.airlines)))
+        m_sel = [self._month_pos[m] for m in months if m in self._month_pos] \
+            if months else list(range(len(self.months)))
+        block = self.partials[np.ix_(a_sel, m_sel)]
+
+        flights, on_time, arr_n, arr_sum, cancelled, diverted = block.sum(axis=(0, 1, 2))
+        # Always present, so they replace the unfiltered values of the static summary
+        rankings = {'best_airline': {}, 'worst_airline': {}, 'best_hour': None, 'worst_hour': None}
+        if flights == 0:
+            return {'total_flights': 0, 'on_time_pct': 0.0, 'avg_delay': 0.0,
+                    'cancellation_rate': 0.0, 'diverted_pct': 0.0, **rankings}
+
+        kpis = {
+            'total_flights': int(flights),
+            'on_time_pct': round(float(on_time / flights * 100), 2),
+            'avg_delay': round(float(arr_sum / arr_n), 2) if arr_n else 0.0,
+            'cancellation_rate': round(float(cancelled / flights * 100), 2),
+            'diverted_pct': round(float(diverted / flights * 100), 2),
+            **rankings,
+        }
+
+        n_idx, sum_idx = KPI_MEASURES.index('arr_delay_n'), KPI_MEASURES.index('arr_delay_sum')
+        by_airline = block.sum(axis=(1, 2))
+        airline_delay = _mean(by_airline[:, sum_idx], by_airline[:, n_idx])
+        if not np.all(np.isnan(airline_delay)):
+            codes = [self.airlines[i] for i in a_sel]
+            best, worst = np.nanargmin(airline_delay), np.nanargmax(airline_delay)
+            kpis['best_airline'] = {'code': codes[best], 'avg_delay': round(float(airline_delay[best]), 2)}
+            kpis['worst_airline'] = {'code': codes[worst], 'avg_delay': round(float(airline_delay[worst]), 2)}
+
+        by_hour = block.sum(axis=(0, 1))
+        hour_delay = _mean(by_hour[:, sum_idx], by_hour[:, n_idx])
+        if not np.all(np.isnan(hour_delay)):
+            kpis['best_hour'] = int(self.hours[np.nanargmin(hour_delay)])
+            kpis['worst_hour'] = int(self.hours[np.nanargmax(hour_delay)])
+
+        return kpis
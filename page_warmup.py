@@ -0,0 +1,150 @@
+"""
+Page Warm-up for AirFly Insights
+Background precomputation of the dashboard's cached results
+
+The first visit to a dashboard page normally pays for loading its columns,
+building its indexes and computing its aggregates while the user waits.
+PageWarmup runs the same cached functions on a background thread as soon as
+the server has loaded the data: first the default (unfiltered) results of
+every page, then each page again under the filters a user is likely to pick
+next, such as every single airline. Results land in the Streamlit caches the
+pages read from, so a first interaction is answered from cache.
+
+A thread rather than a process pool is used because the results have to end
+up in the server's own in-process caches; the pandas and numpy kernels doing
+the work release the GIL for most of their runtime.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import logging
+import os
+import threading
+import time
+import weakref
+
+logger = logging.getLogger('airfly.warmup')
+
+# Environment variable that turns the warm-up off (e.g. AIRFLY_WARMUP=0)
+WARMUP_ENV = 'AIRFLY_WARMUP'
+
+# Name of the background thread
+THREAD_NAME = 'airfly-warmup'
+
+# Warm-ups that were started, so they can be cancelled before the caches are cleared
+_started = weakref.WeakSet()
+_started_lock = threading.Lock()
+
+
+def warmup_enabled():
+    """Return False if the AIRFLY_WARMUP environment variable turns the warm-up off"""
+    return os.environ.get(WARMUP_ENV, '').strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+def warmup_tasks(pages, warm_page, prefetch=()):
+    """
+    Order the warm-up tasks: every page's defaults first, then the prefetch filters
+
+    Parameters:
+    -----------
+    pages : list
+        Dashboard pages
+    warm_page : callable
+        warm_page(page, airlines, months) computes the cached results of a page
+    prefetch : list, optional
+        (airlines, months) tuples to compute every page for after the defaults
+
+    Returns:
+    --------
+    list : (name, function, args) tuples for PageWarmup
+    """
+
+    tasks = [(page, warm_page, (page, (), ())) for page in pages]
+    for airlines, months in prefetch:
+        label = ', '.join(str(value) for value in (*airlines, *months))
+        tasks += [(f"{page} [{label}]", warm_page, (page, airlines, months)) for page in pages]
+    return tasks
+
+
+def cancel_all():
+    """Cancel every started warm-up (e.g. before the caches it fills are cleared)"""
+    with _started_lock:
+        warmups = list(_started)
+    for warmup in warmups:
+        warmup.cancel()
+
+
+class _QuietWarmupThread(logging.Filter):
+    """Drop Streamlit's missing ScriptRunContext warnings raised on the warm-up thread"""
+
+    def filter(self, record):
+        return record.threadName != THREAD_NAME
+
+
+class PageWarmup:
+    """
+    Run warm-up tasks one after another on a background thread
+
+    Parameters:
+    -----------
+    tasks : list
+        (name, function, args) tuples, run in order; a failing task is
+        logged and skipped
+    """
+
+    def __init__(self, tasks):
+        self.tasks = list(tasks)
+        self.done = []
+        self.failed = {}
+        self.seconds = 0.0
+        self._cancelled = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background thread and return self"""
+        streamlit_logger = logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context')
+        if not any(isinstance(f, _QuietWarmupThread) for f in streamlit_logger.filters):
+            streamlit_logger.addFilter(_QuietWarmupThread())
+        with _started_lock:
+            _started.add(self)
+        self._thread = threading.Thread(target=self._run, name=THREAD_NAME, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        for name, func, args in self.tasks:
+            if self._cancelled.is_set():
+                break
+            start = time.perf_counter()
+            try:
+                func(*args)
+            except Exception as e:
+                self.failed[name] = str(e)
+                logger.warning("warm-up task %r failed: %s", name, e)
+            else:
+                self.done.append(name)
+            self.seconds += time.perf_counter() - start
+        logger.info("warm-up %s: %d/%d tasks in %.1fs",
+                    'cancelled' if self._cancelled.is_set() else 'finished',
+                    len(self.done), len(self.tasks), self.seconds)
+
+    def cancel(self):
+        """Stop after the running task (e.g. when the data is reloaded)"""
+        self._cancelled.set()
+
+    def wait(self, timeout=None):
+        """Wait for the warm-up to end; return True if it did within timeout seconds"""
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    @property
+    def running(self):
+        """True while tasks are still being run"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def progress(self):
+        """Return (tasks completed or failed, total tasks)"""
+        return len(self.done) + len(self.failed), len(self.tasks)
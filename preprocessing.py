@@ -0,0 +1,402 @@
+"""
+Flights Preprocessing for AirFly Insights
+Feature engineering for the raw flights dataset
+
+This is the preprocessing step from the analysis notebook as an importable
+module. preprocess_flights_data() works on an in-memory DataFrame exactly as
+in the notebook, while preprocess_flights_file() streams the raw CSV in
+fixed-size row batches and appends each processed batch to the output file,
+so peak memory depends on the chunk size and not on the size of the input.
+preprocess_flights_parallel() spreads the same work over a process pool.
+
+Every step is row-local and the raw columns are read with fixed dtypes, so
+the chunked output is identical to processing the whole file at once.
+Delay sketches (see delay_sketch.py) can be built in the same pass; they
+are merged per batch and per worker.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from dataset_manifest import FLIGHT_INPUTS, record_artifact
+from delay_sketch import DELAY_SKETCH_DIR, DelaySketches
+from flight_store import FLIGHTS_CSV
+from route_codes import encode_routes
+
+RAW_FLIGHTS_CSV = 'dataset/flights.csv'
+
+DEFAULT_CHUNKSIZE = 500_000
+
+# Size of the byte ranges handed to parallel workers (about 500K raw rows)
+DEFAULT_RANGE_BYTES = 64 * 1024 ** 2
+
+# Fixed dtypes for the raw flights CSV. Without them pandas infers types per
+# chunk (e.g. int64 for a batch without missing values instead of float64),
+# which would change how values are written back out.
+RAW_DTYPES = {
+    'YEAR': 'int64', 'MONTH': 'int64', 'DAY': 'int64', 'DAY_OF_WEEK': 'int64',
+    'AIRLINE': 'str', 'FLIGHT_NUMBER': 'int64', 'TAIL_NUMBER': 'str',
+    'ORIGIN_AIRPORT': 'str', 'DESTINATION_AIRPORT': 'str',
+    'SCHEDULED_DEPARTURE': 'int64', 'DEPARTURE_TIME': 'float64',
+    'DEPARTURE_DELAY': 'float64', 'TAXI_OUT': 'float64', 'WHEELS_OFF': 'float64',
+    'SCHEDULED_TIME': 'float64', 'ELAPSED_TIME': 'float64', 'AIR_TIME': 'float64',
+    'DISTANCE': 'int64', 'WHEELS_ON': 'float64', 'TAXI_IN': 'float64',
+    'SCHEDULED_ARRIVAL': 'int64', 'ARRIVAL_TIME': 'float64', 'ARRIVAL_DELAY': 'float64',
+    'DIVERTED': 'int64', 'CANCELLED': 'int64', 'CANCELLATION_REASON': 'str',
+    'AIR_SYSTEM_DELAY': 'float64', 'SECURITY_DELAY': 'float64',
+    'AIRLINE_DELAY': 'float64', 'LATE_AIRCRAFT_DELAY': 'float64',
+    'WEATHER_DELAY': 'float64',
+}
+
+DELAY_COLUMNS = ['DEPARTURE_DELAY', 'ARRIVAL_DELAY', 'CARRIER_DELAY',
+                 'WEATHER_DELAY', 'NAS_DELAY', 'SECURITY_DELAY', 'LATE_AIRCRAFT_DELAY']
+
+DELAY_COMPONENTS = ['CARRIER_DELAY', 'WEATHER_DELAY', 'NAS_DELAY', 'SECURITY_DELAY', 'LATE_AIRCRAFT_DELAY']
+
+DELAY_BINS = [-np.inf, -15, 15, 60, np.inf]
+DELAY_LABELS = ['Early', 'On Time', 'Minor Delay', 'Major Delay']
+
+DISTANCE_BINS = [0, 500, 1000, 1500, 2000, 10000]
+DISTANCE_LABELS = ['Short (<500mi)', 'Medium (500-1000mi)', 'Long (1000-1500mi)',
+                   'Very Long (1500-2000mi)', 'Ultra Long (>2000mi)']
+
+SEASON_MAP = {1: 'Winter', 2: 'Winter', 3: 'Spring', 4: 'Spring', 5: 'Spring',
+              6: 'Summer', 7: 'Summer', 8: 'Summer', 9: 'Fall', 10: 'Fall', 11: 'Fall', 12: 'Winter'}
+
+
+def read_raw_flights(csv_path=RAW_FLIGHTS_CSV, chunksize=None):
+    """
+    Read the raw flights CSV with the fixed raw dtypes
+
+    Parameters:
+    -----------
+    csv_path : str
+        Raw flights CSV file
+    chunksize : int, optional
+        If given, return an iterator of DataFrames with this many rows each
+
+    Returns:
+    --------
+    DataFrame or TextFileReader : The raw flights data
+    """
+
+    with open(csv_path) as f:
+        header = f.readline()
+    return pd.read_csv(csv_path, dtype=_raw_dtypes(header), chunksize=chunksize, low_memory=False)
+
+
+def _raw_dtypes(header):
+    """Return RAW_DTYPES restricted to the columns named in a CSV header line"""
+    columns = header.strip().split(',')
+    return {col: dtype for col, dtype in RAW_DTYPES.items() if col in columns}
+
+
+def preprocess_flights_data(df, copy=True, verbose=True):
+    """
+    Comprehensive preprocessing of flights data
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Raw flights data
+    copy : bool
+        Work on a copy so the input frame is left unchanged
+    verbose : bool
+        Print progress messages
+
+    Returns:
+    --------
+    DataFrame : Flights data with the engineered features
+    """
+
+    if verbose:
+        print("Starting preprocessing...")
+
+    df_processed = df.copy() if copy else df
+
+    # Handle missing values in delay columns
+    for col in DELAY_COLUMNS:
+        if col in df_processed.columns:
+            df_processed[col] = df_processed[col].fillna(0)
+
+    # Handle cancellation reason
+    if 'CANCELLATION_REASON' in df_processed.columns:
+        reason = df_processed['CANCELLATION_REASON']
+        if isinstance(reason.dtype, pd.CategoricalDtype) and 'No Cancellation' not in reason.cat.categories:
+            reason = reason.cat.add_categories(['No Cancellation'])
+        df_processed['CANCELLATION_REASON'] = reason.fillna('No Cancellation')
+
+    # Create datetime features
+    if 'FL_DATE' in df_processed.columns:
+        df_processed['FL_DATE'] = pd.to_datetime(df_processed['FL_DATE'])
+        df_processed['YEAR'] = df_processed['FL_DATE'].dt.year
+        df_processed['MONTH'] = df_processed['FL_DATE'].dt.month
+        df_processed['DAY'] = df_processed['FL_DATE'].dt.day
+        df_processed['DAY_OF_WEEK'] = df_processed['FL_DATE'].dt.dayofweek
+        df_processed['DAY_NAME'] = df_processed['FL_DATE'].dt.day_name()
+    elif all(col in df_processed.columns for col in ['YEAR', 'MONTH', 'DAY']):
+        # Create FL_DATE from separate date columns
+        df_processed['FL_DATE'] = pd.to_datetime(df_processed[['YEAR', 'MONTH', 'DAY']])
+        df_processed['DAY_OF_WEEK'] = df_processed['FL_DATE'].dt.dayofweek
+        df_processed['DAY_NAME'] = df_processed['FL_DATE'].dt.day_name()
+
+    # Create time features
+    if 'SCHEDULED_DEPARTURE' in df_processed.columns:
+        df_processed['DEP_HOUR'] = (df_processed['SCHEDULED_DEPARTURE'] // 100).astype(int)
+        df_processed['DEP_MINUTE'] = (df_processed['SCHEDULED_DEPARTURE'] % 100).astype(int)
+
+    # Create route feature: packed airport-id keys, labelled once per distinct route
+    if 'ORIGIN_AIRPORT' in df_processed.columns and 'DESTINATION_AIRPORT' in df_processed.columns:
+        route_keys, routes = encode_routes(df_processed['ORIGIN_AIRPORT'], df_processed['DESTINATION_AIRPORT'])
+        df_processed['ROUTE'] = routes.categorical(route_keys)
+
+    # Create delay categories (fixed labels keep the categories identical across chunks)
+    if 'ARRIVAL_DELAY' in df_processed.columns:
+        df_processed['DELAY_CATEGORY'] = pd.cut(df_processed['ARRIVAL_DELAY'],
+                                                bins=DELAY_BINS, labels=DELAY_LABELS)
+
+    # Create season feature
+    if 'MONTH' in df_processed.columns:
+        df_processed['SEASON'] = df_processed['MONTH'].map(SEASON_MAP)
+
+    # Create total delay feature
+    existing_delays = [col for col in DELAY_COMPONENTS if col in df_processed.columns]
+    if existing_delays:
+        df_processed['TOTAL_DELAY'] = df_processed[existing_delays].sum(axis=1)
+
+    if verbose:
+        print(f"Preprocessing completed. Final shape: {df_processed.shape}")
+    return df_processed
+
+
+def add_distance_category(df):
+    """Add the DISTANCE_CATEGORY bins used by the distance analysis and the dashboard"""
+    if 'DISTANCE' in df.columns:
+        df['DISTANCE_CATEGORY'] = pd.cut(df['DISTANCE'], bins=DISTANCE_BINS, labels=DISTANCE_LABELS)
+    return df
+
+
+def iter_preprocessed_chunks(csv_path=RAW_FLIGHTS_CSV, chunksize=DEFAULT_CHUNKSIZE,
+                             distance_category=True):
+    """
+    Yield processed flights in bounded-size row batches
+
+    Parameters:
+    -----------
+    csv_path : str
+        Raw flights CSV file
+    chunksize : int
+        Number of raw rows per batch
+    distance_category : bool
+        Also add DISTANCE_CATEGORY, as in the final processed dataset
+
+    Returns:
+    --------
+    iterator of DataFrame : Processed batches in input order
+    """
+
+    with read_raw_flights(csv_path, chunksize=chunksize) as reader:
+        for chunk in reader:
+            processed = preprocess_flights_data(chunk, copy=False, verbose=False)
+            if distance_category:
+                processed = add_distance_category(processed)
+            yield processed
+
+
+def preprocess_flights_file(input_path=RAW_FLIGHTS_CSV, output_path=FLIGHTS_CSV,
+                            chunksize=DEFAULT_CHUNKSIZE, distance_category=True, sketch_dir=None):
+    """
+    Preprocess the raw flights CSV into the processed flights CSV
+
+    With a chunksize the input is streamed and every processed batch is
+    appended to the output, so memory stays bounded by the batch size.
+    Output goes to a temporary file that replaces output_path only once
+    all rows are written.
+
+    Parameters:
+    -----------
+    input_path : str
+        Raw flights CSV file
+    output_path : str
+        Processed CSV file to write
+    chunksize : int, optional
+        Rows per batch; None processes the whole file in memory
+    distance_category : bool
+        Also add DISTANCE_CATEGORY, as in the final processed dataset
+    sketch_dir : str, optional
+        Also save delay sketches of the processed rows to this directory
+
+    Returns:
+    --------
+    int : Number of rows written
+    """
+
+    tmp_path = output_path + '.tmp'
+    total_rows = 0
+    sketches = None
+
+    if chunksize is None:
+        processed = preprocess_flights_data(read_raw_flights(input_path), copy=False, verbose=False)
+        if distance_category:
+            processed = add_distance_category(processed)
+        processed.to_csv(tmp_path, index=False)
+        total_rows = len(processed)
+        if sketch_dir is not None:
+            sketches = DelaySketches.build(processed)
+    else:
+        header = True
+        for processed in iter_preprocessed_chunks(input_path, chunksize, distance_category):
+            processed.to_csv(tmp_path, index=False, header=header, mode='w' if header else 'a')
+            header = False
+            total_rows += len(processed)
+            if sketch_dir is not None:
+                chunk_sketches = DelaySketches.build(processed)
+                sketches = chunk_sketches if sketches is None else sketches.merge(chunk_sketches)
+        if header:
+            # Header-only input: still write the processed column layout
+            empty = preprocess_flights_data(read_raw_flights(input_path), copy=False, verbose=False)
+            if distance_category:
+                empty = add_distance_category(empty)
+            empty.to_csv(tmp_path, index=False)
+
+    os.replace(tmp_path, output_path)
+    if sketches is not None:
+        sketches.save(sketch_dir)
+    return total_rows
+
+
+def _byte_ranges(csv_path, range_bytes):
+    """Split the data rows of a CSV into (start, end) byte ranges on line boundaries"""
+
+    size = os.path.getsize(csv_path)
+    ranges = []
+    with open(csv_path, 'rb') as f:
+        f.readline()
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + range_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _preprocess_byte_range(task):
+    """Worker: preprocess one byte range of the raw CSV into a part file"""
+
+    csv_path, start, end, part_path, write_header, distance_category, build_sketches = task
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        f.seek(start)
+        data = f.read(end - start)
+
+    chunk = pd.read_csv(io.BytesIO(header + data), dtype=_raw_dtypes(header.decode()),
+                        low_memory=False)
+    processed = preprocess_flights_data(chunk, copy=False, verbose=False)
+    if distance_category:
+        processed = add_distance_category(processed)
+    processed.to_csv(part_path, index=False, header=write_header)
+    return len(processed), DelaySketches.build(processed) if build_sketches else None
+
+
+def preprocess_flights_parallel(input_path=RAW_FLIGHTS_CSV, output_path=FLIGHTS_CSV,
+                                workers=None, range_bytes=DEFAULT_RANGE_BYTES,
+                                distance_category=True, sketch_dir=None):
+    """
+    Preprocess the raw flights CSV on several cores
+
+    The raw file is split into byte ranges aligned to line boundaries. A
+    process pool derives the features for each range and writes a part
+    file, and the parts are concatenated in input order, so the result is
+    identical to preprocess_flights_file().
+
+    Parameters:
+    -----------
+    input_path : str
+        Raw flights CSV file
+    output_path : str
+        Processed CSV file to write
+    workers : int, optional
+        Number of worker processes (default: all CPU cores)
+    range_bytes : int
+        Approximate size of the byte range processed per task
+    distance_category : bool
+        Also add DISTANCE_CATEGORY, as in the final processed dataset
+    sketch_dir : str, optional
+        Also save delay sketches of the processed rows to this directory
+
+    Returns:
+    --------
+    int : Number of rows written
+    """
+
+    ranges = _byte_ranges(input_path, range_bytes)
+    if not ranges:
+        return preprocess_flights_file(input_path, output_path, distance_category=distance_category,
+                                       sketch_dir=sketch_dir)
+
+    part_dir = tempfile.mkdtemp(prefix='preprocess-', dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        part_paths = [os.path.join(part_dir, f'part-{i:05d}.csv') for i in range(len(ranges))]
+        tasks = [
+            (input_path, start, end, part_path, i == 0, distance_category, sketch_dir is not None)
+            for i, ((start, end), part_path) in enumerate(zip(ranges, part_paths))
+        ]
+        total_rows = 0
+        sketches = None
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for rows, part_sketches in pool.map(_preprocess_byte_range, tasks):
+                total_rows += rows
+                if part_sketches is not None:
+                    sketches = part_sketches if sketches is None else sketches.merge(part_sketches)
+
+        tmp_path = output_path + '.tmp'
+        with open(tmp_path, 'wb') as out:
+            for part_path in part_paths:
+                with open(part_path, 'rb') as part:
+                    shutil.copyfileobj(part, out)
+        os.replace(tmp_path, output_path)
+        if sketches is not None:
+            sketches.save(sketch_dir)
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+    return total_rows
+
+
+if __name__ == "__main__":
+    import sys
+
+    args = sys.argv[1:]
+    workers = None
+    if '--workers' in args:
+        i = args.index('--workers')
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    input_path = args[0] if len(args) > 0 else RAW_FLIGHTS_CSV
+    output_path = args[1] if len(args) > 1 else FLIGHTS_CSV
+
+    # The dashboard's delay sketches describe the processed store, not other outputs
+    sketch_dir = DELAY_SKETCH_DIR if os.path.abspath(output_path) == os.path.abspath(FLIGHTS_CSV) else None
+
+    if workers is not None and workers > 1:
+        print(f"Preprocessing {input_path} with {workers} worker processes...")
+        rows = preprocess_flights_parallel(input_path, output_path, workers=workers,
+                                           sketch_dir=sketch_dir)
+    else:
+        print(f"Preprocessing {input_path} in chunks of {DEFAULT_CHUNKSIZE:,} rows...")
+        rows = preprocess_flights_file(input_path, output_path, sketch_dir=sketch_dir)
+    print(f"✅ Wrote {rows:,} processed rows to {output_path}")
+    if sketch_dir is not None:
+        record_artifact(sketch_dir, FLIGHT_INPUTS)
+        print(f"✅ Saved delay sketches to {sketch_dir}")
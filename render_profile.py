@@ -0,0 +1,207 @@
+"""
+Render Profile for AirFly Insights
+Per-rerun stage timings for the Streamlit dashboard
+
+A RenderProfile is started at the top of every dashboard rerun. Code
+blocks are timed with profile.stage(name, kind) under one of the
+STAGE_KINDS, and every chart rendered through chart_budget.plotly_chart()
+is picked up from the airfly.charts log with its payload size. Time between
+the last recorded stage and a chart is attributed to building that chart's
+figure, so the stages of a rerun form a contiguous waterfall.
+
+When profiling is enabled (AIRFLY_PROFILE=1 or the sidebar toggle) the
+waterfall is shown in an expandable panel and every rerun is appended as
+one JSON line to PROFILE_LOG for analysis across sessions.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+# Environment variable that turns profiling on by default
+PROFILE_ENV = 'AIRFLY_PROFILE'
+
+# JSON lines log with one record per profiled rerun
+PROFILE_LOG = 'logs/render_profile.jsonl'
+
+# Stage kind -> waterfall colour
+STAGE_KINDS = {
+    'data': '#1f77b4',
+    'filter': '#9467bd',
+    'aggregate': '#2ca02c',
+    'figure': '#ff7f0e',
+    'chart': '#d62728',
+}
+
+
+def profiling_enabled():
+    """Return True if the AIRFLY_PROFILE environment variable is set"""
+    return os.environ.get(PROFILE_ENV, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class _ChartCollector(logging.Handler):
+    """Forward chart records logged by chart_budget to a profile"""
+
+    def __init__(self, profile):
+        super().__init__(logging.INFO)
+        self.profile = profile
+        self.thread = threading.get_ident()
+
+    def emit(self, record):
+        # Streamlit reruns every session on its own thread; skip other sessions' charts
+        chart = getattr(record, 'chart_record', None)
+        if chart is not None and threading.get_ident() == self.thread:
+            self.profile.chart(chart)
+
+
+class RenderProfile:
+    """
+    Stage timings for one dashboard rerun
+
+    Parameters:
+    -----------
+    page : str, optional
+        Page being rendered (can be set once it is known)
+    chart_logger : str
+        Logger the chart records are read from
+    """
+
+    def __init__(self, page=None, chart_logger='airfly.charts'):
+        self.page = page
+        self.stages = []
+        self.started = time.perf_counter()
+        self._last = self.started
+        self._logger = logging.getLogger(chart_logger)
+        if not self._logger.isEnabledFor(logging.INFO):
+            self._logger.setLevel(logging.INFO)
+        # A rerun interrupted by Streamlit never finishes; drop its collector
+        for handler in list(self._logger.handlers):
+            if isinstance(handler, _ChartCollector) and handler.thread == threading.get_ident():
+                self._logger.removeHandler(handler)
+        self._collector = _ChartCollector(self)
+        self._logger.addHandler(self._collector)
+
+    def _add(self, name, kind, start, end, **details):
+        self.stages.append({'stage': name, 'kind': kind, 'start': start - self.started,
+                            'seconds': end - start, **details})
+        self._last = max(self._last, end)
+
+    @contextmanager
+    def stage(self, name, kind):
+        """Time the enclosed block as one stage of the given kind"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, kind, start, time.perf_counter())
+
+    def chart(self, record):
+        """Record a chart from its chart_budget record, plus the figure build before it"""
+        end = time.perf_counter()
+        start = end - record['seconds']
+        if start > self._last:
+            self._add(f"build {record['chart']}", 'figure', self._last, start)
+        self._add(record['chart'], 'chart', start, end,
+                  bytes=record['bytes'], marks=record['marks'])
+
+    def frame(self):
+        """
+        Return the stages recorded so far
+
+        Returns:
+        --------
+        DataFrame : One row per stage with stage, kind, start and seconds
+            (relative to the start of the rerun), plus bytes and marks for charts
+        """
+
+        columns = ['stage', 'kind', 'start', 'seconds', 'bytes', 'marks']
+        return pd.DataFrame(self.stages, columns=columns)
+
+    def totals(self):
+        """Return the seconds spent per stage kind"""
+        seconds = {kind: 0.0 for kind in STAGE_KINDS}
+        for stage in self.stages:
+            seconds[stage['kind']] = seconds.get(stage['kind'], 0.0) + stage['seconds']
+        return seconds
+
+    def finish(self, log_path=PROFILE_LOG, **context):
+        """
+        Stop collecting charts and append the rerun to the profile log
+
+        Parameters:
+        -----------
+        log_path : str, optional
+            JSON lines file to append to (None to skip logging)
+        **context
+            Extra fields stored with the record (e.g. the active filters)
+
+        Returns:
+        --------
+        dict : The logged record
+        """
+
+        self._logger.removeHandler(self._collector)
+        record = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'page': self.page,
+            'total_seconds': time.perf_counter() - self.started,
+            'chart_bytes': sum(stage.get('bytes', 0) for stage in self.stages),
+            'kinds': self.totals(),
+            **context,
+            'stages': self.stages,
+        }
+        if log_path:
+            os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+            with open(log_path, 'a') as f:
+                f.write(json.dumps(record, default=str) + '\n')
+        return record
+
+    def close(self):
+        """Stop collecting charts without logging"""
+        self._logger.removeHandler(self._collector)
+
+
+def waterfall_figure(stages):
+    """
+    Draw the stages of a rerun as a horizontal waterfall
+
+    Parameters:
+    -----------
+    stages : DataFrame
+        Stages as returned by RenderProfile.frame()
+
+    Returns:
+    --------
+    plotly Figure : One bar per stage, from its start to its end, coloured by kind
+    """
+
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    labels = [f"{i + 1}. {name}" for i, name in enumerate(stages['stage'])]
+    for kind, color in STAGE_KINDS.items():
+        rows = (stages['kind'] == kind).to_numpy()
+        if not rows.any():
+            continue
+        fig.add_trace(go.Bar(
+            y=[label for label, row in zip(labels, rows) if row],
+            x=stages['seconds'][rows] * 1000,
+            base=stages['start'][rows] * 1000,
+            orientation='h', name=kind, marker_color=color,
+            hovertemplate='%{y}<br>%{x:.1f} ms<extra></extra>',
+        ))
+    fig.update_layout(
+        title="Render Waterfall", xaxis_title="Milliseconds since rerun start",
+        yaxis={'categoryorder': 'array', 'categoryarray': labels[::-1]},
+        barmode='overlay', height=max(250, 22 * len(labels) + 120),
+    )
+    return fig
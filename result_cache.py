@@ -0,0 +1,233 @@
+"""
+Result Cache for AirFly Insights
+Bounded LRU cache of computed dashboard results
+
+Every aggregate a dashboard page computes is stored under a key made of the
+page, the result's name, the normalised sidebar filters and the version of
+the dataset it was computed from (the content fingerprint kept by
+dataset_manifest.py). Identical views requested by other
+sessions are then answered from memory, and a result being computed is
+computed once even when several sessions ask for it at the same time.
+
+The cache holds at most max_bytes of results and evicts the least recently
+used ones beyond that. With a spill directory, evicted results are pickled
+to disk instead of being dropped and are loaded back on their next use;
+since the dataset version is part of the key, spilled results also survive
+a server restart without ever being served for other data.
+
+Cached results are shared between sessions and must not be modified in place.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Environment variables that configure the dashboard's result cache
+CACHE_MB_ENV = 'AIRFLY_RESULT_CACHE_MB'
+SPILL_DIR_ENV = 'AIRFLY_RESULT_SPILL_DIR'
+
+# Default memory cap in megabytes
+DEFAULT_CACHE_MB = 256
+
+_MISSING = object()
+
+
+def result_key(page, name, version, **filters):
+    """
+    Build the cache key of a page result
+
+    Filters are normalised so that the same selection made in a different
+    order, or with duplicates, maps to the same key; empty filters are left out.
+
+    Parameters:
+    -----------
+    page : str
+        Dashboard page
+    name : str
+        Name of the result within the page
+    version : str
+        Version of the dataset the result is computed from
+    **filters
+        Filter column -> selected values
+
+    Returns:
+    --------
+    tuple : Hashable cache key
+    """
+
+    normalised = tuple((col, tuple(sorted(set(values)))) for col, values in sorted(filters.items()) if values)
+    return page, name, normalised, version
+
+
+def result_nbytes(value):
+    """Return the approximate memory held by a cached result"""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of computed results with a memory cap
+
+    Parameters:
+    -----------
+    max_bytes : int
+        Memory the cached results may hold before the least recently used
+        ones are evicted
+    spill_dir : str, optional
+        Directory evicted results are pickled to and loaded back from
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_MB * 1024 ** 2, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.spill_loads = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._computing = {}
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """Create a cache sized by AIRFLY_RESULT_CACHE_MB, spilling to AIRFLY_RESULT_SPILL_DIR if set"""
+        megabytes = float(os.environ.get(CACHE_MB_ENV) or DEFAULT_CACHE_MB)
+        return cls(max_bytes=int(megabytes * 1024 ** 2), spill_dir=os.environ.get(SPILL_DIR_ENV) or None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, hashlib.sha1(repr(key).encode('utf-8')).hexdigest() + '.pkl')
+
+    def _find(self, key):
+        """Return the value for key (loading a spilled one back), or _MISSING"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+            if not self.spill_dir:
+                return _MISSING
+            path = self._spill_path(key)
+            if not os.path.exists(path):
+                return _MISSING
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.remove(path)
+            self.spill_loads += 1
+            self.put(key, value)
+            return value
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default"""
+        value = self._find(key)
+        with self._lock:
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used values beyond max_bytes"""
+        nbytes = result_nbytes(value)
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes and self._entries:
+                old_key, (old_value, old_nbytes) = self._entries.popitem(last=False)
+                self.nbytes -= old_nbytes
+                self.evictions += 1
+                if self.spill_dir:
+                    with open(self._spill_path(old_key), 'wb') as f:
+                        pickle.dump(old_value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for key, computing and storing it on a miss
+
+        Concurrent callers asking for the same missing key wait for the first
+        one instead of computing it again.
+
+        Parameters:
+        -----------
+        key : tuple
+            Cache key (see result_key)
+        compute : callable
+            Called without arguments to produce the value on a miss
+
+        Returns:
+        --------
+        object : The cached or newly computed value
+        """
+
+        value = self._find(key)
+        if value is _MISSING:
+            with self._lock:
+                key_lock = self._computing.setdefault(key, threading.Lock())
+            with key_lock:
+                value = self._find(key)
+                if value is _MISSING:
+                    with self._lock:
+                        self.misses += 1
+                    try:
+                        value = compute()
+                        self.put(key, value)
+                    finally:
+                        with self._lock:
+                            self._computing.pop(key, None)
+                    return value
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def clear(self):
+        """Drop every cached and spilled result (the counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            if self.spill_dir and os.path.isdir(self.spill_dir):
+                for name in os.listdir(self.spill_dir):
+                    if name.endswith('.pkl'):
+                        os.remove(os.path.join(self.spill_dir, name))
+
+    def stats(self):
+        """
+        Return the cache counters
+
+        Returns:
+        --------
+        dict : entries, bytes, max_bytes, hits, misses, evictions,
+            spill_loads and hit_rate (fraction of lookups answered from cache)
+        """
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.nbytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'spill_loads': self.spill_loads,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
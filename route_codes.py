@@ -0,0 +1,176 @@
+"""
+Route Codes for AirFly Insights
+Routes as packed integer keys of integer-coded airports
+
+Every airport gets an integer id: its position in a sorted table of airport
+codes. A route is the pair (origin id, destination id) packed into a single
+int32 key, with the origin id in the high bits and the destination id in the
+low 16 bits. Because the table is sorted, keys sort in the same order as the
+"ORIGIN-DEST" labels, route group-bys and top-N selections become bincounts
+over integer arrays, and coordinates are attached by indexing per-airport
+arrays instead of joining on strings. Labels are only built for the distinct
+routes that are displayed.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import numpy as np
+import pandas as pd
+
+# Bits of the packed key holding the destination id
+AIRPORT_BITS = 16
+AIRPORT_MASK = (1 << AIRPORT_BITS) - 1
+
+# Largest airport table that keeps packed keys within a positive int32
+MAX_AIRPORTS = 1 << (31 - AIRPORT_BITS)
+
+ROUTE_SEPARATOR = '-'
+
+
+def _codes_and_uniques(values):
+    """Return integer codes (-1 for missing) and the distinct values of a code column"""
+    if not hasattr(values, 'dtype'):
+        values = np.asarray(values, dtype=object)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = pd.Categorical(values)
+        return values.codes.astype('int64'), pd.Index(values.categories)
+    codes, uniques = pd.factorize(values)
+    return codes.astype('int64'), pd.Index(uniques)
+
+
+def pack_routes(origin_ids, dest_ids):
+    """Pack origin and destination airport ids into route keys (-1 if either is missing)"""
+    origin_ids = np.asarray(origin_ids, dtype='int64')
+    dest_ids = np.asarray(dest_ids, dtype='int64')
+    keys = (origin_ids << AIRPORT_BITS) | dest_ids
+    return np.where((origin_ids < 0) | (dest_ids < 0), -1, keys).astype('int32')
+
+
+class RouteTable:
+    """
+    Lookup table between airport codes, airport ids and packed route keys
+
+    Parameters:
+    -----------
+    airports : array-like
+        Distinct airport codes; they are sorted to assign the ids
+    """
+
+    def __init__(self, airports):
+        self.airports = pd.Index(airports).dropna().unique().sort_values()
+        if len(self.airports) > MAX_AIRPORTS:
+            raise ValueError(f"{len(self.airports):,} airports exceed the {MAX_AIRPORTS:,} route keys can address")
+
+    def __len__(self):
+        return len(self.airports)
+
+    def _lookup(self, codes, uniques):
+        """Map the codes of a factorized column to airport ids, hashing only its distinct values"""
+        return np.append(self.airports.get_indexer(uniques), -1)[codes]
+
+    def airport_ids(self, values):
+        """Return the airport id of every value (-1 for missing or unknown airports)"""
+        return self._lookup(*_codes_and_uniques(values))
+
+    def encode(self, origin, dest):
+        """Return the packed route key of every origin/destination pair"""
+        return pack_routes(self.airport_ids(origin), self.airport_ids(dest))
+
+    @staticmethod
+    def origin_ids(keys):
+        """Return the origin airport ids of route keys"""
+        return np.asarray(keys) >> AIRPORT_BITS
+
+    @staticmethod
+    def dest_ids(keys):
+        """Return the destination airport ids of route keys"""
+        return np.asarray(keys) & AIRPORT_MASK
+
+    def origins(self, keys):
+        """Return the origin airport codes of route keys"""
+        return self.airports.take(self.origin_ids(keys))
+
+    def destinations(self, keys):
+        """Return the destination airport codes of route keys"""
+        return self.airports.take(self.dest_ids(keys))
+
+    def labels(self, keys):
+        """Return the "ORIGIN-DEST" display label of route keys"""
+        origins = self.origins(keys).astype(str)
+        return origins + ROUTE_SEPARATOR + self.destinations(keys).astype(str)
+
+    def group(self, keys):
+        """
+        Number the distinct routes in an array of keys
+
+        Parameters:
+        -----------
+        keys : ndarray
+            Route keys (-1 for missing routes)
+
+        Returns:
+        --------
+        tuple : (sorted distinct keys, group number of every key or -1)
+        """
+
+        keys = np.asarray(keys)
+        valid = keys >= 0
+        n = len(self.airports)
+        dense = self.origin_ids(keys[valid]) * n + self.dest_ids(keys[valid])
+        if n * n <= 4 * len(dense) + 1024:
+            present = np.flatnonzero(np.bincount(dense, minlength=n * n))
+            renumber = np.zeros(n * n, dtype='int64')
+            renumber[present] = np.arange(len(present))
+            groups = renumber[dense]
+        else:
+            present, groups = np.unique(dense, return_inverse=True)
+        inverse = np.full(len(keys), -1, dtype='int64')
+        inverse[valid] = groups
+        return pack_routes(present // max(n, 1), present % max(n, 1)), inverse
+
+    def categorical(self, keys):
+        """Return route keys as a Categorical of labels, building one label per distinct route"""
+        distinct, inverse = self.group(keys)
+        return pd.Categorical.from_codes(inverse, categories=pd.Index(self.labels(distinct)))
+
+    def coordinates(self, airports_df):
+        """
+        Return the latitude and longitude of every airport id
+
+        Parameters:
+        -----------
+        airports_df : DataFrame
+            Airport data with IATA_CODE, LATITUDE and LONGITUDE
+
+        Returns:
+        --------
+        tuple : (latitudes, longitudes) arrays indexed by airport id, NaN where unknown
+        """
+
+        coords = airports_df.drop_duplicates('IATA_CODE').set_index('IATA_CODE')[['LATITUDE', 'LONGITUDE']]
+        located = coords.reindex(self.airports)
+        return (located['LATITUDE'].to_numpy(dtype='float64'),
+                located['LONGITUDE'].to_numpy(dtype='float64'))
+
+
+def encode_routes(origin, dest):
+    """
+    Build the airport table of two code columns and encode their routes
+
+    Parameters:
+    -----------
+    origin, dest : array-like or Series
+        Origin and destination airport codes (categoricals are encoded
+        from their codes without hashing every row)
+
+    Returns:
+    --------
+    tuple : (route keys, RouteTable)
+    """
+
+    origin_codes, origin_uniques = _codes_and_uniques(origin)
+    dest_codes, dest_uniques = _codes_and_uniques(dest)
+    table = RouteTable(origin_uniques.append(dest_uniques))
+    keys = pack_routes(table._lookup(origin_codes, origin_uniques), table._lookup(dest_codes, dest_uniques))
+    return keys, table
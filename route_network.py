@@ -0,0 +1,288 @@
+"""
+Route Network for AirFly Insights
+Great-circle geometry and level-of-detail selection for the full route map
+
+Routes are bundled into undirected airport pairs (A-B and B-A share one arc
+with their traffic summed, grouped by packed airport-id keys), and each pair
+gets a great-circle arc whose number of segments grows with its length. Arc geometry only depends on the
+airport coordinates, so it is computed once and cached on disk; traffic and
+delays are attached per request, which keeps filtered views cheap.
+
+Pairs are ranked by traffic into level-of-detail tiers: the busiest routes
+are drawn at every zoom level, the long tail only once the map is zoomed in.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from route_codes import encode_routes, pack_routes
+
+ROUTE_ARCS_CACHE = 'dataset/route_arcs.npz'
+
+EARTH_RADIUS_MILES = 3958.8
+
+# Arc resolution: one segment per SEGMENT_MILES, capped at MAX_SEGMENTS
+SEGMENT_MILES = 150
+MAX_SEGMENTS = 32
+
+# Coordinates are rounded to ~100 m, far below what a route map can show
+COORDINATE_DECIMALS = 3
+
+# Level-of-detail tiers: (number of busiest pairs in the tier, minimum zoom).
+# The last tier holds all remaining pairs.
+LOD_TIERS = [(250, 0), (1250, 5), (None, 6)]
+
+
+def bundle_routes(origins, destinations, flights, delay_n, delay_sum, airports_df):
+    """
+    Bundle directed routes into undirected airport pairs with coordinates
+
+    Parameters:
+    -----------
+    origins, destinations : array-like
+        Origin and destination airport codes per directed route
+    flights : array-like
+        Flights per route
+    delay_n, delay_sum : array-like
+        Count and sum of arrival delays per route
+    airports_df : DataFrame
+        Airport data with IATA_CODE, LATITUDE and LONGITUDE
+
+    Returns:
+    --------
+    DataFrame : One row per pair (PAIR, A, B, flights, avg_delay, coordinates,
+        TIER, MIN_ZOOM), busiest first; pairs without coordinates are dropped
+    """
+
+    # Undirected pair keys: the lower airport id becomes end A (ids follow code order)
+    route_keys, route_table = encode_routes(origins, destinations)
+    origin_ids, dest_ids = route_table.origin_ids(route_keys), route_table.dest_ids(route_keys)
+    pair_keys = pack_routes(np.minimum(origin_ids, dest_ids), np.maximum(origin_ids, dest_ids))
+    keys, groups = route_table.group(pair_keys)
+    valid = groups >= 0
+
+    def summed(values):
+        values = np.asarray(values, dtype='float64')[valid]
+        return np.bincount(groups[valid], weights=values, minlength=len(keys))
+
+    pairs = pd.DataFrame({
+        'PAIR': route_table.labels(keys),
+        'A': route_table.origins(keys).astype(str),
+        'B': route_table.destinations(keys).astype(str),
+        'flights': summed(flights),
+        'delay_n': summed(delay_n),
+        'delay_sum': summed(delay_sum),
+    })
+    pairs['avg_delay'] = pairs['delay_sum'] / pairs['delay_n'].where(pairs['delay_n'] > 0)
+
+    lats, lons = route_table.coordinates(airports_df)
+    for end, ids in [('A', route_table.origin_ids(keys)), ('B', route_table.dest_ids(keys))]:
+        pairs[f'{end}_LAT'] = lats[ids]
+        pairs[f'{end}_LON'] = lons[ids]
+    pairs = pairs[pairs['flights'] > 0].dropna(subset=['A_LAT', 'A_LON', 'B_LAT', 'B_LON'])
+
+    pairs = pairs.sort_values(['flights', 'PAIR'], ascending=[False, True]).reset_index(drop=True)
+    pairs['TIER'] = lod_tiers(len(pairs))
+    pairs['MIN_ZOOM'] = np.array([zoom for _, zoom in LOD_TIERS])[pairs['TIER']]
+    return pairs
+
+
+def lod_tiers(n_pairs):
+    """Return the level-of-detail tier of each of n_pairs traffic-ranked pairs"""
+    tiers = np.full(n_pairs, len(LOD_TIERS) - 1, dtype='int64')
+    start = 0
+    for tier, (size, _) in enumerate(LOD_TIERS[:-1]):
+        tiers[start:start + size] = tier
+        start += size
+    return tiers
+
+
+def great_circle_arcs(lat1, lon1, lat2, lon2, segment_miles=SEGMENT_MILES,
+                      max_segments=MAX_SEGMENTS):
+    """
+    Compute great-circle arcs between pairs of points
+
+    All arcs are interpolated together on a common grid and then thinned to
+    one segment per segment_miles, so short hops are straight lines and
+    cross-country routes get a smooth curve.
+
+    Parameters:
+    -----------
+    lat1, lon1, lat2, lon2 : array-like
+        Endpoint coordinates in degrees
+    segment_miles : float
+        Approximate length of one arc segment
+    max_segments : int
+        Upper bound on segments per arc
+
+    Returns:
+    --------
+    tuple : (offsets, lats, lons) where arc i is lats/lons[offsets[i]:offsets[i + 1]]
+    """
+
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype='float64')) for v in (lat1, lon1, lat2, lon2))
+    p1 = np.stack([np.cos(lat1) * np.cos(lon1), np.cos(lat1) * np.sin(lon1), np.sin(lat1)], axis=1)
+    p2 = np.stack([np.cos(lat2) * np.cos(lon2), np.cos(lat2) * np.sin(lon2), np.sin(lat2)], axis=1)
+    omega = np.arccos(np.clip(np.einsum('ij,ij->i', p1, p2), -1.0, 1.0))
+
+    # Spherical linear interpolation on a common grid of max_segments steps
+    t = np.linspace(0.0, 1.0, max_segments + 1)
+    sin_omega = np.sin(omega)[:, None]
+    safe = sin_omega > 1e-12
+    w1 = np.where(safe, np.sin((1 - t) * omega[:, None]) / np.where(safe, sin_omega, 1), 1 - t)
+    w2 = np.where(safe, np.sin(t * omega[:, None]) / np.where(safe, sin_omega, 1), t)
+    points = w1[:, :, None] * p1[:, None, :] + w2[:, :, None] * p2[:, None, :]
+
+    lats = np.degrees(np.arcsin(np.clip(points[..., 2], -1.0, 1.0)))
+    # Unwrap so arcs crossing the antimeridian stay continuous
+    lons = np.degrees(np.unwrap(np.arctan2(points[..., 1], points[..., 0]), axis=1))
+
+    # Keep segments proportional to the arc length
+    segments = np.clip(np.ceil(omega * EARTH_RADIUS_MILES / segment_miles), 1, max_segments).astype('int64')
+    lengths = segments + 1
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    route = np.repeat(np.arange(len(segments)), lengths)
+    step = np.arange(offsets[-1]) - offsets[route]
+    grid = np.rint(step * max_segments / segments[route]).astype('int64')
+
+    return (offsets,
+            np.round(lats[route, grid], COORDINATE_DECIMALS),
+            np.round(lons[route, grid], COORDINATE_DECIMALS))
+
+
+def _gather(offsets, positions, pad=0):
+    """Return flat row numbers of the selected arcs, each followed by pad extra slots"""
+    starts = offsets[positions]
+    lengths = offsets[positions + 1] - starts + pad
+    first = np.cumsum(lengths) - lengths
+    return np.repeat(starts, lengths) + np.arange(lengths.sum()) - np.repeat(first, lengths), lengths
+
+
+class RouteArcs:
+    """
+    Cached great-circle geometry per airport pair
+
+    Parameters:
+    -----------
+    pairs : array-like
+        Pair keys ('A-B') in storage order
+    endpoints : ndarray
+        (n, 4) endpoint coordinates the arcs were computed from
+    offsets, lats, lons : ndarray
+        Flattened arc coordinates; arc i spans offsets[i]:offsets[i + 1]
+    """
+
+    def __init__(self, pairs, endpoints, offsets, lats, lons):
+        self.pairs = np.asarray(pairs, dtype=str)
+        self.endpoints = np.asarray(endpoints, dtype='float64').reshape(-1, 4)
+        self.offsets = np.asarray(offsets, dtype='int64')
+        self.lats = np.asarray(lats, dtype='float64')
+        self.lons = np.asarray(lons, dtype='float64')
+        self._position = pd.Index(self.pairs)
+
+    @classmethod
+    def compute(cls, pairs):
+        """Compute arcs for the pairs returned by bundle_routes()"""
+        endpoints = pairs[['A_LAT', 'A_LON', 'B_LAT', 'B_LON']].to_numpy(dtype='float64')
+        offsets, lats, lons = great_circle_arcs(*endpoints.T)
+        return cls(pairs['PAIR'].to_numpy(), endpoints, offsets, lats, lons)
+
+    @classmethod
+    def load(cls, cache_path=ROUTE_ARCS_CACHE):
+        """Load arcs saved with save()"""
+        with np.load(cache_path) as data:
+            return cls(data['pairs'], data['endpoints'], data['offsets'], data['lats'], data['lons'])
+
+    def save(self, cache_path=ROUTE_ARCS_CACHE):
+        """Write the arcs to a compressed .npz file"""
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        np.savez_compressed(cache_path, pairs=self.pairs, endpoints=self.endpoints,
+                            offsets=self.offsets, lats=self.lats, lons=self.lons)
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def covers(self, pairs):
+        """Return a mask of the pairs whose cached arc matches their current endpoints"""
+        position = self._position.get_indexer(pairs['PAIR'])
+        found = position >= 0
+        endpoints = pairs[['A_LAT', 'A_LON', 'B_LAT', 'B_LON']].to_numpy(dtype='float64')
+        same = np.zeros(len(pairs), dtype=bool)
+        same[found] = np.isclose(self.endpoints[position[found]], endpoints[found]).all(axis=1)
+        return same
+
+    def merge(self, other):
+        """Return arcs holding both sets, preferring other for shared pairs"""
+        kept = np.flatnonzero(~pd.Index(self.pairs).isin(other.pairs))
+        rows, lengths = _gather(self.offsets, kept)
+        offsets = np.concatenate([[0], np.cumsum(np.concatenate([lengths, np.diff(other.offsets)]))])
+        return RouteArcs(
+            np.concatenate([self.pairs[kept], other.pairs]),
+            np.concatenate([self.endpoints[kept], other.endpoints]),
+            offsets,
+            np.concatenate([self.lats[rows], other.lats]),
+            np.concatenate([self.lons[rows], other.lons]),
+        )
+
+    def coordinates(self, pair_keys):
+        """Return (lats, lons) coordinate arrays for each requested pair"""
+        position = self._position.get_indexer(pair_keys)
+        if (position < 0).any():
+            raise KeyError("Arc geometry missing for some pairs; use load_route_arcs()")
+        return [(self.lats[self.offsets[i]:self.offsets[i + 1]],
+                 self.lons[self.offsets[i]:self.offsets[i + 1]]) for i in position]
+
+    def geojson_lines(self, pair_keys):
+        """Return GeoJSON LineString geometries for the requested pairs"""
+        return [{'type': 'LineString', 'coordinates': np.column_stack([lons, lats]).tolist()}
+                for lats, lons in self.coordinates(pair_keys)]
+
+    def line_trace(self, pair_keys):
+        """Return flat (lats, lons) arrays with NaN gaps between arcs, for one plot trace"""
+        position = self._position.get_indexer(pair_keys)
+        if (position < 0).any():
+            raise KeyError("Arc geometry missing for some pairs; use load_route_arcs()")
+        rows, lengths = _gather(self.offsets, position, pad=1)
+        gap = rows == np.repeat(self.offsets[position + 1], lengths)
+        rows[gap] = 0
+        lats = np.where(gap, np.nan, self.lats[rows])
+        lons = np.where(gap, np.nan, self.lons[rows])
+        return lats, lons
+
+
+def load_route_arcs(pairs, cache_path=ROUTE_ARCS_CACHE):
+    """
+    Return arcs for all pairs, reusing and extending the on-disk cache
+
+    Only pairs that are new, or whose airport coordinates changed, are
+    computed; the cache is rewritten when anything was added.
+
+    Parameters:
+    -----------
+    pairs : DataFrame
+        Bundled pairs from bundle_routes()
+    cache_path : str or None
+        Location of the arc cache (None to skip the cache)
+
+    Returns:
+    --------
+    RouteArcs : Arcs covering every pair
+    """
+
+    if cache_path is None:
+        return RouteArcs.compute(pairs)
+
+    cached = RouteArcs.load(cache_path) if os.path.exists(cache_path) else None
+    missing = pairs if cached is None else pairs[~cached.covers(pairs)]
+    if len(missing) == 0:
+        return cached
+
+    computed = RouteArcs.compute(missing)
+    arcs = computed if cached is None else cached.merge(computed)
+    arcs.save(cache_path)
+    return arcs
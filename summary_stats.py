@@ -0,0 +1,343 @@
+"""
+Summary Statistics for AirFly Insights
+Mergeable partial results behind analysis_summary.json
+
+Every statistic in the analysis summary is derived from additive partial
+results: row counts, delay counts and sums, and value counts per key. Partials
+computed over separate batches of flights can be added together, so the
+summary can be updated with new data without rescanning the full dataset.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+SUMMARY_PATH = 'configuration/analysis_summary.json'
+SUMMARY_PARTIALS = 'dataset/summary_partials.json'
+
+DELAY_COMPONENT_COLUMNS = ['AIR_SYSTEM_DELAY', 'SECURITY_DELAY', 'AIRLINE_DELAY',
+                           'LATE_AIRCRAFT_DELAY', 'WEATHER_DELAY']
+
+# Partial name -> column whose arrival delays are averaged per value
+DELAY_GROUPS = {
+    'airline': 'AIRLINE',
+    'hour': 'DEP_HOUR',
+    'day': 'DAY_NAME',
+    'season': 'SEASON',
+}
+
+# Partial name -> column whose values are counted
+COUNT_GROUPS = {
+    'route': 'ROUTE',
+    'origin': 'ORIGIN_AIRPORT',
+    'destination': 'DESTINATION_AIRPORT',
+    'month': 'MONTH',
+    'delay_category': 'DELAY_CATEGORY',
+    'distance_category': 'DISTANCE_CATEGORY',
+}
+
+# Every column the summary reads from the flights table
+SUMMARY_COLUMNS = list(dict.fromkeys(
+    ['ARRIVAL_DELAY', 'DEPARTURE_DELAY', 'DISTANCE', 'CANCELLED', 'DIVERTED', 'CANCELLATION_REASON']
+    + DELAY_COMPONENT_COLUMNS + list(DELAY_GROUPS.values()) + list(COUNT_GROUPS.values())
+))
+
+
+def _sum_and_count(values):
+    """Return (non-null count, sum) of a numeric column"""
+    values = values.to_numpy(dtype='float64', na_value=np.nan)
+    valid = ~np.isnan(values)
+    return float(valid.sum()), float(values[valid].sum())
+
+
+def _factorize(values):
+    """Return integer codes (-1 for missing) and the unique values of a key column"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), pd.Index(values.cat.categories)
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes, pd.Index(uniques)
+
+
+def _bincount(codes, n_keys, weights=None, mask=None):
+    """Sum weights (or count rows) per key code, ignoring missing keys"""
+    valid = codes >= 0
+    if mask is not None:
+        valid &= mask
+    if weights is not None:
+        weights = weights[valid]
+    return np.bincount(codes[valid], weights=weights, minlength=n_keys).astype('float64')
+
+
+def compute_partials(df, timings=None):
+    """
+    Compute the additive partial results for a batch of flights
+
+    Every key column is factorized once into integer codes, and all
+    statistics for that key are summed from the codes with np.bincount,
+    sharing the same arrival delay arrays. This replaces one group-by or
+    value_counts scan per statistic.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Processed flights data (columns missing from SUMMARY_COLUMNS are skipped)
+    timings : dict, optional
+        Filled with seconds spent per partial result
+
+    Returns:
+    --------
+    dict : Partial name -> Series or DataFrame of counts and sums
+    """
+
+    timings = {} if timings is None else timings
+    clock = time.perf_counter()
+
+    def lap(name):
+        nonlocal clock
+        now = time.perf_counter()
+        timings[name] = timings.get(name, 0.0) + now - clock
+        clock = now
+
+    # Arrays shared by the totals and every grouped statistic
+    arrival = df['ARRIVAL_DELAY'].to_numpy(dtype='float64', na_value=np.nan)
+    arr_valid = ~np.isnan(arrival)
+    arr_filled = np.where(arr_valid, arrival, 0.0)
+    arr_n = arr_valid.astype('float64')
+
+    totals = {'flights': float(len(df))}
+    totals['arr_n'], totals['arr_sum'] = float(arr_valid.sum()), float(arr_filled.sum())
+    totals['on_time'] = float((arrival <= 15).sum())
+    totals['dep_n'], totals['dep_sum'] = _sum_and_count(df['DEPARTURE_DELAY'])
+    totals['distance_n'], totals['distance_sum'] = _sum_and_count(df['DISTANCE'])
+    totals['cancelled_n'], totals['cancelled_sum'] = _sum_and_count(df['CANCELLED'])
+    totals['diverted_n'], totals['diverted_sum'] = _sum_and_count(df['DIVERTED'])
+    for col in DELAY_COMPONENT_COLUMNS:
+        if col in df.columns:
+            totals[f'{col}_n'], totals[f'{col}_sum'] = _sum_and_count(df[col])
+    partials = {'totals': pd.Series(totals, dtype='float64')}
+    lap('totals')
+
+    keys = {}
+
+    def factorized(col):
+        if col not in keys:
+            keys[col] = _factorize(df[col])
+        return keys[col]
+
+    for name, col in DELAY_GROUPS.items():
+        codes, uniques = factorized(col)
+        group = pd.DataFrame({
+            'flights': _bincount(codes, len(uniques)),
+            'arr_n': _bincount(codes, len(uniques), arr_n),
+            'arr_sum': _bincount(codes, len(uniques), arr_filled),
+        }, index=uniques)
+        partials[name] = group[group['flights'] > 0].sort_index()
+        lap(name)
+
+    for name, col in COUNT_GROUPS.items():
+        if col in df.columns:
+            codes, uniques = factorized(col)
+            counts = pd.Series(_bincount(codes, len(uniques)), index=uniques)
+            partials[name] = counts[counts > 0].sort_index()
+            lap(name)
+
+    if 'CANCELLATION_REASON' in df.columns:
+        codes, uniques = factorized('CANCELLATION_REASON')
+        cancelled = df['CANCELLED'].to_numpy() == 1
+        counts = pd.Series(_bincount(codes, len(uniques), mask=cancelled), index=uniques)
+        partials['cancellation_reason'] = counts[counts > 0].sort_index()
+        lap('cancellation_reason')
+
+    return partials
+
+
+def generate_summary(df, timings=None):
+    """
+    Compute the analysis_summary.json payload for a flights DataFrame
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Processed flights data
+    timings : dict, optional
+        Filled with seconds spent per statistic group
+
+    Returns:
+    --------
+    dict : Summary statistics
+    """
+
+    timings = {} if timings is None else timings
+    partials = compute_partials(df, timings)
+    start = time.perf_counter()
+    stats = finalize_summary(partials)
+    timings['finalize'] = time.perf_counter() - start
+    return stats
+
+
+def merge_partials(left, right):
+    """
+    Add two sets of partial results
+
+    Parameters:
+    -----------
+    left, right : dict or None
+        Partial results from compute_partials(); None counts as empty
+
+    Returns:
+    --------
+    dict : The combined partial results
+    """
+
+    if left is None:
+        return right
+    if right is None:
+        return left
+    merged = {}
+    for name in dict.fromkeys(list(left) + list(right)):
+        if name in left and name in right:
+            merged[name] = left[name].add(right[name], fill_value=0).sort_index()
+        else:
+            merged[name] = left.get(name, right.get(name))
+    return merged
+
+
+def _mean(totals, prefix):
+    """Return sum / count for a totals prefix, or NaN without values"""
+    n = totals.get(f'{prefix}_n', 0.0)
+    return totals[f'{prefix}_sum'] / n if n else float('nan')
+
+
+def _key(value):
+    """Convert an index value to a plain Python scalar for JSON"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _as_dict(series):
+    """Convert a Series to a dict with plain Python keys"""
+    return {_key(k): v for k, v in series.items()}
+
+
+def _top_counts(counts, n=10):
+    """Return the n largest counts (all if n is None) as ints, most frequent first"""
+    top = counts.sort_values(ascending=False, kind='stable')
+    if n is not None:
+        top = top.head(n)
+    return {_key(k): int(v) for k, v in top.items()}
+
+
+def finalize_summary(partials):
+    """
+    Turn partial results into the analysis_summary.json payload
+
+    Parameters:
+    -----------
+    partials : dict
+        Partial results from compute_partials() / merge_partials()
+
+    Returns:
+    --------
+    dict : Summary statistics in the layout written by generate_stats.py
+    """
+
+    totals = partials['totals']
+    flights = totals['flights']
+
+    stats = {}
+    stats['total_flights'] = int(flights)
+    stats['avg_delay'] = round(float(_mean(totals, 'arr')), 2)
+    stats['on_time_pct'] = round(float(totals['on_time'] / flights * 100), 2)
+    stats['cancellation_rate'] = round(float(_mean(totals, 'cancelled') * 100), 2)
+    stats['unique_airlines'] = int(len(partials['airline']))
+    stats['unique_routes'] = int(len(partials['route']))
+    stats['avg_dep_delay'] = round(float(_mean(totals, 'dep')), 2)
+    stats['avg_distance'] = round(float(_mean(totals, 'distance')), 2)
+    stats['diverted_pct'] = round(float(_mean(totals, 'diverted') * 100), 2)
+
+    stats['delay_components'] = {}
+    for col in DELAY_COMPONENT_COLUMNS:
+        if totals.get(f'{col}_n', 0.0) > 0:
+            stats['delay_components'][col] = round(float(_mean(totals, col)), 2)
+
+    group_delays = {}
+    for name in DELAY_GROUPS:
+        group = partials[name]
+        group_delays[name] = group['arr_sum'] / group['arr_n'].where(group['arr_n'] > 0)
+
+    stats['top_airlines'] = _top_counts(partials['airline']['flights'])
+
+    by_airline = group_delays['airline'].dropna().sort_values(kind='stable')
+    stats['best_airline'] = {
+        'code': str(by_airline.index[0]),
+        'avg_delay': round(float(by_airline.iloc[0]), 2)
+    }
+    stats['worst_airline'] = {
+        'code': str(by_airline.index[-1]),
+        'avg_delay': round(float(by_airline.iloc[-1]), 2)
+    }
+
+    stats['top_routes'] = _top_counts(partials['route'])
+
+    traffic = partials['origin'].add(partials['destination'], fill_value=0)
+    traffic = traffic.sort_values(ascending=False, kind='stable').head(10)
+    stats['busiest_airports'] = {_key(k): float(v) for k, v in traffic.items()}
+
+    hourly = group_delays['hour']
+    stats['hourly_delays'] = _as_dict(hourly)
+    stats['best_hour'] = int(hourly.idxmin())
+    stats['worst_hour'] = int(hourly.idxmax())
+
+    stats['daily_delays'] = _as_dict(group_delays['day'])
+    stats['seasonal_delays'] = _as_dict(group_delays['season'])
+
+    stats['monthly_flights'] = {int(k): int(v) for k, v in partials['month'].items()}
+
+    stats['delay_categories'] = _top_counts(partials['delay_category'], n=None)
+
+    if partials.get('cancellation_reason') is not None and len(partials['cancellation_reason']) > 0:
+        stats['cancellation_reasons'] = _top_counts(partials['cancellation_reason'], n=None)
+
+    stats['distance_categories'] = _top_counts(partials['distance_category'], n=None)
+    return stats
+
+
+def save_partials(partials, path=SUMMARY_PARTIALS):
+    """Write partial results to a JSON file"""
+    payload = {}
+    for name, part in partials.items():
+        if isinstance(part, pd.DataFrame):
+            payload[name] = {'index': [_key(k) for k in part.index],
+                             'columns': list(part.columns), 'data': part.to_numpy().tolist()}
+        else:
+            payload[name] = {'index': [_key(k) for k in part.index], 'data': part.tolist()}
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(payload, f)
+
+
+def load_partials(path=SUMMARY_PARTIALS):
+    """Read partial results written by save_partials(), or None if missing"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        payload = json.load(f)
+    partials = {}
+    for name, part in payload.items():
+        if 'columns' in part:
+            partials[name] = pd.DataFrame(part['data'], index=part['index'],
+                                          columns=part['columns'], dtype='float64')
+        else:
+            partials[name] = pd.Series(part['data'], index=part['index'], dtype='float64')
+    return partials
+
+
+def save_summary(stats, path=SUMMARY_PATH):
+    """Write the summary payload to analysis_summary.json"""
+    with open(path, 'w') as f:
+        json.dump(stats, f, indent=2)
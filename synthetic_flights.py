@@ -0,0 +1,449 @@
+"""
+Synthetic Flights for AirFly Insights
+Streaming generator for flights data at any scale
+
+Generates flights with the raw dataset/flights.csv layout in independent,
+reproducible batches and runs each batch through the regular preprocessing,
+so the output has exactly the final_processed_flights schema. Airline
+market shares, airport traffic, departure hours, seasonality, delays,
+cancellations and delay causes follow the shape of the 2015 data, and
+airport codes come from dataset/airports.csv (or a built-in table of
+major U.S. airports when that file is not available, e.g. a Git LFS
+pointer). Only one batch is held in memory at a time, so 10M-100M rows
+can be streamed to CSV or to the Parquet flight store.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from flight_store import FLIGHTS_CSV, append_to_parquet
+from preprocessing import add_distance_category, preprocess_flights_data
+
+AIRPORTS_CSV = 'dataset/airports.csv'
+AIRLINES_CSV = 'dataset/airlines.csv'
+
+# Flights generated per batch
+SYNTHETIC_BATCH_ROWS = 250_000
+
+# Carrier -> (name, share of 2015 flights, delay propensity factor)
+AIRLINES = {
+    'WN': ('Southwest Airlines Co.', 21.7, 1.05),
+    'DL': ('Delta Air Lines Inc.', 15.3, 0.80),
+    'AA': ('American Airlines Inc.', 12.4, 1.00),
+    'OO': ('Skywest Airlines Inc.', 10.1, 1.00),
+    'EV': ('Atlantic Southeast Airlines', 9.8, 1.10),
+    'UA': ('United Air Lines Inc.', 8.9, 1.15),
+    'MQ': ('American Eagle Airlines Inc.', 5.0, 1.15),
+    'B6': ('JetBlue Airways', 4.6, 1.20),
+    'US': ('US Airways Inc.', 3.4, 0.90),
+    'AS': ('Alaska Airlines Inc.', 3.0, 0.70),
+    'NK': ('Spirit Air Lines', 2.0, 1.45),
+    'F9': ('Frontier Airlines Inc.', 1.5, 1.35),
+    'HA': ('Hawaiian Airlines Inc.', 1.3, 0.55),
+    'VX': ('Virgin America', 1.1, 1.00),
+}
+
+# Major airports: code -> (name, city, state, latitude, longitude, yearly departures in thousands)
+AIRPORTS = {
+    'ATL': ('Hartsfield-Jackson Atlanta International Airport', 'Atlanta', 'GA', 33.64044, -84.42694, 346),
+    'ORD': ("Chicago O'Hare International Airport", 'Chicago', 'IL', 41.97960, -87.90446, 285),
+    'DFW': ('Dallas/Fort Worth International Airport', 'Dallas-Fort Worth', 'TX', 32.89595, -97.03720, 239),
+    'DEN': ('Denver International Airport', 'Denver', 'CO', 39.85841, -104.66700, 196),
+    'LAX': ('Los Angeles International Airport', 'Los Angeles', 'CA', 33.94254, -118.40807, 194),
+    'SFO': ('San Francisco International Airport', 'San Francisco', 'CA', 37.61900, -122.37484, 148),
+    'PHX': ('Phoenix Sky Harbor International Airport', 'Phoenix', 'AZ', 33.43417, -112.00806, 146),
+    'IAH': ('George Bush Intercontinental Airport', 'Houston', 'TX', 29.98047, -95.33972, 146),
+    'LAS': ('McCarran International Airport', 'Las Vegas', 'NV', 36.08036, -115.15233, 133),
+    'MSP': ('Minneapolis-Saint Paul International Airport', 'Minneapolis', 'MN', 44.88055, -93.21692, 112),
+    'MCO': ('Orlando International Airport', 'Orlando', 'FL', 28.42889, -81.31603, 110),
+    'SEA': ('Seattle-Tacoma International Airport', 'Seattle', 'WA', 47.44898, -122.30931, 110),
+    'DTW': ('Detroit Metropolitan Airport', 'Detroit', 'MI', 42.21206, -83.34884, 108),
+    'BOS': ('Gen. Edward Lawrence Logan International Airport', 'Boston', 'MA', 42.36435, -71.00518, 107),
+    'EWR': ('Newark Liberty International Airport', 'Newark', 'NJ', 40.69250, -74.16866, 101),
+    'CLT': ('Charlotte Douglas International Airport', 'Charlotte', 'NC', 35.21401, -80.94313, 100),
+    'LGA': ('LaGuardia Airport', 'New York', 'NY', 40.77724, -73.87261, 99),
+    'SLC': ('Salt Lake City International Airport', 'Salt Lake City', 'UT', 40.78839, -111.97777, 97),
+    'JFK': ('John F. Kennedy International Airport', 'New York', 'NY', 40.63975, -73.77893, 93),
+    'BWI': ('Baltimore-Washington International Airport', 'Baltimore', 'MD', 39.17540, -76.66820, 86),
+    'MDW': ('Chicago Midway International Airport', 'Chicago', 'IL', 41.78598, -87.75242, 80),
+    'DCA': ('Ronald Reagan Washington National Airport', 'Arlington', 'VA', 38.85208, -77.03772, 75),
+    'FLL': ('Fort Lauderdale-Hollywood International Airport', 'Ft. Lauderdale', 'FL', 26.07258, -80.15275, 73),
+    'SAN': ('San Diego International Airport', 'San Diego', 'CA', 32.73356, -117.18966, 70),
+    'MIA': ('Miami International Airport', 'Miami', 'FL', 25.79325, -80.29056, 69),
+    'PHL': ('Philadelphia International Airport', 'Philadelphia', 'PA', 39.87195, -75.24114, 67),
+    'TPA': ('Tampa International Airport', 'Tampa', 'FL', 27.97547, -82.53325, 64),
+    'DAL': ('Dallas Love Field', 'Dallas', 'TX', 32.84711, -96.85177, 57),
+    'HOU': ('William P. Hobby Airport', 'Houston', 'TX', 29.64542, -95.27889, 53),
+    'BNA': ('Nashville International Airport', 'Nashville', 'TN', 36.12448, -86.67818, 51),
+    'PDX': ('Portland International Airport', 'Portland', 'OR', 45.58872, -122.59750, 49),
+    'STL': ('St. Louis International Airport at Lambert Field', 'St. Louis', 'MO', 38.74769, -90.35999, 45),
+    'HNL': ('Honolulu International Airport', 'Honolulu', 'HI', 21.31869, -157.92241, 43),
+    'OAK': ('Oakland International Airport', 'Oakland', 'CA', 37.72129, -122.22072, 40),
+    'AUS': ('Austin-Bergstrom International Airport', 'Austin', 'TX', 30.19453, -97.66987, 39),
+    'MSY': ('Louis Armstrong New Orleans International Airport', 'New Orleans', 'LA', 29.99339, -90.25803, 36),
+    'MCI': ('Kansas City International Airport', 'Kansas City', 'MO', 39.29761, -94.71391, 34),
+    'SJC': ('Norman Y. Mineta San Jose International Airport', 'San Jose', 'CA', 37.36186, -121.92901, 33),
+    'SMF': ('Sacramento International Airport', 'Sacramento', 'CA', 38.69542, -121.59077, 33),
+    'SNA': ('John Wayne Airport', 'Santa Ana', 'CA', 33.67566, -117.86822, 32),
+    'RDU': ('Raleigh-Durham International Airport', 'Raleigh', 'NC', 35.87764, -78.78747, 31),
+    'SAT': ('San Antonio International Airport', 'San Antonio', 'TX', 29.53369, -98.46978, 30),
+    'CLE': ('Cleveland Hopkins International Airport', 'Cleveland', 'OH', 41.41089, -81.84940, 28),
+    'IND': ('Indianapolis International Airport', 'Indianapolis', 'IN', 39.71733, -86.29438, 25),
+    'PIT': ('Pittsburgh International Airport', 'Pittsburgh', 'PA', 40.49147, -80.23287, 23),
+    'CMH': ('Port Columbus International Airport', 'Columbus', 'OH', 39.99799, -82.89188, 23),
+    'BUR': ('Bob Hope Airport', 'Burbank', 'CA', 34.20062, -118.35850, 18),
+    'ABQ': ('Albuquerque International Sunport', 'Albuquerque', 'NM', 35.04022, -106.60919, 17),
+    'ANC': ('Ted Stevens Anchorage International Airport', 'Anchorage', 'AK', 61.17432, -149.99619, 16),
+    'OGG': ('Kahului Airport', 'Kahului', 'HI', 20.89865, -156.43046, 14),
+}
+
+# Share of scheduled departures per hour of day (0-23)
+DEPARTURE_HOURS = np.array([1, 0.3, 0.1, 0.1, 0.2, 2.5, 6.5, 6.8, 6.4, 5.8, 5.9, 5.8,
+                            5.8, 5.9, 5.6, 5.9, 5.6, 6.2, 5.7, 5.3, 4.3, 3.3, 1.9, 1.1])
+
+# Relative delay propensity per month (summer and December peaks, autumn lull)
+MONTH_DELAY_FACTOR = np.array([1.1, 1.15, 1.0, 0.9, 0.95, 1.3, 1.25, 1.1, 0.7, 0.7, 0.8, 1.2])
+
+# Miles over which the chance of flying to a destination falls by a factor e
+ROUTE_DISTANCE_SCALE = 700
+
+# Aircraft per carrier
+TAILS_PER_AIRLINE = 900
+
+# Cancellation reasons: A carrier, B weather, C national air system, D security
+CANCELLATION_REASONS = (['A', 'B', 'C', 'D'], [0.28, 0.54, 0.1797, 0.0003])
+
+# Delay causes, in raw column order, with their share of reported delay minutes
+DELAY_CAUSES = (['AIR_SYSTEM_DELAY', 'SECURITY_DELAY', 'AIRLINE_DELAY', 'LATE_AIRCRAFT_DELAY', 'WEATHER_DELAY'],
+                [0.24, 0.002, 0.31, 0.40, 0.048])
+
+
+def is_lfs_pointer(path):
+    """Return True if path is a Git LFS pointer instead of the file's content"""
+    with open(path, 'rb') as f:
+        return f.read(40).startswith(b'version https://git-lfs')
+
+
+def _usable(path):
+    return os.path.exists(path) and not is_lfs_pointer(path)
+
+
+def reference_airports(airports_path=AIRPORTS_CSV):
+    """
+    Return the airports flights are generated between
+
+    Parameters:
+    -----------
+    airports_path : str
+        airports.csv to take codes and coordinates from; the built-in
+        table of major airports is used when it is missing or an LFS pointer
+
+    Returns:
+    --------
+    DataFrame : IATA_CODE, AIRPORT, CITY, STATE, COUNTRY, LATITUDE,
+        LONGITUDE and a relative TRAFFIC weight
+    """
+
+    if _usable(airports_path):
+        airports_df = pd.read_csv(airports_path).dropna(subset=['LATITUDE', 'LONGITUDE'])
+        builtin = {code: row[-1] for code, row in AIRPORTS.items()}
+        # Known hubs keep their traffic; other airports get a small, decreasing share
+        rank = np.arange(len(airports_df))
+        airports_df['TRAFFIC'] = [builtin.get(code, 10.0 / (1 + 0.05 * r))
+                                  for code, r in zip(airports_df['IATA_CODE'], rank)]
+        return airports_df.reset_index(drop=True)
+
+    rows = [(code, name, city, state, 'USA', lat, lon, traffic)
+            for code, (name, city, state, lat, lon, traffic) in AIRPORTS.items()]
+    return pd.DataFrame(rows, columns=['IATA_CODE', 'AIRPORT', 'CITY', 'STATE', 'COUNTRY',
+                                       'LATITUDE', 'LONGITUDE', 'TRAFFIC'])
+
+
+def reference_airlines():
+    """Return the carriers of the generated flights as an airlines.csv table"""
+    return pd.DataFrame({'IATA_CODE': list(AIRLINES), 'AIRLINE': [name for name, _, _ in AIRLINES.values()]})
+
+
+def write_reference_tables(dataset_dir='dataset', overwrite=False):
+    """
+    Write airports.csv and airlines.csv matching the generated flights
+
+    Existing files are only replaced when they are Git LFS pointers or
+    overwrite is set.
+
+    Returns:
+    --------
+    list : Paths written
+    """
+
+    written = []
+    tables = {'airports.csv': reference_airports(os.path.join(dataset_dir, 'airports.csv')).drop(columns='TRAFFIC'),
+              'airlines.csv': reference_airlines()}
+    os.makedirs(dataset_dir, exist_ok=True)
+    for name, table in tables.items():
+        path = os.path.join(dataset_dir, name)
+        if overwrite or not os.path.exists(path) or is_lfs_pointer(path):
+            table.to_csv(path, index=False)
+            written.append(path)
+    return written
+
+
+def _distance_matrix(airports_df):
+    """Great-circle miles between every pair of airports"""
+    lat = np.radians(airports_df['LATITUDE'].to_numpy(dtype='float64'))
+    lon = np.radians(airports_df['LONGITUDE'].to_numpy(dtype='float64'))
+    a = (np.sin((lat[None, :] - lat[:, None]) / 2) ** 2
+         + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin((lon[None, :] - lon[:, None]) / 2) ** 2)
+    return 3958.8 * 2 * np.arcsin(np.sqrt(a))
+
+
+def _tail_numbers(carriers):
+    """Return TAILS_PER_AIRLINE tail numbers per carrier, carrier by carrier"""
+    return np.array([f'N{100 + i}{carrier}' for carrier in carriers for i in range(TAILS_PER_AIRLINE)], dtype=object)
+
+
+def _hhmm(minutes):
+    """Convert minutes after midnight to the dataset's HHMM clock times"""
+    minutes = np.mod(minutes, 24 * 60)
+    return (minutes // 60) * 100 + minutes % 60
+
+
+def synthetic_raw_flights(n, airports_df, rng):
+    """
+    Generate one batch of flights with the raw flights.csv layout
+
+    Parameters:
+    -----------
+    n : int
+        Number of flights
+    airports_df : DataFrame
+        Airports as returned by reference_airports()
+    rng : numpy Generator
+        Random source for this batch
+
+    Returns:
+    --------
+    DataFrame : Raw flights (cancelled flights have no actual times,
+        diverted ones no arrival, delay causes only for late arrivals)
+    """
+
+    # String columns index small pools of shared str objects, which is far
+    # cheaper than building a new string per flight
+    codes = airports_df['IATA_CODE'].to_numpy(dtype=object)
+    traffic = airports_df['TRAFFIC'].to_numpy(dtype='float64')
+    traffic = traffic / traffic.sum()
+    n_airports = len(codes)
+
+    # Routes: origins weighted by traffic, destinations by traffic and proximity
+    miles = _distance_matrix(airports_df)
+    route_weights = traffic[None, :] * np.exp(-miles / ROUTE_DISTANCE_SCALE)
+    np.fill_diagonal(route_weights, 0)
+    route_cdf = np.cumsum(route_weights, axis=1)
+    route_cdf /= route_cdf[:, -1:]
+    origin = rng.choice(n_airports, n, p=traffic)
+    # One search over all rows' CDFs, each shifted into its own unit interval
+    flat_cdf = (route_cdf + np.arange(n_airports)[:, None]).ravel()
+    dest = np.searchsorted(flat_cdf, origin + rng.random(n)) - origin * n_airports
+    dest = np.minimum(dest, n_airports - 1)
+    distance = np.maximum(np.round(miles[origin, dest]), 31).astype('int64')
+
+    carriers = np.array(list(AIRLINES), dtype=object)
+    shares = np.array([share for _, share, _ in AIRLINES.values()])
+    carrier = rng.choice(len(carriers), n, p=shares / shares.sum())
+    carrier_factor = np.array([factor for _, _, factor in AIRLINES.values()])[carrier]
+
+    # Calendar: flights spread over the days of 2015
+    day_of_year = rng.integers(0, 365, n)
+    dates = np.datetime64('2015-01-01') + day_of_year.astype('timedelta64[D]')
+    month = dates.astype('datetime64[M]').astype('int64') % 12 + 1
+    day = (dates - dates.astype('datetime64[M]')).astype('int64') + 1
+    day_of_week = (day_of_year + 3) % 7 + 1  # 2015-01-01 was a Thursday; Monday = 1
+
+    hour = rng.choice(24, n, p=DEPARTURE_HOURS / DEPARTURE_HOURS.sum())
+    scheduled_departure = hour * 60 + rng.choice(np.arange(0, 60, 5), n)
+    air_minutes = distance / 7.5 + 12
+    scheduled_time = np.round(air_minutes + 28 + rng.normal(0, 9, n)).clip(20)
+
+    # Delays: a late share that grows through the day, with a long right tail
+    late_share = 0.10 + 0.011 * np.clip(hour - 5, 0, None)
+    late = rng.random(n) < late_share * MONTH_DELAY_FACTOR[month - 1] * carrier_factor
+    departure_delay = np.where(late, 5 + rng.lognormal(3.4, 1.0, n), rng.normal(-2, 6, n)).round()
+    taxi_out = np.round(rng.gamma(4, 4, n)).clip(1)
+    taxi_in = np.round(rng.gamma(2.5, 3, n)).clip(1)
+    air_time = np.round(air_minutes * rng.normal(1, 0.04, n)).clip(8)
+    elapsed_time = taxi_out + air_time + taxi_in
+    arrival_delay = departure_delay + elapsed_time - scheduled_time
+
+    cancelled = rng.random(n) < 0.012 + 0.008 * (MONTH_DELAY_FACTOR[month - 1] > 1.1)
+    diverted = ~cancelled & (rng.random(n) < 0.0026)
+    reasons, reason_p = CANCELLATION_REASONS
+    reason_pool = np.array(reasons + [None], dtype=object)
+    cancellation_reason = reason_pool[np.where(cancelled, rng.choice(len(reasons), n, p=reason_p), len(reasons))]
+
+    departure_time = scheduled_departure + departure_delay
+    wheels_off = departure_time + taxi_out
+    wheels_on = wheels_off + air_time
+    arrival_time = wheels_on + taxi_in
+
+    def actual(values, missing):
+        return np.where(missing, np.nan, values)
+
+    no_arrival = cancelled | diverted
+    flights = {
+        'YEAR': 2015,
+        'MONTH': month,
+        'DAY': day,
+        'DAY_OF_WEEK': day_of_week,
+        'AIRLINE': carriers[carrier],
+        'FLIGHT_NUMBER': rng.integers(1, 7000, n),
+        'TAIL_NUMBER': _tail_numbers(carriers)[carrier * TAILS_PER_AIRLINE + rng.integers(0, TAILS_PER_AIRLINE, n)],
+        'ORIGIN_AIRPORT': codes[origin],
+        'DESTINATION_AIRPORT': codes[dest],
+        'SCHEDULED_DEPARTURE': _hhmm(scheduled_departure),
+        'DEPARTURE_TIME': actual(_hhmm(departure_time), cancelled),
+        'DEPARTURE_DELAY': actual(departure_delay, cancelled),
+        'TAXI_OUT': actual(taxi_out, cancelled),
+        'WHEELS_OFF': actual(_hhmm(wheels_off), cancelled),
+        'SCHEDULED_TIME': scheduled_time,
+        'ELAPSED_TIME': actual(elapsed_time, no_arrival),
+        'AIR_TIME': actual(air_time, no_arrival),
+        'DISTANCE': distance,
+        'WHEELS_ON': actual(_hhmm(wheels_on), no_arrival),
+        'TAXI_IN': actual(taxi_in, no_arrival),
+        'SCHEDULED_ARRIVAL': _hhmm(scheduled_departure + scheduled_time.astype('int64')),
+        'ARRIVAL_TIME': actual(_hhmm(arrival_time), no_arrival),
+        'ARRIVAL_DELAY': actual(arrival_delay, no_arrival),
+        'DIVERTED': diverted.astype('int64'),
+        'CANCELLED': cancelled.astype('int64'),
+        'CANCELLATION_REASON': cancellation_reason,
+    }
+
+    # Delay causes are only reported for arrivals at least 15 minutes late
+    cause_names, cause_shares = DELAY_CAUSES
+    reported = ~no_arrival & (arrival_delay >= 15)
+    split = rng.dirichlet(np.array(cause_shares) * 4, n) * np.where(reported, arrival_delay, 0)[:, None]
+    split = np.floor(split)
+    split[:, 3] += np.where(reported, arrival_delay, 0) - split.sum(axis=1)  # minutes add up exactly
+    for j, name in enumerate(cause_names):
+        flights[name] = np.where(reported, split[:, j], np.nan)
+
+    return pd.DataFrame(flights)
+
+
+def iter_synthetic_flights(n_rows, batch_rows=SYNTHETIC_BATCH_ROWS, seed=0, airports_df=None,
+                           processed=True):
+    """
+    Yield synthetic flights in batches
+
+    Every batch draws from its own random stream derived from (seed,
+    batch number), so the output is reproducible and does not depend on
+    how many batches have been consumed.
+
+    Parameters:
+    -----------
+    n_rows : int
+        Total number of flights
+    batch_rows : int
+        Flights per batch
+    seed : int
+        Random seed
+    airports_df : DataFrame, optional
+        Airports as returned by reference_airports() (loaded if None)
+    processed : bool
+        Yield the final_processed_flights layout (True) or the raw flights.csv layout
+
+    Returns:
+    --------
+    iterator of DataFrame : Batches of at most batch_rows flights
+    """
+
+    airports_df = reference_airports() if airports_df is None else airports_df
+    for i, start in enumerate(range(0, n_rows, batch_rows)):
+        rng = np.random.default_rng([seed, i])
+        batch = synthetic_raw_flights(min(batch_rows, n_rows - start), airports_df, rng)
+        if processed:
+            batch = add_distance_category(preprocess_flights_data(batch, copy=False, verbose=False))
+        yield batch
+
+
+def write_synthetic_flights(output_path=FLIGHTS_CSV, n_rows=5_819_079, batch_rows=SYNTHETIC_BATCH_ROWS,
+                            seed=0, airports_df=None, processed=True):
+    """
+    Stream synthetic flights to a CSV file or a Parquet flight store
+
+    Parameters:
+    -----------
+    output_path : str
+        CSV file, or a directory ending in .parquet for the MONTH-partitioned
+        Parquet store read by flight_store.load_flights(); an existing file
+        or store is replaced
+    n_rows : int
+        Total number of flights
+    batch_rows : int
+        Flights generated and written per batch
+    seed : int
+        Random seed
+    airports_df : DataFrame, optional
+        Airports as returned by reference_airports() (loaded if None)
+    processed : bool
+        Write the processed layout (True) or the raw flights.csv layout
+
+    Returns:
+    --------
+    int : Number of rows written
+    """
+
+    parquet = output_path.rstrip('/').endswith('.parquet')
+    if parquet:
+        # Like the CSV, the store is rewritten rather than added to
+        if os.path.isdir(output_path):
+            shutil.rmtree(output_path)
+        os.makedirs(output_path)
+    else:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+
+    total_rows = 0
+    for i, batch in enumerate(iter_synthetic_flights(n_rows, batch_rows, seed, airports_df, processed)):
+        if parquet:
+            if i == 0:
+                with open(os.path.join(output_path, '_columns.json'), 'w') as f:
+                    json.dump(list(batch.columns), f)
+            append_to_parquet(batch, output_path, basename=f'part-{i:05d}')
+        else:
+            batch.to_csv(output_path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        total_rows += len(batch)
+    return total_rows
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    args = sys.argv[1:]
+    options = {}
+    for flag in ['--seed', '--batch-rows']:
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = int(args[i + 1])
+            del args[i:i + 2]
+    processed = '--raw' not in args
+    args = [a for a in args if a != '--raw']
+
+    n_rows = int(args[0]) if args else 5_819_079
+    output_path = args[1] if len(args) > 1 else (FLIGHTS_CSV if processed else 'dataset/flights.csv')
+
+    for path in write_reference_tables(os.path.dirname(output_path.rstrip('/')) or '.'):
+        print(f"Wrote {path}")
+    print(f"Generating {n_rows:,} {'processed' if processed else 'raw'} flights into {output_path}...")
+    start = time.perf_counter()
+    rows = write_synthetic_flights(output_path, n_rows, options.get('--batch-rows', SYNTHETIC_BATCH_ROWS),
+                                   options.get('--seed', 0), processed=processed)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
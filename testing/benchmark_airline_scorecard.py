@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Airline Scorecard Benchmark for AirFly Insights
+Compares airline_scorecard() with the per-metric group-bys it replaces
+
+The original Airline Performance page ran one group-by per metric and a
+groupby.apply lambda for the on-time rate. This script times that code
+against the single-pass scorecard on the processed flights (or a synthetic
+set of flights) and checks that both produce the same numbers.
+
+Usage (from the project root):
+    python testing/benchmark_airline_scorecard.py [--synthetic N] [--repeat R]
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from airline_scorecard import PERCENTILES, SCORECARD_COLUMNS, airline_scorecard
+from flight_store import load_flights
+
+
+def groupby_scorecard(df, percentiles=PERCENTILES):
+    """The Airline Performance page metrics as originally computed, plus percentiles"""
+    grouped = df.groupby('AIRLINE', observed=True)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        on_time = grouped.apply(lambda x: (x['ARRIVAL_DELAY'] <= 15).mean() * 100)
+    scorecard = pd.DataFrame({
+        'flights': df['AIRLINE'].value_counts(),
+        'avg_departure_delay': grouped['DEPARTURE_DELAY'].mean(),
+        'avg_arrival_delay': grouped['ARRIVAL_DELAY'].mean(),
+        'on_time_pct': on_time,
+        'cancellation_pct': grouped['CANCELLED'].mean() * 100,
+    })
+    for q in percentiles:
+        scorecard[f'arrival_delay_p{q:g}'] = grouped['ARRIVAL_DELAY'].quantile(q / 100)
+    scorecard.index = scorecard.index.astype(str)
+    return scorecard[scorecard['flights'] > 0].sort_index()
+
+
+def synthetic_flights(n, seed=0):
+    """Return n random flights with the scorecard columns"""
+    rng = np.random.default_rng(seed)
+    airlines = ['AA', 'AS', 'B6', 'DL', 'EV', 'F9', 'HA', 'MQ', 'NK', 'OO', 'UA', 'US', 'VX', 'WN']
+    cancelled = (rng.random(n) < 0.015).astype('float64')
+    arrival = rng.gamma(1.5, 15, n) - 15
+    arrival[cancelled == 1] = np.nan
+    return pd.DataFrame({
+        'AIRLINE': pd.Categorical(rng.choice(airlines, n)),
+        'ARRIVAL_DELAY': arrival.astype('float32'),
+        'DEPARTURE_DELAY': (arrival + rng.normal(2, 5, n)).astype('float32'),
+        'CANCELLED': cancelled,
+    })
+
+
+def _best_time(func, df, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def run_benchmark(df, repeat=3):
+    """
+    Time both implementations on the same flights
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Flights holding the SCORECARD_COLUMNS
+    repeat : int
+        Runs per implementation (the fastest is reported)
+
+    Returns:
+    --------
+    tuple : (groupby seconds, scorecard seconds)
+    """
+
+    expected, groupby_time = _best_time(groupby_scorecard, df, repeat)
+    result, scorecard_time = _best_time(airline_scorecard, df, repeat)
+
+    result.index = result.index.astype(str)
+    pd.testing.assert_frame_equal(result.sort_index(), expected[result.columns],
+                                  check_dtype=False, check_names=False, rtol=1e-6)
+    return groupby_time, scorecard_time
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    repeat = int(args[args.index('--repeat') + 1]) if '--repeat' in args else 3
+    if '--synthetic' in args:
+        n = int(args[args.index('--synthetic') + 1])
+        print(f"Generating {n:,} synthetic flights...")
+        flights_df = synthetic_flights(n)
+    else:
+        print("Loading processed flights...")
+        flights_df = load_flights(columns=SCORECARD_COLUMNS)
+
+    print(f"⏱️ Airline scorecard benchmark on {len(flights_df):,} flights")
+    print("=" * 50)
+    groupby_time, scorecard_time = run_benchmark(flights_df, repeat)
+    print(f"   group-by per metric: {groupby_time:7.3f}s")
+    print(f"   airline_scorecard:   {scorecard_time:7.3f}s  ({groupby_time / scorecard_time:.1f}x)")
+    print("✅ Both implementations produce the same scorecard")
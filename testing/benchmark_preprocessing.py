@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Preprocessing Scaling Benchmark for AirFly Insights
+Measures parallel preprocessing speedup from 1 to N cores
+
+Runs preprocess_flights_parallel() on the raw flights file with an
+increasing number of worker processes, checks that every run writes the
+same output as the single-process run, and prints the wall time and
+speedup per worker count.
+
+Usage (from the project root):
+    python testing/benchmark_preprocessing.py [dataset/flights.csv] [--max-workers N]
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import filecmp
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from preprocessing import RAW_FLIGHTS_CSV, preprocess_flights_parallel
+
+
+def worker_counts(max_workers):
+    """Return 1, 2, 4, ... up to and including max_workers"""
+    counts = [1]
+    while counts[-1] * 2 < max_workers:
+        counts.append(counts[-1] * 2)
+    if max_workers > 1:
+        counts.append(max_workers)
+    return counts
+
+
+def run_benchmark(input_path=RAW_FLIGHTS_CSV, max_workers=None):
+    """
+    Time parallel preprocessing for each worker count
+
+    Parameters:
+    -----------
+    input_path : str
+        Raw flights CSV file
+    max_workers : int, optional
+        Largest worker count to try (default: all CPU cores)
+
+    Returns:
+    --------
+    list : (workers, rows, seconds, speedup) per run
+    """
+
+    max_workers = max_workers or os.cpu_count()
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        baseline_path = None
+        for workers in worker_counts(max_workers):
+            output_path = os.path.join(tmp_dir, f'processed-{workers}.csv')
+            start = time.perf_counter()
+            rows = preprocess_flights_parallel(input_path, output_path, workers=workers)
+            elapsed = time.perf_counter() - start
+
+            if baseline_path is None:
+                baseline_path = output_path
+            elif not filecmp.cmp(baseline_path, output_path, shallow=False):
+                raise AssertionError(f"Output with {workers} workers differs from the 1-worker run")
+
+            speedup = results[0][2] / elapsed if results else 1.0
+            results.append((workers, rows, elapsed, speedup))
+            print(f"   {workers:>3} workers: {rows:,} rows in {elapsed:7.2f}s  ({speedup:.2f}x)")
+
+    return results
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    max_workers = None
+    if '--max-workers' in args:
+        i = args.index('--max-workers')
+        max_workers = int(args[i + 1])
+        del args[i:i + 2]
+    input_path = args[0] if args else RAW_FLIGHTS_CSV
+
+    print(f"⏱️ Preprocessing scaling benchmark on {input_path}")
+    print("=" * 50)
+    run_benchmark(input_path, max_workers)
+    print("✅ All runs produced identical output")
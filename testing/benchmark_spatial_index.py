@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Spatial Index Benchmark for AirFly Insights
+Compares AirportIndex queries against brute-force distance scans
+
+Builds the index over the airports in dataset/airports.csv and over larger
+synthetic point sets, runs batched radius and nearest-k queries, checks the
+results against a full haversine distance matrix and prints the timings.
+
+Usage (from the project root):
+    python testing/benchmark_spatial_index.py [--queries N] [--radius MILES] [--k K]
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from airport_index import AirportIndex, haversine_miles
+
+SYNTHETIC_SIZES = [5_000, 50_000]
+
+
+def synthetic_airports(n, seed=0):
+    """Return n random points spread over North America"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'IATA_CODE': [f'P{i:06d}' for i in range(n)],
+        'LATITUDE': rng.uniform(18, 65, n),
+        'LONGITUDE': rng.uniform(-165, -65, n),
+    })
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run_benchmark(airports_df, n_queries=2000, radius_miles=150, k=5, seed=1):
+    """
+    Time index and brute-force queries over one set of airports
+
+    Parameters:
+    -----------
+    airports_df : DataFrame
+        Airports with IATA_CODE, LATITUDE and LONGITUDE
+    n_queries : int
+        Number of random query points
+    radius_miles : float
+        Radius for the radius queries
+    k : int
+        Neighbours for the nearest-k queries
+    seed : int
+        Seed for the query points
+
+    Returns:
+    --------
+    dict : Seconds per step ('build', 'radius', 'radius_brute', 'nearest', 'nearest_brute')
+    """
+
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(20, 60, n_queries)
+    lon = rng.uniform(-160, -70, n_queries)
+
+    index, build = _timed(AirportIndex, airports_df)
+    matches, radius = _timed(index.within, lat, lon, radius_miles)
+    (codes, distances), nearest = _timed(index.nearest, lat, lon, k)
+
+    # Brute force: the full query x airport distance matrix
+    located = airports_df.dropna(subset=['LATITUDE', 'LONGITUDE'])
+    all_codes = located['IATA_CODE'].to_numpy()
+    start = time.perf_counter()
+    matrix = haversine_miles(lat[:, None], lon[:, None],
+                             located['LATITUDE'].to_numpy()[None, :],
+                             located['LONGITUDE'].to_numpy()[None, :])
+    brute_matches = int((matrix <= radius_miles).sum())
+    radius_brute = time.perf_counter() - start
+    start = time.perf_counter()
+    brute_nearest = np.argsort(matrix, axis=1, kind='stable')[:, :k]
+    nearest_brute = radius_brute + time.perf_counter() - start
+
+    if len(matches) != brute_matches:
+        raise AssertionError(f"Radius query found {len(matches)} matches, brute force {brute_matches}")
+    if not np.allclose(np.take_along_axis(matrix, brute_nearest, axis=1), distances, atol=1e-6):
+        raise AssertionError("Nearest-k distances differ from brute force")
+
+    return {'build': build, 'radius': radius, 'radius_brute': radius_brute,
+            'nearest': nearest, 'nearest_brute': nearest_brute}
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {'--queries': 2000, '--radius': 150, '--k': 5}
+    for flag in options:
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = float(args[i + 1]) if flag == '--radius' else int(args[i + 1])
+
+    point_sets = [('airports.csv', pd.read_csv('dataset/airports.csv'))]
+    point_sets += [(f'{n:,} synthetic', synthetic_airports(n)) for n in SYNTHETIC_SIZES]
+
+    print(f"⏱️ Spatial index benchmark: {options['--queries']:,} queries, "
+          f"{options['--radius']:g} mile radius, k={options['--k']}")
+    print("=" * 78)
+    print(f"   {'points':<18} {'build':>8} {'radius':>8} {'brute':>8} {'nearest':>8} {'brute':>8}")
+    for name, airports_df in point_sets:
+        t = run_benchmark(airports_df, options['--queries'], options['--radius'], options['--k'])
+        print(f"   {name:<18} {t['build']:8.3f} {t['radius']:8.3f} {t['radius_brute']:8.3f} "
+              f"{t['nearest']:8.3f} {t['nearest_brute']:8.3f}")
+    print("✅ Index results match the brute-force scans")
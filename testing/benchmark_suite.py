@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite for AirFly Insights
+Headless wall-time and peak-memory benchmarks with a regression baseline
+
+For every dataset size a synthetic workspace is generated (raw flights,
+the processed Parquet flight store, airports, airlines and the analysis
+summary). Each benchmark then runs in a fresh process inside that
+workspace, so the peak resident memory it reports is its own:
+
+- preprocessing: feature engineering on the raw flights
+- generate_stats: the analysis summary
+- maps: every map of geographic_analysis.create_all_maps()
+- page: <name>: every dashboard page rendered headlessly with Streamlit's
+  AppTest, timing its first visit in a new server (after the default page
+  has loaded the shared data) and a warm rerun
+
+Results are compared with a stored baseline and any benchmark that got
+slower or bigger than the tolerance allows is reported as a regression.
+
+Usage (from the project root):
+    python testing/benchmark_suite.py [--sizes 100000,1000000,6000000] [--only NAME,...]
+                                      [--repeat R] [--save-baseline] [--output results.json]
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
+
+import contextlib
+import gc
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from flight_store import FLIGHTS_PARQUET, append_to_parquet, list_flight_columns, load_flights
+from preprocessing import add_distance_category, preprocess_flights_data
+from summary_stats import SUMMARY_COLUMNS
+from synthetic_flights import AIRPORTS_CSV, iter_synthetic_flights, reference_airlines, reference_airports
+
+# Dataset sizes (rows) benchmarked by default
+SIZES = [100_000, 1_000_000, 6_000_000]
+
+# Stored results the current run is compared with
+BASELINE_PATH = os.path.join(ROOT, 'testing', 'benchmark_baseline.json')
+
+# Relative slowdown / growth tolerated before a result counts as a regression,
+# and absolute floors below which differences are treated as noise
+REGRESSION_TOLERANCE = 0.5
+MIN_SECONDS_DELTA = 0.25
+MIN_RSS_DELTA_MB = 25
+
+# Rows generated and written per batch when building a workspace
+WORKSPACE_CHUNK_ROWS = 1_000_000
+
+RAW_DIR = 'dataset/raw_flights.parquet'
+DASHBOARD = os.path.join(ROOT, 'dashboard.py')
+
+
+# ---------------------------------------------------------------------------
+# Synthetic workspace
+# ---------------------------------------------------------------------------
+
+def build_workspace(path, n_rows, seed=0, chunk_rows=WORKSPACE_CHUNK_ROWS):
+    """
+    Generate a dashboard workspace with n_rows synthetic flights
+
+    Parameters:
+    -----------
+    path : str
+        Directory to create the dataset/ and configuration/ folders in
+    n_rows : int
+        Number of flights
+    seed : int
+        Random seed
+    chunk_rows : int
+        Flights generated and written per batch
+
+    Returns:
+    --------
+    str : The workspace path
+    """
+
+    from generate_stats import generate_stats
+
+    dataset_dir = os.path.join(path, 'dataset')
+    parquet_path = os.path.join(path, FLIGHTS_PARQUET)
+    os.makedirs(os.path.join(path, RAW_DIR), exist_ok=True)
+    os.makedirs(parquet_path, exist_ok=True)
+    os.makedirs(os.path.join(path, 'configuration'), exist_ok=True)
+
+    airports_df = reference_airports(os.path.join(ROOT, AIRPORTS_CSV))
+    airports_df.drop(columns='TRAFFIC').to_csv(os.path.join(dataset_dir, 'airports.csv'), index=False)
+    reference_airlines().to_csv(os.path.join(dataset_dir, 'airlines.csv'), index=False)
+
+    batches = iter_synthetic_flights(n_rows, chunk_rows, seed=seed, airports_df=airports_df, processed=False)
+    for i, raw in enumerate(batches):
+        raw.to_parquet(os.path.join(path, RAW_DIR, f'part-{i:05d}.parquet'), index=False)
+        processed = add_distance_category(preprocess_flights_data(raw, copy=False, verbose=False))
+        if i == 0:
+            with open(os.path.join(parquet_path, '_columns.json'), 'w') as f:
+                json.dump(list(processed.columns), f)
+        append_to_parquet(processed, parquet_path, basename=f'part-{i:05d}')
+
+    available = list_flight_columns(parquet_path=parquet_path, mmap_path=None)
+    flights = load_flights(columns=[c for c in SUMMARY_COLUMNS if c in available],
+                           parquet_path=parquet_path, mmap_path=None)
+    generate_stats(flights, output_path=os.path.join(path, 'configuration', 'analysis_summary.json'))
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Measurement (runs in the benchmark process)
+# ---------------------------------------------------------------------------
+
+def _reset_peak_rss():
+    """Reset the process's peak resident set size (Linux), if supported"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _peak_rss_mb():
+    """Return the peak resident set size of this process in MB"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure(func, repeat=1):
+    """Return the fastest wall time of func over repeat runs and the peak RSS"""
+    gc.collect()
+    _reset_peak_rss()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {'seconds': min(times), 'peak_rss_mb': round(_peak_rss_mb(), 1)}
+
+
+def _bench_preprocessing(repeat):
+    raw = pd.read_parquet(RAW_DIR)
+    return _measure(lambda: add_distance_category(preprocess_flights_data(raw, verbose=False)), repeat)
+
+
+def _bench_generate_stats(repeat):
+    from generate_stats import generate_stats
+
+    available = list_flight_columns(mmap_path=None)
+    flights = load_flights(columns=[c for c in SUMMARY_COLUMNS if c in available], mmap_path=None)
+    return _measure(lambda: generate_stats(flights, output_path=None), repeat)
+
+
+def _bench_maps(repeat):
+    from geographic_analysis import create_all_maps
+
+    flights = load_flights(columns=['ORIGIN_AIRPORT', 'DESTINATION_AIRPORT', 'ARRIVAL_DELAY'], mmap_path=None)
+    airports_df = pd.read_csv('dataset/airports.csv')
+    with tempfile.TemporaryDirectory() as output_dir:
+        return _measure(lambda: create_all_maps(flights, airports_df, output_dir=output_dir, workers=1,
+                                                force=True, arcs_cache=None), repeat)
+
+
+def _bench_page(page_index, repeat):
+    """Render one dashboard page headlessly: first visit in a new server, then warm reruns"""
+    from streamlit.testing.v1 import AppTest
+    from page_warmup import WARMUP_ENV
+
+    # Measure cold first visits; the background warm-up would race the measured page
+    os.environ[WARMUP_ENV] = '0'
+    app = AppTest.from_file(DASHBOARD, default_timeout=3600)
+
+    # The first run renders the default page and loads the shared data
+    gc.collect()
+    _reset_peak_rss()
+    start = time.perf_counter()
+    app.run()
+    first_visit = time.perf_counter() - start
+    pages = list(app.sidebar.radio[0].options)
+
+    if page_index > 0:
+        radio = app.sidebar.radio[0].set_value(pages[page_index])
+        result = _measure(radio.run)
+        first_visit = result['seconds']
+    peak = _peak_rss_mb()
+    if app.exception:
+        raise RuntimeError(f"{pages[page_index]} raised: {app.exception[0].value}")
+
+    warm = _measure(app.run, repeat)['seconds']
+    return {'seconds': first_visit, 'warm_seconds': warm, 'peak_rss_mb': round(peak, 1), 'pages': pages}
+
+
+BENCHMARKS = {
+    'preprocessing': _bench_preprocessing,
+    'generate_stats': _bench_generate_stats,
+    'maps': _bench_maps,
+}
+
+
+def _run_in_workspace(task):
+    """Benchmark process entry point: run one benchmark inside a workspace"""
+    workspace, name, repeat = task
+    os.chdir(workspace)
+    sys.path[:0] = [ROOT, os.path.join(ROOT, 'testing')]
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        if isinstance(name, int):
+            return _bench_page(name, repeat)
+        return BENCHMARKS[name](repeat)
+
+
+def _isolated(func, *args):
+    """Call func in a fresh process so its peak memory is its own"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(func, *args).result()
+
+
+def _run_isolated(workspace, name, repeat):
+    """Run one benchmark in a fresh process"""
+    return _isolated(_run_in_workspace, (workspace, name, repeat))
+
+
+# ---------------------------------------------------------------------------
+# Suite and baseline
+# ---------------------------------------------------------------------------
+
+def _page_label(page):
+    """Page name without its icon"""
+    return page.split(' ', 1)[-1]
+
+
+def run_suite(sizes=SIZES, only=None, repeat=3, seed=0, verbose=True):
+    """
+    Run every benchmark on a synthetic workspace of each size
+
+    Parameters:
+    -----------
+    sizes : list
+        Dataset sizes in rows
+    only : list, optional
+        Benchmark names to run ('preprocessing', 'generate_stats', 'maps',
+        'pages'); all of them if None
+    repeat : int
+        Runs per benchmark (the fastest is reported)
+    seed : int
+        Random seed of the synthetic data
+    verbose : bool
+        Print every result as it completes
+
+    Returns:
+    --------
+    list : One dict per benchmark and size with benchmark, rows, seconds,
+        peak_rss_mb (and warm_seconds for dashboard pages)
+    """
+
+    only = set(only or list(BENCHMARKS) + ['pages'])
+    results = []
+
+    def record(name, n_rows, result):
+        entry = {'benchmark': name, 'rows': n_rows, 'seconds': round(result['seconds'], 4),
+                 'peak_rss_mb': result['peak_rss_mb']}
+        if 'warm_seconds' in result:
+            entry['warm_seconds'] = round(result['warm_seconds'], 4)
+        results.append(entry)
+        if verbose:
+            warm = f"  warm {entry['warm_seconds']:7.3f}s" if 'warm_seconds' in entry else ''
+            print(f"   {name:<28} {n_rows:>11,} {entry['seconds']:9.3f}s {entry['peak_rss_mb']:9.0f} MB{warm}")
+
+    for n_rows in sizes:
+        with tempfile.TemporaryDirectory() as workspace:
+            start = time.perf_counter()
+            # Generating the data in its own process keeps this one small for the benchmarks
+            _isolated(build_workspace, workspace, n_rows, seed)
+            if verbose:
+                print(f"   (workspace with {n_rows:,} flights built in {time.perf_counter() - start:.1f}s)")
+
+            for name in BENCHMARKS:
+                if name in only:
+                    record(name, n_rows, _run_isolated(workspace, name, repeat))
+
+            if 'pages' in only:
+                overview = _run_isolated(workspace, 0, repeat)
+                pages = overview['pages']
+                record(f'page: {_page_label(pages[0])}', n_rows, overview)
+                for i in range(1, len(pages)):
+                    record(f'page: {_page_label(pages[i])}', n_rows, _run_isolated(workspace, i, repeat))
+
+    return results
+
+
+def find_regressions(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    Compare results with a baseline run
+
+    A benchmark regresses when its time or peak memory exceeds the baseline
+    by more than tolerance (relative) and by more than MIN_SECONDS_DELTA /
+    MIN_RSS_DELTA_MB (absolute). Benchmarks missing from the baseline are skipped.
+
+    Parameters:
+    -----------
+    results : list
+        Results as returned by run_suite()
+    baseline : list
+        Results of the baseline run
+    tolerance : float
+        Allowed relative increase
+
+    Returns:
+    --------
+    list : (benchmark, rows, metric, baseline value, current value) per regression
+    """
+
+    stored = {(entry['benchmark'], entry['rows']): entry for entry in baseline}
+    floors = {'seconds': MIN_SECONDS_DELTA, 'warm_seconds': MIN_SECONDS_DELTA, 'peak_rss_mb': MIN_RSS_DELTA_MB}
+    regressions = []
+    for entry in results:
+        before = stored.get((entry['benchmark'], entry['rows']))
+        if before is None:
+            continue
+        for metric, floor in floors.items():
+            if metric not in entry or metric not in before:
+                continue
+            if entry[metric] > before[metric] * (1 + tolerance) and entry[metric] - before[metric] > floor:
+                regressions.append((entry['benchmark'], entry['rows'], metric, before[metric], entry[metric]))
+    return regressions
+
+
+def load_baseline(path=BASELINE_PATH):
+    """Return the stored baseline results, or None if there is none"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)['results']
+
+
+def save_results(results, path=BASELINE_PATH):
+    """Write results, with the machine they were measured on, to JSON"""
+    payload = {'cpu_count': os.cpu_count(), 'python': sys.version.split()[0],
+               'pandas': pd.__version__, 'numpy': np.__version__, 'results': results}
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    sizes = [int(s) for s in args[args.index('--sizes') + 1].split(',')] if '--sizes' in args else SIZES
+    only = args[args.index('--only') + 1].split(',') if '--only' in args else None
+    repeat = int(args[args.index('--repeat') + 1]) if '--repeat' in args else 3
+    baseline_path = args[args.index('--baseline') + 1] if '--baseline' in args else BASELINE_PATH
+
+    print(f"⏱️ AirFly benchmark suite: {', '.join(f'{n:,}' for n in sizes)} rows")
+    print("=" * 78)
+    print(f"   {'benchmark':<28} {'rows':>11} {'time':>10} {'peak RSS':>12}")
+    results = run_suite(sizes, only=only, repeat=repeat)
+
+    if '--output' in args:
+        save_results(results, args[args.index('--output') + 1])
+    if '--save-baseline' in args:
+        save_results(results, baseline_path)
+        print(f"✅ Baseline saved to {baseline_path}")
+        sys.exit(0)
+
+    baseline = load_baseline(baseline_path)
+    if baseline is None:
+        print(f"No baseline at {baseline_path}; run with --save-baseline to create one")
+        sys.exit(0)
+    regressions = find_regressions(results, baseline)
+    for name, n_rows, metric, before, after in regressions:
+        print(f"❌ {name} ({n_rows:,} rows): {metric} {before:g} -> {after:g}")
+    if regressions:
+        sys.exit(1)
+    print("✅ No regressions against the baseline")
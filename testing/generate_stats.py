@@ -1,89 +1,92 @@
-import pandas as pd
-import json
-import numpy as np
-
-# Load data
-print("Loading data...")
-df = pd.read_csv('dataset/final_processed_flights.csv', low_memory=False)
-
-# Calculate comprehensive statistics
-stats = {}
-
-# Basic stats
-stats['total_flights'] = int(len(df))
-stats['avg_delay'] = round(float(df['ARRIVAL_DELAY'].mean()), 2)
-stats['on_time_pct'] = round(float((df['ARRIVAL_DELAY'] <= 15).mean() * 100), 2)
-stats['cancellation_rate'] = round(float(df['CANCELLED'].mean() * 100), 2)
-stats['unique_airlines'] = int(df['AIRLINE'].nunique())
-stats['unique_routes'] = int(df['ROUTE'].nunique())
-stats['avg_dep_delay'] = round(float(df['DEPARTURE_DELAY'].mean()), 2)
-stats['avg_distance'] = round(float(df['DISTANCE'].mean()), 2)
-stats['diverted_pct'] = round(float(df['DIVERTED'].mean() * 100), 2)
-
-# Delay components
-delay_cols = ['AIR_SYSTEM_DELAY', 'SECURITY_DELAY', 'AIRLINE_DELAY', 'LATE_AIRCRAFT_DELAY', 'WEATHER_DELAY']
-stats['delay_components'] = {}
-for col in delay_cols:
-    if col in df.columns:
-        val = df[col].mean()
-        if not pd.isna(val):
-            stats['delay_components'][col] = round(float(val), 2)
-
-# Top airlines by volume
-stats['top_airlines'] = df['AIRLINE'].value_counts().head(10).to_dict()
-
-# Best/worst airlines by delay
-airline_delays = df.groupby('AIRLINE')['ARRIVAL_DELAY'].mean().sort_values()
-stats['best_airline'] = {
-    'code': str(airline_delays.index[0]),
-    'avg_delay': round(float(airline_delays.iloc[0]), 2)
-}
-stats['worst_airline'] = {
-    'code': str(airline_delays.index[-1]),
-    'avg_delay': round(float(airline_delays.iloc[-1]), 2)
-}
-
-# Top routes
-stats['top_routes'] = df['ROUTE'].value_counts().head(10).to_dict()
-
-# Busiest airports
-origin_counts = df['ORIGIN_AIRPORT'].value_counts()
-dest_counts = df['DESTINATION_AIRPORT'].value_counts()
-total_traffic = origin_counts.add(dest_counts, fill_value=0).sort_values(ascending=False)
-stats['busiest_airports'] = total_traffic.head(10).to_dict()
+"""
+Statistics Generator for AirFly Insights
+Computes configuration/analysis_summary.json
+
+All statistics are computed in a single vectorized pass by
+summary_stats.generate_summary(): each key column is factorized once and every
+count, mean and ranking is derived from shared bincounts. Use generate_stats()
+as a library function, or run this file as a script to write the summary and
+print the time spent per statistic. The saved summary is stamped with the
+fingerprints of the flight store (see dataset_manifest.py), and the script
+skips the computation while the store is unchanged unless --force is given.
+
+Author: AirFly Insights Team
+Date: October 17, 2026
+"""
 
-# Temporal patterns
-stats['hourly_delays'] = df.groupby('DEP_HOUR')['ARRIVAL_DELAY'].mean().to_dict()
-stats['best_hour'] = int(df.groupby('DEP_HOUR')['ARRIVAL_DELAY'].mean().idxmin())
-stats['worst_hour'] = int(df.groupby('DEP_HOUR')['ARRIVAL_DELAY'].mean().idxmax())
-
-stats['daily_delays'] = df.groupby('DAY_NAME')['ARRIVAL_DELAY'].mean().to_dict()
-stats['seasonal_delays'] = df.groupby('SEASON')['ARRIVAL_DELAY'].mean().to_dict()
-
-# Monthly stats
-stats['monthly_flights'] = df.groupby('MONTH').size().to_dict()
-
-# Delay categories
-stats['delay_categories'] = df['DELAY_CATEGORY'].value_counts().to_dict()
-
-# Cancellation reasons (if any)
-if 'CANCELLATION_REASON' in df.columns:
-    cancel_df = df[df['CANCELLED'] == 1]
-    if len(cancel_df) > 0:
-        stats['cancellation_reasons'] = cancel_df['CANCELLATION_REASON'].value_counts().to_dict()
-
-# Distance categories
-stats['distance_categories'] = df['DISTANCE_CATEGORY'].value_counts().to_dict()
-
-# Save to JSON
-with open('configuration/analysis_summary.json', 'w') as f:
-    json.dump(stats, f, indent=2)
-
-print("Statistics saved to configuration/analysis_summary.json")
-print("\nKey Stats:")
-print(f"Total Flights: {stats['total_flights']:,}")
-print(f"On-Time %: {stats['on_time_pct']}%")
-print(f"Avg Delay: {stats['avg_delay']} min")
-print(f"Cancellation Rate: {stats['cancellation_rate']}%")
-print(f"Best Airline: {stats['best_airline']['code']} ({stats['best_airline']['avg_delay']} min)")
-print(f"Worst Airline: {stats['worst_airline']['code']} ({stats['worst_airline']['avg_delay']} min)")
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataset_manifest import FLIGHT_INPUTS, artifact_is_current, record_artifact
+from flight_store import list_flight_columns, load_flights
+from summary_stats import SUMMARY_COLUMNS, SUMMARY_PATH, generate_summary, save_summary
+
+
+def generate_stats(df=None, output_path=SUMMARY_PATH, timings=None, force=False):
+    """
+    Compute the analysis summary and optionally write it to JSON
+
+    Parameters:
+    -----------
+    df : DataFrame, optional
+        Processed flights data (loaded from the flight store if None)
+    output_path : str or None
+        Where to write the summary JSON (None to skip writing)
+    timings : dict, optional
+        Filled with seconds spent per step and statistic
+    force : bool
+        Recompute the summary even if the saved one was built from the
+        current flight store (only applies when df is None)
+
+    Returns:
+    --------
+    dict : Summary statistics
+    """
+
+    timings = {} if timings is None else timings
+    from_store = df is None
+    if from_store and output_path and not force and artifact_is_current(output_path):
+        with open(output_path, 'r') as f:
+            return json.load(f)
+    if from_store:
+        start = time.perf_counter()
+        available = list_flight_columns()
+        df = load_flights(columns=[c for c in SUMMARY_COLUMNS if c in available])
+        timings['load'] = time.perf_counter() - start
+
+    stats = generate_summary(df, timings)
+
+    if output_path:
+        start = time.perf_counter()
+        save_summary(stats, output_path)
+        if from_store:
+            record_artifact(output_path, FLIGHT_INPUTS)
+        timings['save'] = time.perf_counter() - start
+    return stats
+
+
+if __name__ == "__main__":
+    print("Loading data...")
+    timings = {}
+    stats = generate_stats(timings=timings, force='--force' in sys.argv)
+
+    if not timings:
+        print(f"{SUMMARY_PATH} is up to date with the flight store, skipping (use --force to recompute)")
+    else:
+        print(f"Statistics saved to {SUMMARY_PATH}")
+    print("\nKey Stats:")
+    print(f"Total Flights: {stats['total_flights']:,}")
+    print(f"On-Time %: {stats['on_time_pct']}%")
+    print(f"Avg Delay: {stats['avg_delay']} min")
+    print(f"Cancellation Rate: {stats['cancellation_rate']}%")
+    print(f"Best Airline: {stats['best_airline']['code']} ({stats['best_airline']['avg_delay']} min)")
+    print(f"Worst Airline: {stats['worst_airline']['code']} ({stats['worst_airline']['avg_delay']} min)")
+
+    if timings:
+        print("\nTimings:")
+        for name, seconds in timings.items():
+            print(f"   {name:<20} {seconds * 1000:9.1f} ms")
+        print(f"   {'total':<20} {sum(timings.values()) * 1000:9.1f} ms")
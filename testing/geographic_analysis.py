@@ -7,11 +7,205 @@ Date: December 18, 2025
 """
 
 import pandas as pd
+import numpy as np
 import folium
+from branca.element import MacroElement
 from folium.plugins import HeatMap, MarkerCluster
+from jinja2 import Template
+import hashlib
 import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 
-def create_airport_delay_map(flights_df, airports_df, output_file='airport_delay_map.html'):
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from airport_index import AirportIndex
+from dataset_manifest import FLIGHT_INPUTS, record_artifact
+from flight_store import load_flights
+from route_codes import encode_routes
+from route_network import LOD_TIERS, ROUTE_ARCS_CACHE, bundle_routes, load_route_arcs
+
+# Markers and lines are drawn as one GeoJSON layer per map. Their style is
+# read from each feature's properties in the browser, and popups are built
+# on click from the same properties instead of being inlined per marker.
+POINT_STYLE_JS = folium.JsCode("""
+function(feature, layer) {
+    var p = feature.properties;
+    layer.setStyle({color: p.color, fillColor: p.color, radius: p.radius});
+}
+""")
+
+LINE_STYLE_JS = folium.JsCode("""
+function(feature, layer) {
+    var p = feature.properties;
+    layer.setStyle({color: p.color, weight: p.weight, opacity: 0.6});
+}
+""")
+
+
+def _feature_collection(geometries, properties):
+    """
+    Build a GeoJSON FeatureCollection from geometries and property columns
+
+    Parameters:
+    -----------
+    geometries : list
+        GeoJSON geometry dicts, one per feature
+    properties : dict
+        Property name -> array-like of per-feature values
+
+    Returns:
+    --------
+    dict : The FeatureCollection
+    """
+
+    names = list(properties)
+    columns = [np.asarray(values).tolist() for values in properties.values()]
+    return {
+        'type': 'FeatureCollection',
+        'features': [
+            {'type': 'Feature', 'id': i, 'geometry': geometry, 'properties': dict(zip(names, values))}
+            for i, (geometry, *values) in enumerate(zip(geometries, *columns))
+        ]
+    }
+
+
+def _points(lats, lons):
+    """Return GeoJSON Point geometries for coordinate arrays"""
+    return [{'type': 'Point', 'coordinates': [lon, lat]}
+            for lat, lon in zip(np.asarray(lats).tolist(), np.asarray(lons).tolist())]
+
+
+def _lines(lats1, lons1, lats2, lons2):
+    """Return straight GeoJSON LineString geometries between coordinate arrays"""
+    return [{'type': 'LineString', 'coordinates': [[lon1, lat1], [lon2, lat2]]}
+            for lat1, lon1, lat2, lon2 in zip(np.asarray(lats1).tolist(), np.asarray(lons1).tolist(),
+                                              np.asarray(lats2).tolist(), np.asarray(lons2).tolist())]
+
+
+def _delay_colors(delays, bins, colors):
+    """Map delay values to colors: colors[i] for bins[i-1] <= delay < bins[i]"""
+    return np.asarray(colors, dtype=object)[np.digitize(np.asarray(delays, dtype=float), bins)]
+
+
+def compute_map_aggregates(flights_df, airports_df):
+    """
+    Compute the inputs of every map in a single pass over the flights
+
+    Flights are grouped once per packed (origin, destination) route key; the
+    airport and departure aggregates are rolled up from the route totals by
+    airport id, and airport coordinates are attached by indexing per-airport
+    arrays (see route_codes.py).
+
+    Parameters:
+    -----------
+    flights_df : DataFrame
+        Processed flights data
+    airports_df : DataFrame
+        Airport data with lat/lon coordinates
+
+    Returns:
+    --------
+    dict : 'airports' (arrival delays by destination airport), 'routes'
+        (every route with traffic, delay and endpoint coordinates) and
+        'departures' (departure counts by origin airport)
+    """
+
+    # Group by packed (origin id, destination id) route keys
+    route_keys, route_table = encode_routes(flights_df['ORIGIN_AIRPORT'], flights_df['DESTINATION_AIRPORT'])
+    keys, groups = route_table.group(route_keys)
+    valid = groups >= 0
+    groups = groups[valid]
+    arrival = flights_df['ARRIVAL_DELAY'].to_numpy(dtype='float64', na_value=np.nan)[valid]
+    arr_valid = ~np.isnan(arrival)
+    routes = pd.DataFrame({
+        'ROUTE': route_table.labels(keys),
+        'ORIGIN': route_table.origins(keys).astype(str),
+        'DEST': route_table.destinations(keys).astype(str),
+        'flights': np.bincount(groups, minlength=len(keys)),
+        'arr_n': np.bincount(groups, weights=arr_valid, minlength=len(keys)).astype('int64'),
+        'arr_sum': np.bincount(groups, weights=np.where(arr_valid, arrival, 0.0), minlength=len(keys)),
+    })
+    routes['avg_delay'] = routes['arr_sum'] / routes['arr_n'].where(routes['arr_n'] > 0)
+    routes['flight_count'] = routes['arr_n']
+
+    # Endpoint coordinates by airport id (missing coordinates stay NaN)
+    lats, lons = route_table.coordinates(airports_df)
+    origin_ids, dest_ids = route_table.origin_ids(keys), route_table.dest_ids(keys)
+    routes['ORIGIN_LAT'], routes['ORIGIN_LON'] = lats[origin_ids], lons[origin_ids]
+    routes['DEST_LAT'], routes['DEST_LON'] = lats[dest_ids], lons[dest_ids]
+
+    # Average arrival delay by destination airport
+    n_airports = len(route_table)
+    dest_flights = np.bincount(dest_ids, weights=routes['flights'], minlength=n_airports)
+    dest_n = np.bincount(dest_ids, weights=routes['arr_n'], minlength=n_airports)
+    dest_sum = np.bincount(dest_ids, weights=routes['arr_sum'], minlength=n_airports)
+    present = np.flatnonzero(dest_flights > 0)
+    airport_data = pd.DataFrame({
+        'IATA_CODE': route_table.airports[present].astype(str),
+        'avg_delay': dest_sum[present] / np.where(dest_n[present] > 0, dest_n[present], np.nan),
+        'flight_count': dest_n[present].astype('int64'),
+    }).merge(
+        airports_df[['IATA_CODE', 'LATITUDE', 'LONGITUDE', 'AIRPORT', 'CITY']],
+        on='IATA_CODE',
+        how='inner'
+    ).dropna(subset=['LATITUDE', 'LONGITUDE'])
+
+    # Departures by origin airport
+    origin_flights = np.bincount(origin_ids, weights=routes['flights'], minlength=n_airports)
+    present = np.flatnonzero(origin_flights > 0)
+    departures = pd.DataFrame({
+        'ORIGIN': route_table.airports[present].astype(str),
+        'count': origin_flights[present].astype('int64'),
+        'IATA_CODE': route_table.airports[present].astype(str),
+        'LATITUDE': lats[present],
+        'LONGITUDE': lons[present],
+    }).dropna(subset=['LATITUDE', 'LONGITUDE'])
+
+    return {
+        'airports': airport_data.reset_index(drop=True),
+        'routes': routes,
+        'departures': departures.reset_index(drop=True),
+    }
+
+
+def flights_near(flights_df, airports_df, lat, lon, radius_miles, column='ORIGIN_AIRPORT',
+                 index=None):
+    """
+    Select flights whose airport lies within a radius of a point
+    
+    Parameters:
+    -----------
+    flights_df : DataFrame
+        Processed flights data
+    airports_df : DataFrame
+        Airport data with coordinates
+    lat, lon : float
+        Center point in degrees (e.g. a weather cell)
+    radius_miles : float
+        Search radius in miles
+    column : str
+        Airport column to match: ORIGIN_AIRPORT (departures) or
+        DESTINATION_AIRPORT (arrivals)
+    index : AirportIndex, optional
+        Prebuilt index over airports_df
+    
+    Returns:
+    --------
+    DataFrame : The matching flights with a DISTANCE_FROM_POINT column (miles)
+    """
+    
+    index = AirportIndex(airports_df) if index is None else index
+    nearby = index.within(lat, lon, radius_miles).set_index('IATA_CODE')['DISTANCE_MILES']
+    selected = flights_df[flights_df[column].isin(nearby.index)]
+    return selected.assign(
+        DISTANCE_FROM_POINT=nearby.reindex(selected[column].astype(str)).to_numpy()
+    )
+
+
+
+def create_airport_delay_map(flights_df, airports_df, output_file='airport_delay_map.html',
+                             aggregates=None):
     """
     Create an interactive map showing airports colored by average delay
     
@@ -23,61 +217,50 @@ def create_airport_delay_map(flights_df, airports_df, output_file='airport_delay
         Airport data with lat/lon coordinates
     output_file : str
         Output HTML file path
+    aggregates : dict, optional
+        Precomputed inputs from compute_map_aggregates() (flights_df is
+        not read when given)
     
     Returns:
     --------
     folium.Map : The created map object
     """
     
-    # Calculate average delay by airport (destination)
-    airport_delays = flights_df.groupby('DESTINATION_AIRPORT').agg({
-        'ARRIVAL_DELAY': ['mean', 'count']
-    }).reset_index()
-    airport_delays.columns = ['IATA_CODE', 'avg_delay', 'flight_count']
-    
-    # Merge with airport coordinates
-    airport_data = airport_delays.merge(
-        airports_df[['IATA_CODE', 'LATITUDE', 'LONGITUDE', 'AIRPORT', 'CITY']], 
-        on='IATA_CODE', 
-        how='inner'
-    )
-    
-    # Remove rows with missing coordinates
-    airport_data = airport_data.dropna(subset=['LATITUDE', 'LONGITUDE'])
+    if aggregates is None:
+        aggregates = compute_map_aggregates(flights_df, airports_df)
+    airport_data = aggregates['airports']
     
     # Create base map centered on US
     m = folium.Map(location=[39.8283, -98.5795], zoom_start=4, 
                    tiles='OpenStreetMap')
     
-    # Define color scheme based on delay
-    def get_color(delay):
-        if delay < 0:
-            return 'green'  # Early
-        elif delay < 10:
-            return 'lightgreen'  # Minimal delay
-        elif delay < 20:
-            return 'orange'  # Moderate delay
-        else:
-            return 'red'  # Significant delay
-    
-    # Add markers for each airport
-    for idx, row in airport_data.iterrows():
-        folium.CircleMarker(
-            location=[row['LATITUDE'], row['LONGITUDE']],
-            radius=min(row['flight_count'] / 500, 15),  # Size by traffic
-            popup=f"""
-                <b>{row['AIRPORT']}</b><br>
-                {row['CITY']}<br>
-                Code: {row['IATA_CODE']}<br>
-                Avg Delay: {row['avg_delay']:.1f} min<br>
-                Flights: {row['flight_count']:,}
-            """,
-            color=get_color(row['avg_delay']),
-            fill=True,
-            fillColor=get_color(row['avg_delay']),
-            fillOpacity=0.7,
-            weight=2
-        ).add_to(m)
+    # Color by delay: early, minimal (0-10), moderate (10-20), significant (> 20)
+    colors = _delay_colors(airport_data['avg_delay'], [0, 10, 20],
+                           ['green', 'lightgreen', 'orange', 'red'])
+
+    # Add all airports as one GeoJSON layer, sized by traffic
+    airports_geojson = _feature_collection(
+        _points(airport_data['LATITUDE'], airport_data['LONGITUDE']),
+        {
+            'AIRPORT': airport_data['AIRPORT'],
+            'CITY': airport_data['CITY'],
+            'IATA_CODE': airport_data['IATA_CODE'],
+            'avg_delay': airport_data['avg_delay'].round(1),
+            'flight_count': airport_data['flight_count'],
+            'color': colors,
+            'radius': np.minimum(airport_data['flight_count'] / 500, 15).round(2),
+        }
+    )
+    folium.GeoJson(
+        airports_geojson,
+        name='Airports',
+        marker=folium.CircleMarker(radius=5, fill=True, fill_opacity=0.7, weight=2),
+        on_each_feature=POINT_STYLE_JS,
+        popup=folium.GeoJsonPopup(
+            fields=['AIRPORT', 'CITY', 'IATA_CODE', 'avg_delay', 'flight_count'],
+            aliases=['Airport', 'City', 'Code', 'Avg Delay (min)', 'Flights']
+        )
+    ).add_to(m)
     
     # Add legend
     legend_html = '''
@@ -102,7 +285,8 @@ def create_airport_delay_map(flights_df, airports_df, output_file='airport_delay
     return m
 
 
-def create_route_flow_map(flights_df, airports_df, top_n=50, output_file='route_flow_map.html'):
+def create_route_flow_map(flights_df, airports_df, top_n=50, output_file='route_flow_map.html',
+                          aggregates=None):
     """
     Create an interactive map showing top flight routes with lines
     
@@ -116,39 +300,20 @@ def create_route_flow_map(flights_df, airports_df, top_n=50, output_file='route_
         Number of top routes to display
     output_file : str
         Output HTML file path
+    aggregates : dict, optional
+        Precomputed inputs from compute_map_aggregates() (flights_df is
+        not read when given)
     
     Returns:
     --------
     folium.Map : The created map object
     """
     
+    if aggregates is None:
+        aggregates = compute_map_aggregates(flights_df, airports_df)
+    
     # Get top routes by volume
-    top_routes = flights_df['ROUTE'].value_counts().head(top_n).index.tolist()
-    route_data = flights_df[flights_df['ROUTE'].isin(top_routes)].copy()
-    
-    # Calculate route statistics
-    route_stats = route_data.groupby('ROUTE').agg({
-        'ARRIVAL_DELAY': ['mean', 'count']
-    }).reset_index()
-    route_stats.columns = ['ROUTE', 'avg_delay', 'flight_count']
-    
-    # Split route into origin and destination
-    route_stats[['ORIGIN', 'DEST']] = route_stats['ROUTE'].str.split('-', expand=True)
-    
-    # Merge with airport coordinates
-    route_stats = route_stats.merge(
-        airports_df[['IATA_CODE', 'LATITUDE', 'LONGITUDE']], 
-        left_on='ORIGIN', 
-        right_on='IATA_CODE',
-        how='left'
-    ).rename(columns={'LATITUDE': 'ORIGIN_LAT', 'LONGITUDE': 'ORIGIN_LON'})
-    
-    route_stats = route_stats.merge(
-        airports_df[['IATA_CODE', 'LATITUDE', 'LONGITUDE']], 
-        left_on='DEST', 
-        right_on='IATA_CODE',
-        how='left'
-    ).rename(columns={'LATITUDE': 'DEST_LAT', 'LONGITUDE': 'DEST_LON'})
+    route_stats = aggregates['routes'].sort_values('flights', ascending=False, kind='stable').head(top_n)
     
     # Remove rows with missing coordinates
     route_stats = route_stats.dropna(subset=['ORIGIN_LAT', 'ORIGIN_LON', 'DEST_LAT', 'DEST_LON'])
@@ -156,33 +321,28 @@ def create_route_flow_map(flights_df, airports_df, top_n=50, output_file='route_
     # Create base map
     m = folium.Map(location=[39.8283, -98.5795], zoom_start=4)
     
-    # Add route lines
-    for idx, row in route_stats.iterrows():
-        # Determine line color based on delay
-        if row['avg_delay'] < 5:
-            color = 'green'
-        elif row['avg_delay'] < 15:
-            color = 'orange'
-        else:
-            color = 'red'
-        
-        # Line thickness based on traffic
-        weight = min(row['flight_count'] / 200, 8)
-        
-        folium.PolyLine(
-            locations=[
-                [row['ORIGIN_LAT'], row['ORIGIN_LON']],
-                [row['DEST_LAT'], row['DEST_LON']]
-            ],
-            color=color,
-            weight=weight,
-            opacity=0.6,
-            popup=f"""
-                <b>Route: {row['ROUTE']}</b><br>
-                Flights: {row['flight_count']:,}<br>
-                Avg Delay: {row['avg_delay']:.1f} min
-            """
-        ).add_to(m)
+    # Add all route lines as one GeoJSON layer, colored by delay and
+    # weighted by traffic
+    routes_geojson = _feature_collection(
+        _lines(route_stats['ORIGIN_LAT'], route_stats['ORIGIN_LON'],
+               route_stats['DEST_LAT'], route_stats['DEST_LON']),
+        {
+            'ROUTE': route_stats['ROUTE'].astype(str),
+            'flight_count': route_stats['flight_count'],
+            'avg_delay': route_stats['avg_delay'].round(1),
+            'color': _delay_colors(route_stats['avg_delay'], [5, 15], ['green', 'orange', 'red']),
+            'weight': np.minimum(route_stats['flight_count'] / 200, 8).round(2),
+        }
+    )
+    folium.GeoJson(
+        routes_geojson,
+        name='Routes',
+        on_each_feature=LINE_STYLE_JS,
+        popup=folium.GeoJsonPopup(
+            fields=['ROUTE', 'flight_count', 'avg_delay'],
+            aliases=['Route', 'Flights', 'Avg Delay (min)']
+        )
+    ).add_to(m)
     
     # Add airport markers
     unique_airports = pd.concat([
@@ -194,16 +354,14 @@ def create_route_flow_map(flights_df, airports_df, top_n=50, output_file='route_
         )
     ]).drop_duplicates()
     
-    for idx, row in unique_airports.iterrows():
-        folium.CircleMarker(
-            location=[row['LAT'], row['LON']],
-            radius=5,
-            color='blue',
-            fill=True,
-            fillColor='blue',
-            fillOpacity=0.8,
-            popup=f"<b>{row['CODE']}</b>"
-        ).add_to(m)
+    folium.GeoJson(
+        _feature_collection(_points(unique_airports['LAT'], unique_airports['LON']),
+                            {'CODE': unique_airports['CODE']}),
+        name='Airports',
+        marker=folium.CircleMarker(radius=5, color='blue', fill=True, fill_color='blue',
+                                   fill_opacity=0.8),
+        popup=folium.GeoJsonPopup(fields=['CODE'], labels=False)
+    ).add_to(m)
     
     # Add legend
     legend_html = '''
@@ -227,7 +385,139 @@ def create_route_flow_map(flights_df, airports_df, top_n=50, output_file='route_
     return m
 
 
-def create_traffic_heatmap(flights_df, airports_df, output_file='traffic_heatmap.html'):
+class ZoomLevelOfDetail(MacroElement):
+    """
+    Show each layer only from its minimum zoom level upwards
+
+    Parameters:
+    -----------
+    layers : list
+        (layer, min_zoom) pairs, already added to the map
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var tiers = [
+                {%- for layer, zoom in this.layers %}
+                [{{ layer.get_name() }}, {{ zoom }}],
+                {%- endfor %}
+            ];
+            function update() {
+                var zoom = map.getZoom();
+                tiers.forEach(function(tier) {
+                    if (zoom >= tier[1]) {
+                        if (!map.hasLayer(tier[0])) { map.addLayer(tier[0]); }
+                    } else if (map.hasLayer(tier[0])) {
+                        map.removeLayer(tier[0]);
+                    }
+                });
+            }
+            map.on('zoomend', update);
+            update();
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, layers):
+        super().__init__()
+        self._name = 'ZoomLevelOfDetail'
+        self.layers = layers
+
+
+def create_route_network_map(flights_df, airports_df, output_file='route_network_map.html',
+                             aggregates=None, arcs_cache=ROUTE_ARCS_CACHE):
+    """
+    Create an interactive map of the full route network with great-circle arcs
+    
+    Both directions of a route share one arc. Arcs are grouped into
+    level-of-detail tiers by traffic: the busiest routes are always shown,
+    quieter ones appear as the map is zoomed in.
+    
+    Parameters:
+    -----------
+    flights_df : DataFrame
+        Processed flights data
+    airports_df : DataFrame
+        Airport data with coordinates
+    output_file : str
+        Output HTML file path
+    aggregates : dict, optional
+        Precomputed inputs from compute_map_aggregates() (flights_df is
+        not read when given)
+    arcs_cache : str or None
+        Cache file for the arc geometry (None to always recompute)
+    
+    Returns:
+    --------
+    folium.Map : The created map object
+    """
+    
+    if aggregates is None:
+        aggregates = compute_map_aggregates(flights_df, airports_df)
+    routes = aggregates['routes']
+    
+    pairs = bundle_routes(routes['ORIGIN'], routes['DEST'], routes['flights'],
+                          routes['arr_n'], routes['arr_sum'], airports_df)
+    arcs = load_route_arcs(pairs, arcs_cache)
+    
+    # Canvas rendering keeps thousands of lines responsive
+    m = folium.Map(location=[39.8283, -98.5795], zoom_start=4, prefer_canvas=True)
+    
+    layers = []
+    for tier, (_, min_zoom) in enumerate(LOD_TIERS):
+        tier_pairs = pairs[pairs['TIER'] == tier]
+        if tier_pairs.empty:
+            continue
+        layer = folium.GeoJson(
+            _feature_collection(
+                arcs.geojson_lines(tier_pairs['PAIR']),
+                {
+                    'PAIR': tier_pairs['PAIR'],
+                    'flights': tier_pairs['flights'].astype('int64'),
+                    'avg_delay': tier_pairs['avg_delay'].round(1),
+                    'color': _delay_colors(tier_pairs['avg_delay'], [5, 15], ['green', 'orange', 'red']),
+                    'weight': np.clip(np.sqrt(tier_pairs['flights']) / 20, 0.5, 6).round(2),
+                }
+            ),
+            name=f'Routes (zoom {min_zoom}+)',
+            on_each_feature=LINE_STYLE_JS,
+            popup=folium.GeoJsonPopup(
+                fields=['PAIR', 'flights', 'avg_delay'],
+                aliases=['Route (both directions)', 'Flights', 'Avg Delay (min)']
+            )
+        )
+        layer.add_to(m)
+        layers.append((layer, min_zoom))
+    
+    m.add_child(ZoomLevelOfDetail(layers))
+    folium.LayerControl().add_to(m)
+    
+    # Add legend
+    legend_html = '''
+    <div style="position: fixed; 
+                bottom: 50px; left: 50px; width: 220px; height: 140px; 
+                background-color: white; border:2px solid grey; z-index:9999; 
+                font-size:14px; padding: 10px">
+    <p style="margin-bottom: 5px;"><b>Route Network</b></p>
+    <p><span style="color: green;">━━</span> Good (< 5 min delay)</p>
+    <p><span style="color: orange;">━━</span> Fair (5-15 min)</p>
+    <p><span style="color: red;">━━</span> Poor (> 15 min)</p>
+    <p style="font-size: 11px; margin-top: 10px;">Zoom in to show quieter routes</p>
+    </div>
+    '''
+    m.get_root().html.add_child(folium.Element(legend_html))
+    
+    # Save map
+    m.save(output_file)
+    print(f"Route network map saved to {output_file} ({len(pairs):,} airport pairs)")
+    
+    return m
+
+
+def create_traffic_heatmap(flights_df, airports_df, output_file='traffic_heatmap.html',
+                           aggregates=None):
     """
     Create a heatmap showing flight traffic density
     
@@ -239,28 +529,21 @@ def create_traffic_heatmap(flights_df, airports_df, output_file='traffic_heatmap
         Airport data with coordinates
     output_file : str
         Output HTML file path
+    aggregates : dict, optional
+        Precomputed inputs from compute_map_aggregates() (flights_df is
+        not read when given)
     
     Returns:
     --------
     folium.Map : The created map object
     """
     
-    # Count departures by airport
-    departures = flights_df.groupby('ORIGIN_AIRPORT').size().reset_index(name='count')
-    departures = departures.merge(
-        airports_df[['IATA_CODE', 'LATITUDE', 'LONGITUDE']], 
-        left_on='ORIGIN_AIRPORT', 
-        right_on='IATA_CODE',
-        how='left'
-    )
-    # Remove airports without coordinates
-    departures = departures.dropna(subset=['LATITUDE', 'LONGITUDE'])
+    if aggregates is None:
+        aggregates = compute_map_aggregates(flights_df, airports_df)
+    departures = aggregates['departures']
     
     # Prepare data for heatmap (lat, lon, weight)
-    heat_data = [
-        [row['LATITUDE'], row['LONGITUDE'], row['count']] 
-        for idx, row in departures.iterrows()
-    ]
+    heat_data = departures[['LATITUDE', 'LONGITUDE', 'count']].to_numpy(dtype=float).tolist()
     
     # Create base map
     m = folium.Map(location=[39.8283, -98.5795], zoom_start=4)
@@ -282,10 +565,46 @@ def create_traffic_heatmap(flights_df, airports_df, output_file='traffic_heatmap
     return m
 
 
-def create_all_maps(flights_df, airports_df, output_dir='maps/'):
+# Bump when the rendering code changes so existing maps are rebuilt
+MAP_RENDER_VERSION = 2
+
+MAP_MANIFEST = '_build_manifest.json'
+
+# Map file -> (render function name, aggregate it reads, extra parameters)
+MAP_SPECS = {
+    'airport_delay_map.html': ('create_airport_delay_map', 'airports', {}),
+    'route_flow_map.html': ('create_route_flow_map', 'routes', {'top_n': 50}),
+    'route_network_map.html': ('create_route_network_map', 'routes', {}),
+    'traffic_heatmap.html': ('create_traffic_heatmap', 'departures', {}),
+}
+
+
+def map_fingerprint(aggregate, params):
+    """Return a hash of a map's input aggregate, parameters and renderer version"""
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(aggregate, index=False).to_numpy().tobytes())
+    digest.update(json.dumps([list(aggregate.columns), params, MAP_RENDER_VERSION],
+                             sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _render_map(task):
+    """Worker: render one map from its precomputed aggregate"""
+    func_name, key, aggregate, airports_df, params, output_file = task
+    globals()[func_name](None, airports_df, output_file=output_file, aggregates={key: aggregate}, **params)
+    return output_file
+
+
+def create_all_maps(flights_df, airports_df, output_dir='maps/', workers=None, force=False,
+                    arcs_cache=ROUTE_ARCS_CACHE):
     """
     Generate all geographic visualizations
     
+    The map inputs are aggregated once and shared by every map. Maps whose
+    input fingerprint and parameters match the last build recorded in
+    output_dir are skipped; the rest are rendered concurrently in a
+    process pool.
+    
     Parameters:
     -----------
     flights_df : DataFrame
@@ -294,37 +613,77 @@ def create_all_maps(flights_df, airports_df, output_dir='maps/'):
         Airport data with coordinates
     output_dir : str
         Output directory for map files
+    workers : int, optional
+        Number of worker processes (1 renders in this process)
+    force : bool
+        Rebuild every map even if its inputs are unchanged
+    arcs_cache : str or None
+        Cache file for the route network's arc geometry
+    
+    Returns:
+    --------
+    dict : Map file -> 'built' or 'skipped'
     """
     
-    import os
     os.makedirs(output_dir, exist_ok=True)
     
     print("Generating geographic visualizations...")
     print("-" * 50)
     
-    # Generate all maps
-    create_airport_delay_map(flights_df, airports_df, 
-                            output_file=f'{output_dir}airport_delay_map.html')
-    
-    create_route_flow_map(flights_df, airports_df, 
-                         top_n=50,
-                         output_file=f'{output_dir}route_flow_map.html')
-    
-    create_traffic_heatmap(flights_df, airports_df, 
-                          output_file=f'{output_dir}traffic_heatmap.html')
+    aggregates = compute_map_aggregates(flights_df, airports_df)
+    
+    manifest_path = os.path.join(output_dir, MAP_MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+    
+    status = {}
+    tasks = []
+    fingerprints = {}
+    for file_name, (func_name, key, params) in MAP_SPECS.items():
+        output_file = os.path.join(output_dir, file_name)
+        fingerprints[file_name] = map_fingerprint(aggregates[key], params)
+        if not force and os.path.exists(output_file) and manifest.get(file_name) == fingerprints[file_name]:
+            print(f"{file_name} is up to date, skipping")
+            status[file_name] = 'skipped'
+            continue
+        if func_name == 'create_route_network_map':
+            params = {**params, 'arcs_cache': arcs_cache}
+        tasks.append((func_name, key, aggregates[key], airports_df, params, output_file))
+    
+    # Render the outdated maps
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            _render_map(task)
+    elif tasks:
+        with ProcessPoolExecutor(max_workers=workers or min(len(tasks), os.cpu_count())) as pool:
+            list(pool.map(_render_map, tasks))
+    
+    for func_name, key, aggregate, airports_df, params, output_file in tasks:
+        file_name = os.path.basename(output_file)
+        manifest[file_name] = fingerprints[file_name]
+        status[file_name] = 'built'
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
     
     print("-" * 50)
     print("All maps generated successfully!")
     print(f"Maps saved to: {output_dir}")
+    return status
 
 
 if __name__ == "__main__":
     # Example usage
+    map_inputs = FLIGHT_INPUTS + ['dataset/airports.csv']
+    force = '--force' in sys.argv
+    
     print("Loading data...")
-    flights_df = pd.read_csv('dataset/final_processed_flights.csv', low_memory=False)
+    flights_df = load_flights(columns=['ORIGIN_AIRPORT', 'DESTINATION_AIRPORT', 'ARRIVAL_DELAY'])
     airports_df = pd.read_csv('dataset/airports.csv')
     
-    # Generate all maps
-    create_all_maps(flights_df, airports_df)
+    # Generate all maps (unchanged maps are skipped unless --force is given)
+    create_all_maps(flights_df, airports_df, force=force)
+    record_artifact('maps', map_inputs)
     
     print("\nTo view maps, open the HTML files in a web browser.")
@@ -11,8 +11,14 @@ import pandas as pd
 import numpy as np
 import json
 import os
+import sys
+import threading
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from flight_store import load_flights
+
 # Test configuration
 TEST_DATA_DIR = 'dataset/'
 EXPECTED_FILES = [
@@ -22,6 +28,73 @@ EXPECTED_FILES = [
 ]
 
 
+def make_sample_flights(n=5000, seed=42):
+    """Build a small processed-flights frame with the real column layout"""
+    rng = np.random.default_rng(seed)
+    airports = ['ATL', 'ORD', 'DFW', 'LAX', 'SFO', 'JFK']
+    origin = rng.choice(airports, n)
+    dest = rng.choice(airports, n)
+    month = rng.integers(1, 13, n)
+    arrival_delay = rng.normal(5, 30, n).round()
+    arrival_delay[rng.random(n) < 0.02] = np.nan
+    season_map = {1: 'Winter', 2: 'Winter', 3: 'Spring', 4: 'Spring', 5: 'Spring',
+                  6: 'Summer', 7: 'Summer', 8: 'Summer', 9: 'Fall', 10: 'Fall', 11: 'Fall', 12: 'Winter'}
+    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    return pd.DataFrame({
+        'YEAR': 2015,
+        'MONTH': month,
+        'DAY_OF_WEEK': rng.integers(0, 7, n),
+        'AIRLINE': rng.choice(['AA', 'DL', 'WN', 'UA', 'AS'], n),
+        'ORIGIN_AIRPORT': origin,
+        'DESTINATION_AIRPORT': dest,
+        'DEPARTURE_DELAY': rng.normal(9, 30, n).round(),
+        'DISTANCE': rng.integers(100, 2500, n),
+        'ARRIVAL_DELAY': arrival_delay,
+        'DIVERTED': (rng.random(n) < 0.003).astype(int),
+        'CANCELLED': (rng.random(n) < 0.015).astype(int),
+        'DAY_NAME': rng.choice(days, n),
+        'DEP_HOUR': rng.integers(0, 24, n),
+        'ROUTE': pd.Series(origin) + '-' + pd.Series(dest),
+        'DELAY_CATEGORY': pd.cut(arrival_delay, bins=[-np.inf, -15, 15, 60, np.inf],
+                                 labels=['Early', 'On Time', 'Minor Delay', 'Major Delay']).astype(str),
+        'SEASON': pd.Series(month).map(season_map),
+    })
+
+
+def make_raw_flights(n=3000, seed=7):
+    """Build a small raw flights.csv frame with the original column layout"""
+    rng = np.random.default_rng(seed)
+    airports = ['ATL', 'ORD', 'DFW', 'LAX', 'SFO', '10397']
+    cancelled = (rng.random(n) < 0.02).astype(int)
+    arrival_delay = rng.normal(5, 30, n).round()
+    arrival_delay[cancelled == 1] = np.nan
+    # Delay causes are only reported for the second half of the file, so some
+    # chunks see these columns entirely empty
+    cause = np.where(np.arange(n) >= n // 2, rng.integers(0, 60, n), np.nan)
+    return pd.DataFrame({
+        'YEAR': 2015,
+        'MONTH': np.sort(rng.integers(1, 13, n)),
+        'DAY': rng.integers(1, 29, n),
+        'DAY_OF_WEEK': rng.integers(1, 8, n),
+        'AIRLINE': rng.choice(['AA', 'DL', 'WN'], n),
+        'FLIGHT_NUMBER': rng.integers(1, 5000, n),
+        'ORIGIN_AIRPORT': rng.choice(airports, n),
+        'DESTINATION_AIRPORT': rng.choice(airports, n),
+        'SCHEDULED_DEPARTURE': rng.integers(0, 24, n) * 100 + rng.integers(0, 60, n),
+        'DEPARTURE_DELAY': np.where(cancelled == 1, np.nan, rng.normal(9, 30, n).round()),
+        'DISTANCE': rng.integers(100, 2500, n),
+        'ARRIVAL_DELAY': arrival_delay,
+        'DIVERTED': 0,
+        'CANCELLED': cancelled,
+        'CANCELLATION_REASON': np.where(cancelled == 1, rng.choice(['A', 'B', 'C'], n), None),
+        'AIR_SYSTEM_DELAY': cause,
+        'SECURITY_DELAY': cause,
+        'AIRLINE_DELAY': cause,
+        'LATE_AIRCRAFT_DELAY': cause,
+        'WEATHER_DELAY': cause,
+    })
+
+
 class TestDataLoading:
     """Tests for data loading functionality"""
     
@@ -33,7 +106,7 @@ class TestDataLoading:
     
     def test_flights_data_loads(self):
         """Test that flights data loads correctly"""
-        df = pd.read_csv(f'{TEST_DATA_DIR}final_processed_flights.csv', low_memory=False)
+        df = load_flights()
         assert len(df) > 0, "Flights dataset is empty"
         assert df.shape[1] > 10, "Insufficient columns in flights data"
     
@@ -68,7 +141,7 @@ class TestDataQuality:
     @pytest.fixture
     def flights_df(self):
         """Load flights data for testing"""
-        return pd.read_csv(f'{TEST_DATA_DIR}final_processed_flights.csv', low_memory=False)
+        return load_flights()
     
     def test_required_columns_exist(self, flights_df):
         """Verify all required columns are present"""
@@ -132,7 +205,7 @@ class TestFeatureEngineering:
     
     @pytest.fixture
     def flights_df(self):
-        return pd.read_csv(f'{TEST_DATA_DIR}final_processed_flights.csv', low_memory=False)
+        return load_flights()
     
     def test_route_feature_exists(self, flights_df):
         """Verify ROUTE feature was created"""
@@ -195,7 +268,7 @@ class TestDataConsistency:
     
     @pytest.fixture
     def flights_df(self):
-        return pd.read_csv(f'{TEST_DATA_DIR}final_processed_flights.csv', low_memory=False)
+        return load_flights()
     
     @pytest.fixture
     def airports_df(self):
@@ -272,17 +345,22 @@ class TestMemoryOptimization:
     
     @pytest.fixture
     def flights_df(self):
-        return pd.read_csv(f'{TEST_DATA_DIR}final_processed_flights.csv', low_memory=False)
+        return load_flights()
     
-    def test_memory_usage_reasonable(self, flights_df):
+    def test_memory_usage_reasonable(self, tmp_path):
         """Check that memory usage is optimized"""
-        memory_mb = flights_df.memory_usage(deep=True).sum() / (1024**2)
+        from synthetic_flights import write_synthetic_flights
+
+        # Measured on a store with the full processed layout (all 40 columns)
+        parquet_path = str(tmp_path / 'flights.parquet')
+        write_synthetic_flights(parquet_path, 50_000)
+        flights_df = load_flights(parquet_path=parquet_path, mmap_path=None)
         rows = len(flights_df)
         
-        # Memory should be reasonable per row
-        memory_per_row = (memory_mb * 1024) / rows  # KB per row
-        assert memory_per_row < 5, \
-            f"Memory usage too high: {memory_per_row:.2f} KB/row"
+        # The compact layout takes about 91 bytes/row (over 300 as stored)
+        memory_per_row = flights_df.memory_usage(deep=True).sum() / rows
+        assert memory_per_row < 100, \
+            f"Memory usage too high: {memory_per_row:.1f} bytes/row"
     
     def test_categorical_dtype_used(self, flights_df):
         """Verify categorical dtypes are used where appropriate"""
@@ -306,6 +384,1399 @@ class TestMemoryOptimization:
             "No categorical optimization detected"
 
 
+class TestFlightStore:
+    """Tests for the typed Parquet flight store"""
+
+    @pytest.fixture
+    def sample_csv(self, tmp_path):
+        path = tmp_path / 'flights.csv'
+        make_sample_flights().to_csv(path, index=False)
+        return path
+
+    def test_parquet_roundtrip_schema(self, sample_csv, tmp_path):
+        """Converted data should load back with the fixed schema"""
+        pytest.importorskip('pyarrow')
+        from flight_store import convert_csv_to_parquet
+
+        parquet_path = tmp_path / 'flights.parquet'
+        rows = convert_csv_to_parquet(str(sample_csv), str(parquet_path), chunksize=1000)
+        df = load_flights(parquet_path=str(parquet_path), csv_path=str(sample_csv))
+
+        assert rows == len(df) == 5000
+        assert list(df.columns) == list(pd.read_csv(sample_csv, nrows=1).columns)
+        for col in ['AIRLINE', 'ORIGIN_AIRPORT', 'DESTINATION_AIRPORT', 'ROUTE', 'DAY_NAME']:
+            assert isinstance(df[col].dtype, pd.CategoricalDtype)
+        assert df['MONTH'].dtype == np.int8
+        assert df['DEP_HOUR'].dtype == np.int8
+        assert df['ARRIVAL_DELAY'].dtype == np.float32
+
+    def test_projection_and_month_pruning(self, sample_csv, tmp_path):
+        """Column and month selection should match the CSV fallback"""
+        pytest.importorskip('pyarrow')
+        from flight_store import convert_csv_to_parquet
+
+        parquet_path = tmp_path / 'flights.parquet'
+        convert_csv_to_parquet(str(sample_csv), str(parquet_path), chunksize=1000)
+        cols = ['AIRLINE', 'MONTH', 'ARRIVAL_DELAY']
+        from_parquet = load_flights(columns=cols, months=[1, 2], parquet_path=str(parquet_path))
+        from_csv = load_flights(columns=cols, months=[1, 2], parquet_path=str(tmp_path / 'missing'),
+                                csv_path=str(sample_csv))
+
+        assert list(from_parquet.columns) == cols
+        assert len(from_parquet) == len(from_csv)
+        assert from_parquet['ARRIVAL_DELAY'].sum() == pytest.approx(from_csv['ARRIVAL_DELAY'].sum(), rel=1e-5)
+
+    def test_month_filter_matches_across_backends(self, sample_csv, tmp_path):
+        """A months filter without MONTH among the columns returns the same rows from every store"""
+        pytest.importorskip('pyarrow')
+        from flight_store import convert_csv_to_parquet, export_memory_mapped
+
+        missing = str(tmp_path / 'missing')
+        parquet_path, mmap_path = str(tmp_path / 'flights.parquet'), str(tmp_path / 'flights.mmap')
+        convert_csv_to_parquet(str(sample_csv), parquet_path, chunksize=1000)
+        export_memory_mapped(mmap_path, parquet_path=missing, csv_path=str(sample_csv))
+
+        stores = {'csv': dict(parquet_path=missing, csv_path=str(sample_csv), mmap_path=None),
+                  'parquet': dict(parquet_path=parquet_path, mmap_path=None),
+                  'mmap': dict(mmap_path=mmap_path)}
+        loaded = {name: load_flights(columns=['AIRLINE', 'ARRIVAL_DELAY'], months=[3], **kwargs)
+                  for name, kwargs in stores.items()}
+        expected = pd.read_csv(sample_csv).query('MONTH == 3')
+        for name, df in loaded.items():
+            assert list(df.columns) == ['AIRLINE', 'ARRIVAL_DELAY'], name
+            assert len(df) == len(expected), name
+            assert sorted(df['AIRLINE'].astype(str)) == sorted(expected['AIRLINE']), name
+
+    def test_compact_layout_is_lossless(self, sample_csv, tmp_path):
+        """Loaded columns are narrowed without changing any value"""
+        from flight_store import compact_flights
+
+        missing = str(tmp_path / 'missing')
+        memory = {}
+        df = load_flights(parquet_path=missing, csv_path=str(sample_csv), mmap_path=None, memory=memory)
+        stored = load_flights(parquet_path=missing, csv_path=str(sample_csv), mmap_path=None, compact=False)
+
+        assert df['CANCELLED'].dtype == bool and df['DISTANCE'].dtype == np.int16
+        assert isinstance(df['SEASON'].dtype, pd.CategoricalDtype)
+        assert df['ARRIVAL_DELAY'].dtype == np.float32
+        assert memory['after'] < memory['before'] / 2
+        for col in df.columns:
+            assert df[col].isna().equals(stored[col].isna()), col
+            assert (df[col][df[col].notna()].astype(object).tolist()
+                    == stored[col][stored[col].notna()].astype(object).tolist()), col
+
+        # Columns whose values do not fit the compact type are left unchanged
+        wide = compact_flights(pd.DataFrame({'DISTANCE': [100, 40000], 'CANCELLED': [0.0, np.nan],
+                                             'TAXI_OUT': [12.0, np.nan], 'AIR_TIME': [55.5, 60.0]}))
+        assert list(wide.dtypes.astype(str)) == ['int64', 'float64', 'Int16', 'float64']
+
+    def test_column_store_loads_lazily(self, sample_csv, tmp_path):
+        """Column store should only load requested columns and cache them"""
+        from flight_store import FlightColumnStore
+
+        store = FlightColumnStore(parquet_path=str(tmp_path / 'missing'), csv_path=str(sample_csv))
+        assert store.loaded_columns == []
+
+        df = store.frame(['AIRLINE', 'MONTH', 'NOT_A_COLUMN'])
+        assert list(df.columns) == ['AIRLINE', 'MONTH']
+        assert set(store.loaded_columns) == {'AIRLINE', 'MONTH'}
+
+        df = store.frame(['MONTH', 'ARRIVAL_DELAY'])
+        assert set(store.loaded_columns) == {'AIRLINE', 'MONTH', 'ARRIVAL_DELAY'}
+        assert len(df) == 5000
+
+    def test_memory_mapped_export_is_zero_copy(self, sample_csv, tmp_path):
+        """Memory-mapped columns should be read-only views equal to the source"""
+        from flight_store import export_memory_mapped
+
+        mmap_path = tmp_path / 'flights.mmap'
+        missing = str(tmp_path / 'missing')
+        export_memory_mapped(str(mmap_path), parquet_path=missing, csv_path=str(sample_csv))
+        df = load_flights(mmap_path=str(mmap_path), parquet_path=missing, csv_path=str(sample_csv))
+        expected = load_flights(mmap_path=None, parquet_path=missing, csv_path=str(sample_csv))
+
+        assert list(df.columns) == list(expected.columns)
+        assert df['AIRLINE'].tolist() == expected['AIRLINE'].tolist()
+        np.testing.assert_array_equal(df['ARRIVAL_DELAY'].to_numpy(), expected['ARRIVAL_DELAY'].to_numpy())
+        assert df['SEASON'].tolist() == expected['SEASON'].tolist()
+        assert not df['ARRIVAL_DELAY'].to_numpy().flags.writeable
+        assert not df['AIRLINE'].array.codes.flags.writeable
+
+        # Filtering on months reads MONTH even when only other columns are requested
+        january = load_flights(columns=['AIRLINE'], months=[1], mmap_path=str(mmap_path))
+        assert list(january.columns) == ['AIRLINE']
+        assert january['AIRLINE'].tolist() == expected.loc[expected['MONTH'] == 1, 'AIRLINE'].tolist()
+
+
+class TestFlightCube:
+    """Tests for the pre-aggregated flight cube"""
+
+    @pytest.fixture
+    def flights_df(self):
+        return make_sample_flights()
+
+    @pytest.fixture
+    def cube(self, flights_df):
+        from flight_cube import FlightCube
+        return FlightCube.build(flights_df)
+
+    def test_rollup_matches_raw_groupby(self, flights_df, cube):
+        """Cube roll-ups should reproduce the dashboard's raw group-bys"""
+        by_airline = cube.rollup(['AIRLINE'])
+        raw = flights_df.groupby('AIRLINE')
+
+        pd.testing.assert_series_equal(by_airline['flights'], raw.size(), check_names=False)
+        pd.testing.assert_series_equal(by_airline['avg_arrival_delay'], raw['ARRIVAL_DELAY'].mean(),
+                                       check_names=False)
+        on_time = raw['ARRIVAL_DELAY'].apply(lambda x: (x <= 15).mean() * 100)
+        pd.testing.assert_series_equal(by_airline['on_time_pct'], on_time, check_names=False)
+
+    def test_rollup_applies_filters(self, flights_df, cube):
+        """Airline and month filters should match filtering the raw rows"""
+        subset = flights_df[flights_df['AIRLINE'].isin(['AA', 'DL']) & flights_df['MONTH'].isin([1, 7])]
+        by_hour = cube.rollup(['DEP_HOUR'], airlines=['AA', 'DL'], months=[1, 7])
+
+        pd.testing.assert_series_equal(by_hour['flights'], subset.groupby('DEP_HOUR').size(),
+                                       check_names=False)
+        pd.testing.assert_series_equal(by_hour['cancellation_pct'],
+                                       subset.groupby('DEP_HOUR')['CANCELLED'].mean() * 100,
+                                       check_names=False)
+
+    def test_route_rollup_and_std(self, flights_df, cube):
+        """Route cuboid should give route counts and delay spread"""
+        by_route = cube.rollup(['ROUTE'])
+        assert by_route['flights'].sum() == len(flights_df)
+        expected_std = flights_df.groupby('ROUTE')['ARRIVAL_DELAY'].std(ddof=0)
+        np.testing.assert_allclose(by_route['arrival_delay_std'], expected_std, rtol=1e-6)
+
+
+class TestKPIEngine:
+    """Tests for filter-aware KPIs computed from partial aggregates"""
+
+    @pytest.fixture
+    def flights_df(self):
+        return make_sample_flights()
+
+    @pytest.fixture
+    def engine(self, flights_df):
+        from flight_cube import FlightCube
+        from kpi_engine import KPIEngine
+        return KPIEngine.from_cube(FlightCube.build(flights_df))
+
+    def test_kpis_match_raw_data(self, flights_df, engine):
+        """Filtered KPIs should equal the same metrics computed from raw rows"""
+        subset = flights_df[flights_df['AIRLINE'].isin(['AA', 'WN']) & flights_df['MONTH'].isin([3, 4, 5])]
+        kpis = engine.compute(airlines=['AA', 'WN'], months=[3, 4, 5])
+
+        airline_delays = subset.groupby('AIRLINE')['ARRIVAL_DELAY'].mean()
+        hourly_delays = subset.groupby('DEP_HOUR')['ARRIVAL_DELAY'].mean()
+        assert kpis['total_flights'] == len(subset)
+        assert kpis['on_time_pct'] == round((subset['ARRIVAL_DELAY'] <= 15).mean() * 100, 2)
+        assert kpis['avg_delay'] == round(subset['ARRIVAL_DELAY'].mean(), 2)
+        assert kpis['cancellation_rate'] == round(subset['CANCELLED'].mean() * 100, 2)
+        assert kpis['diverted_pct'] == round(subset['DIVERTED'].mean() * 100, 2)
+        assert kpis['best_airline']['code'] == airline_delays.idxmin()
+        assert kpis['worst_airline']['code'] == airline_delays.idxmax()
+        assert kpis['best_hour'] == hourly_delays.idxmin()
+        assert kpis['worst_hour'] == hourly_delays.idxmax()
+
+    def test_merge_equals_full_build(self, flights_df, engine):
+        """Merging partials from two halves should equal the full-data partials"""
+        from flight_cube import FlightCube
+        from kpi_engine import KPIEngine
+
+        first = KPIEngine.from_cube(FlightCube.build(flights_df[flights_df['MONTH'] <= 6]))
+        second = KPIEngine.from_cube(FlightCube.build(flights_df[flights_df['MONTH'] > 6]))
+        assert first.merge(second).compute(airlines=['DL']) == engine.compute(airlines=['DL'])
+
+    def test_rankings_cleared_without_delays(self, flights_df, engine):
+        """Filters without arrival delays should not keep the unfiltered best/worst values"""
+        from flight_cube import FlightCube
+        from kpi_engine import KPIEngine
+
+        summary = {'best_airline': {'code': 'AA', 'avg_delay': 1.0}, 'best_hour': 6, 'worst_hour': 19}
+        empty = {**summary, **engine.compute(airlines=['ZZ'])}
+        assert empty['total_flights'] == 0
+        assert empty['best_airline'] == empty['worst_airline'] == {}
+        assert empty['best_hour'] is None and empty['worst_hour'] is None
+
+        no_delays = flights_df.assign(ARRIVAL_DELAY=flights_df['ARRIVAL_DELAY'].where(flights_df['AIRLINE'] != 'DL'))
+        kpis = KPIEngine.from_cube(FlightCube.build(no_delays)).compute(airlines=['DL'])
+        assert kpis['total_flights'] == (flights_df['AIRLINE'] == 'DL').sum()
+        assert kpis['best_airline'] == {} and kpis['worst_hour'] is None
+
+    def test_compute_is_fast(self, engine):
+        """Any filter combination should be answered well under 50 ms"""
+        import time
+        start = time.perf_counter()
+        for _ in range(100):
+            engine.compute(airlines=['AA', 'DL'], months=[1, 2, 12])
+        assert (time.perf_counter() - start) / 100 < 0.05
+
+
+class TestFilterIndex:
+    """Tests for the bitmap filter index"""
+
+    @pytest.fixture
+    def flights_df(self):
+        return make_sample_flights()
+
+    def test_select_matches_isin(self, flights_df):
+        """Bitmap selection should equal chained isin masks"""
+        from filter_index import BitmapIndex
+
+        index = BitmapIndex(flights_df, ['AIRLINE', 'MONTH'])
+        rows = index.select(AIRLINE=['AA', 'UA'], MONTH=[6, 7, 8])
+        mask = flights_df['AIRLINE'].isin(['AA', 'UA']) & flights_df['MONTH'].isin([6, 7, 8])
+
+        np.testing.assert_array_equal(rows, np.flatnonzero(mask.to_numpy()))
+        assert index.count(AIRLINE=['AA', 'UA'], MONTH=[6, 7, 8]) == mask.sum()
+
+    def test_empty_filters_and_extra_columns(self, flights_df):
+        """No active filter returns None; extra columns can be indexed later"""
+        from filter_index import BitmapIndex
+
+        index = BitmapIndex(flights_df, ['AIRLINE'])
+        assert index.select(AIRLINE=[]) is None
+        assert index.count() == len(flights_df)
+        assert index.values('AIRLINE') == sorted(flights_df['AIRLINE'].unique())
+
+        index.add_column('SEASON', flights_df['SEASON'])
+        rows = index.select(AIRLINE=['DL'], SEASON=['Winter'])
+        expected = (flights_df['AIRLINE'] == 'DL') & (flights_df['SEASON'] == 'Winter')
+        assert len(rows) == expected.sum()
+
+
+class TestPreprocessing:
+    """Tests for the streaming flights preprocessing"""
+
+    @pytest.fixture
+    def raw_csv(self, tmp_path):
+        path = tmp_path / 'flights.csv'
+        make_raw_flights().to_csv(path, index=False)
+        return path
+
+    def test_engineered_features(self, raw_csv):
+        """The module should derive the notebook's features"""
+        from preprocessing import preprocess_flights_data, read_raw_flights
+
+        raw = read_raw_flights(str(raw_csv))
+        processed = preprocess_flights_data(raw, verbose=False)
+        for col in ['FL_DATE', 'DAY_NAME', 'DEP_HOUR', 'DEP_MINUTE', 'ROUTE',
+                    'DELAY_CATEGORY', 'SEASON', 'TOTAL_DELAY']:
+            assert col in processed.columns
+        assert 'ROUTE' not in raw.columns, "Input frame should not be modified"
+        assert processed['DEP_HOUR'].between(0, 23).all()
+        assert (processed['ROUTE'] == raw['ORIGIN_AIRPORT'] + '-' + raw['DESTINATION_AIRPORT']).all()
+        assert processed['CANCELLATION_REASON'].notna().all()
+
+    def test_chunked_output_identical(self, raw_csv, tmp_path):
+        """Streaming in small batches should write the same file as the in-memory path"""
+        from preprocessing import preprocess_flights_file
+
+        full_path = tmp_path / 'full.csv'
+        chunked_path = tmp_path / 'chunked.csv'
+        rows_full = preprocess_flights_file(str(raw_csv), str(full_path), chunksize=None)
+        rows_chunked = preprocess_flights_file(str(raw_csv), str(chunked_path), chunksize=256)
+
+        assert rows_full == rows_chunked == 3000
+        assert full_path.read_bytes() == chunked_path.read_bytes()
+        assert 'DISTANCE_CATEGORY' in pd.read_csv(chunked_path, nrows=1).columns
+        assert not (tmp_path / 'chunked.csv.tmp').exists()
+
+    def test_parallel_output_identical(self, raw_csv, tmp_path):
+        """Byte-range workers should write the same file as the serial path"""
+        from preprocessing import preprocess_flights_file, preprocess_flights_parallel
+
+        serial_path = tmp_path / 'serial.csv'
+        parallel_path = tmp_path / 'parallel.csv'
+        preprocess_flights_file(str(raw_csv), str(serial_path))
+        rows = preprocess_flights_parallel(str(raw_csv), str(parallel_path),
+                                           workers=2, range_bytes=16 * 1024)
+
+        assert rows == 3000
+        assert serial_path.read_bytes() == parallel_path.read_bytes()
+
+    def test_sketches_built_while_preprocessing(self, raw_csv, tmp_path):
+        """Sketches merged across batches and workers equal one built from the output"""
+        from delay_sketch import DelaySketches
+        from preprocessing import preprocess_flights_file, preprocess_flights_parallel
+
+        output = tmp_path / 'processed.csv'
+        preprocess_flights_file(str(raw_csv), str(output), chunksize=700,
+                                sketch_dir=str(tmp_path / 'chunked'))
+        preprocess_flights_parallel(str(raw_csv), str(tmp_path / 'parallel.csv'), workers=2,
+                                    range_bytes=16 * 1024, sketch_dir=str(tmp_path / 'parallel'))
+
+        expected = DelaySketches.build(pd.read_csv(output))
+        for sketch_dir in ['chunked', 'parallel']:
+            sketches = DelaySketches.load(str(tmp_path / sketch_dir))
+            for name in ['airline_month', 'route_month']:
+                np.testing.assert_array_equal(sketches[name].counts, expected[name].counts)
+                assert sketches[name].keys.astype(str).equals(expected[name].keys.astype(str))
+
+    def test_chunks_are_bounded(self, raw_csv):
+        """Every streamed batch should hold at most chunksize rows"""
+        from preprocessing import iter_preprocessed_chunks
+
+        sizes = [len(chunk) for chunk in iter_preprocessed_chunks(str(raw_csv), chunksize=500)]
+        assert max(sizes) <= 500
+        assert sum(sizes) == 3000
+
+    def test_cli_keeps_dashboard_sketches_for_other_outputs(self, raw_csv, tmp_path, monkeypatch):
+        """Preprocessing to another file should not replace the dataset's delay sketches"""
+        import runpy
+
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(sys, 'argv', ['preprocessing.py', str(raw_csv), str(tmp_path / 'out.csv')])
+        runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'preprocessing.py'),
+                       run_name='__main__')
+
+        assert len(pd.read_csv(tmp_path / 'out.csv')) == 3000
+        assert not (tmp_path / 'dataset').exists()
+
+
+class TestIngestion:
+    """Tests for incremental ingestion of new raw flight files"""
+
+    @pytest.fixture
+    def paths(self, tmp_path):
+        raw = make_raw_flights(n=4000)
+        first, second = tmp_path / 'jan_jun.csv', tmp_path / 'jul_dec.csv'
+        raw[raw['MONTH'] <= 6].to_csv(first, index=False)
+        raw[raw['MONTH'] > 6].to_csv(second, index=False)
+        return {
+            'first': str(first), 'second': str(second),
+            'kwargs': dict(
+                csv_path=str(tmp_path / 'processed.csv'),
+                parquet_path=str(tmp_path / 'processed.parquet'),
+                mmap_path=str(tmp_path / 'processed.mmap'),
+                cube_dir=str(tmp_path / 'cube'),
+                sketch_dir=str(tmp_path / 'sketches'),
+                partials_path=str(tmp_path / 'partials.json'),
+                summary_path=str(tmp_path / 'summary.json'),
+                log_path=str(tmp_path / 'ingest_log.json'),
+                chunksize=700,
+                manifest_path=str(tmp_path / 'manifest.json'),
+            ),
+        }
+
+    def test_merged_summary_matches_full_recompute(self, paths):
+        """Summary and cube after two ingestions should equal a from-scratch build"""
+        from ingest import ingest_flights
+        from flight_cube import FlightCube
+        from summary_stats import compute_partials, finalize_summary
+
+        kwargs = paths['kwargs']
+        assert ingest_flights(paths['first'], **kwargs) > 0
+        assert ingest_flights(paths['second'], **kwargs) > 0
+
+        df = load_flights(csv_path=kwargs['csv_path'], parquet_path=kwargs['parquet_path'],
+                          mmap_path=None)
+        assert len(df) == 4000
+        with open(kwargs['summary_path']) as f:
+            summary = json.load(f)
+        expected = json.loads(json.dumps(finalize_summary(compute_partials(df))))
+        assert summary == expected
+        assert summary['total_flights'] == 4000
+        assert summary['avg_delay'] == round(df['ARRIVAL_DELAY'].mean(), 2)
+
+        merged = FlightCube.load(kwargs['cube_dir']).rollup(['MONTH'])
+        full = FlightCube.build(df).rollup(['MONTH'])
+        np.testing.assert_allclose(merged['flights'].to_numpy(), full['flights'].to_numpy())
+        np.testing.assert_allclose(merged['arr_delay_sum'].to_numpy(), full['arr_delay_sum'].to_numpy())
+
+        from delay_sketch import DelaySketches
+        sketches = DelaySketches.load(kwargs['sketch_dir'])
+        rebuilt = DelaySketches.build(df)
+        for name in ['airline_month', 'route_month']:
+            np.testing.assert_array_equal(sketches[name].counts, rebuilt[name].counts)
+
+    def test_reingest_is_idempotent(self, paths):
+        """Ingesting the same file twice should not duplicate rows"""
+        from ingest import ingest_flights, load_ingest_log
+
+        kwargs = paths['kwargs']
+        rows = ingest_flights(paths['first'], **kwargs)
+        size = os.path.getsize(kwargs['csv_path'])
+
+        assert ingest_flights(paths['first'], **kwargs) == 0
+        assert os.path.getsize(kwargs['csv_path']) == size
+        assert [entry['rows'] for entry in load_ingest_log(kwargs['log_path'])] == [rows]
+
+    def test_appends_to_parquet_store(self, paths):
+        """An existing Parquet store should receive the new rows"""
+        pytest.importorskip('pyarrow')
+        from flight_store import convert_csv_to_parquet
+        from ingest import ingest_flights
+
+        kwargs = paths['kwargs']
+        ingest_flights(paths['first'], **kwargs)
+        convert_csv_to_parquet(kwargs['csv_path'], kwargs['parquet_path'])
+        ingest_flights(paths['second'], **kwargs)
+
+        df = load_flights(parquet_path=kwargs['parquet_path'], mmap_path=None)
+        assert len(df) == 4000
+        assert sorted(df['MONTH'].unique()) == sorted(make_raw_flights(n=4000)['MONTH'].unique())
+
+    def test_failed_ingest_rolls_back(self, paths, monkeypatch):
+        """A retry after a failed ingestion should append the new rows exactly once"""
+        pytest.importorskip('pyarrow')
+        import ingest
+        from flight_store import convert_csv_to_parquet
+
+        kwargs = dict(paths['kwargs'], chunksize=500)
+        first_rows = ingest.ingest_flights(paths['first'], **kwargs)
+        convert_csv_to_parquet(kwargs['csv_path'], kwargs['parquet_path'])
+        size = os.path.getsize(kwargs['csv_path'])
+
+        append = ingest._append_to_csv
+        calls = []
+
+        def fail_on_second_chunk(df, csv_path):
+            calls.append(len(df))
+            if len(calls) == 2:
+                raise OSError("disk full")
+            append(df, csv_path)
+
+        monkeypatch.setattr(ingest, '_append_to_csv', fail_on_second_chunk)
+        with pytest.raises(OSError):
+            ingest.ingest_flights(paths['second'], **kwargs)
+        assert os.path.getsize(kwargs['csv_path']) == size
+        assert len(load_flights(parquet_path=kwargs['parquet_path'], mmap_path=None)) == first_rows
+        assert len(ingest.load_ingest_log(kwargs['log_path'])) == 1
+
+        monkeypatch.setattr(ingest, '_append_to_csv', append)
+        ingest.ingest_flights(paths['second'], **kwargs)
+        for store in [dict(csv_path=kwargs['csv_path'], parquet_path=kwargs['parquet_path'] + '.missing'),
+                      dict(parquet_path=kwargs['parquet_path'])]:
+            assert len(load_flights(mmap_path=None, **store)) == 4000
+        with open(kwargs['summary_path']) as f:
+            assert json.load(f)['total_flights'] == 4000
+
+    def test_interrupted_ingest_is_undone_on_next_run(self, paths):
+        """Rows left behind by a killed ingestion are removed before the retry"""
+        from ingest import _save_ingest_log, ingest_flights, ingest_in_progress, load_ingest_log
+
+        kwargs = paths['kwargs']
+        ingest_flights(paths['first'], **kwargs)
+        log = load_ingest_log(kwargs['log_path'])
+        size = os.path.getsize(kwargs['csv_path'])
+
+        # As left by a process killed halfway through appending the second file
+        log.append({'file': 'jul_dec.csv', 'fingerprint': 'dead', 'status': 'in_progress',
+                    'csv_bytes': size, 'parquet_prefix': 'ingest-dead-'})
+        _save_ingest_log(log, kwargs['log_path'])
+        with open(kwargs['csv_path'], 'a') as f:
+            f.write('partial,row\n')
+        assert ingest_in_progress(kwargs['log_path'])
+
+        ingest_flights(paths['second'], **kwargs)
+        assert not ingest_in_progress(kwargs['log_path'])
+        assert len(load_flights(csv_path=kwargs['csv_path'], parquet_path=kwargs['parquet_path'],
+                                mmap_path=None)) == 4000
+        assert [entry.get('status', 'done') for entry in load_ingest_log(kwargs['log_path'])] == ['done', 'done']
+
+    def test_missing_columns_fail_clearly(self, tmp_path):
+        """Appending rows without the store's columns should name the missing columns"""
+        from ingest import _append_to_csv
+
+        csv_path = tmp_path / 'processed.csv'
+        csv_path.write_text('MONTH,AIRLINE,ARRIVAL_DELAY\n1,AA,5.0\n')
+        with pytest.raises(ValueError, match='ARRIVAL_DELAY'):
+            _append_to_csv(pd.DataFrame({'MONTH': [2], 'AIRLINE': ['DL']}), str(csv_path))
+        assert csv_path.read_text().count('\n') == 2
+
+
+class TestSummaryStats:
+    """Tests for the single-pass summary statistics engine"""
+
+    @pytest.fixture
+    def flights_df(self):
+        df = make_sample_flights(n=20000)
+        df['DISTANCE_CATEGORY'] = pd.cut(df['DISTANCE'], bins=[0, 500, 1000, 1500, 2000, 10000],
+                                         labels=['Short', 'Medium', 'Long', 'Very Long', 'Ultra Long'])
+        df['CANCELLATION_REASON'] = np.where(df['CANCELLED'] == 1, 'B', 'No Cancellation')
+        return df
+
+    def test_matches_per_stat_pandas(self, flights_df):
+        """Each statistic should equal the separate pandas computation it replaces"""
+        from summary_stats import generate_summary
+
+        timings = {}
+        stats = generate_summary(flights_df, timings)
+        df = flights_df
+
+        assert stats['total_flights'] == len(df)
+        assert stats['avg_delay'] == round(float(df['ARRIVAL_DELAY'].mean()), 2)
+        assert stats['on_time_pct'] == round(float((df['ARRIVAL_DELAY'] <= 15).mean() * 100), 2)
+        assert stats['unique_routes'] == df['ROUTE'].nunique()
+        assert stats['top_routes'] == df['ROUTE'].value_counts().head(10).to_dict()
+
+        hourly = df.groupby('DEP_HOUR')['ARRIVAL_DELAY'].mean()
+        assert stats['hourly_delays'] == pytest.approx(hourly.to_dict())
+        assert stats['best_hour'] == hourly.idxmin()
+        assert stats['worst_hour'] == hourly.idxmax()
+        assert stats['daily_delays'] == pytest.approx(df.groupby('DAY_NAME')['ARRIVAL_DELAY'].mean().to_dict())
+
+        airline_delays = df.groupby('AIRLINE')['ARRIVAL_DELAY'].mean().sort_values()
+        assert stats['best_airline']['code'] == airline_delays.index[0]
+        assert stats['worst_airline']['code'] == airline_delays.index[-1]
+
+        traffic = df['ORIGIN_AIRPORT'].value_counts().add(df['DESTINATION_AIRPORT'].value_counts(), fill_value=0)
+        assert stats['busiest_airports'] == traffic.sort_values(ascending=False).head(10).to_dict()
+        assert stats['monthly_flights'] == df.groupby('MONTH').size().to_dict()
+        assert stats['delay_categories'] == df['DELAY_CATEGORY'].value_counts().to_dict()
+        assert stats['distance_categories'] == df['DISTANCE_CATEGORY'].value_counts().to_dict()
+        assert stats['cancellation_reasons'] == {'B': int(df['CANCELLED'].sum())}
+
+        assert {'totals', 'airline', 'hour', 'route', 'finalize'} <= set(timings)
+
+    def test_merged_partials_equal_full_pass(self, flights_df):
+        """Partials over two halves should merge into the full-data summary"""
+        from summary_stats import compute_partials, finalize_summary, merge_partials
+
+        half = len(flights_df) // 2
+        merged = merge_partials(compute_partials(flights_df.iloc[:half]),
+                                compute_partials(flights_df.iloc[half:]))
+        full = finalize_summary(compute_partials(flights_df))
+        assert json.dumps(finalize_summary(merged)) == json.dumps(full)
+
+    def test_generate_stats_writes_summary(self, flights_df, tmp_path):
+        """generate_stats should work as a library function"""
+        from generate_stats import generate_stats
+
+        output_path = tmp_path / 'summary.json'
+        stats = generate_stats(flights_df, output_path=str(output_path))
+        with open(output_path) as f:
+            assert json.load(f)['total_flights'] == stats['total_flights'] == len(flights_df)
+
+
+class TestGeographicMaps:
+    """Tests for the GeoJSON map rendering path"""
+
+    @pytest.fixture
+    def airports_df(self):
+        return pd.DataFrame({
+            'IATA_CODE': ['ATL', 'ORD', 'DFW', 'LAX', 'SFO', 'JFK'],
+            'AIRPORT': ['Atlanta', 'Chicago', 'Dallas', 'Los Angeles', 'San Francisco', 'New York'],
+            'CITY': ['Atlanta', 'Chicago', 'Dallas', 'Los Angeles', 'San Francisco', 'New York'],
+            'LATITUDE': [33.64, 41.98, 32.90, 33.94, 37.62, 40.64],
+            'LONGITUDE': [-84.43, -87.90, -97.04, -118.41, -122.37, -73.78],
+        })
+
+    @staticmethod
+    def _layers(m, kind):
+        return [child for child in m._children.values() if type(child).__name__ == kind]
+
+    def test_airports_drawn_as_one_layer(self, airports_df, tmp_path):
+        """All airports should be features of a single GeoJSON layer with a shared popup"""
+        folium = pytest.importorskip('folium')
+        from geographic_analysis import create_airport_delay_map
+
+        m = create_airport_delay_map(make_sample_flights(), airports_df,
+                                     output_file=str(tmp_path / 'airports.html'))
+        layers = self._layers(m, 'GeoJson')
+        assert len(layers) == 1
+        features = layers[0].data['features']
+        assert len(features) == 6
+        assert not self._layers(m, 'CircleMarker')
+        assert any(isinstance(child, folium.GeoJsonPopup) for child in layers[0]._children.values())
+
+        atl = next(f['properties'] for f in features if f['properties']['IATA_CODE'] == 'ATL')
+        df = make_sample_flights()
+        expected = df.loc[df['DESTINATION_AIRPORT'] == 'ATL', 'ARRIVAL_DELAY']
+        assert atl['flight_count'] == expected.count()
+        assert atl['avg_delay'] == round(expected.mean(), 1)
+
+    def test_routes_drawn_as_one_layer(self, airports_df, tmp_path):
+        """Routes should be LineString features of one layer"""
+        pytest.importorskip('folium')
+        from geographic_analysis import create_route_flow_map
+
+        m = create_route_flow_map(make_sample_flights(), airports_df, top_n=20,
+                                  output_file=str(tmp_path / 'routes.html'))
+        routes, airports = self._layers(m, 'GeoJson')
+        assert len(routes.data['features']) == 20
+        assert all(f['geometry']['type'] == 'LineString' for f in routes.data['features'])
+        assert not self._layers(m, 'PolyLine')
+
+    def test_shared_aggregates_match_per_map_groupbys(self, airports_df):
+        """One aggregation pass should reproduce each map's own group-by"""
+        from geographic_analysis import compute_map_aggregates
+
+        df = make_sample_flights()
+        aggregates = compute_map_aggregates(df, airports_df)
+
+        airports = aggregates['airports'].set_index('IATA_CODE')
+        expected = df.groupby('DESTINATION_AIRPORT')['ARRIVAL_DELAY'].agg(['mean', 'count'])
+        np.testing.assert_allclose(airports['avg_delay'], expected.loc[airports.index, 'mean'])
+        assert (airports['flight_count'] == expected.loc[airports.index, 'count']).all()
+
+        routes = aggregates['routes'].set_index('ROUTE')
+        assert routes['flights'].to_dict() == df['ROUTE'].value_counts().to_dict()
+        departures = aggregates['departures'].set_index('ORIGIN')['count']
+        assert departures.to_dict() == df.groupby('ORIGIN_AIRPORT').size().to_dict()
+
+    def test_create_all_maps_skips_unchanged(self, airports_df, tmp_path):
+        """Maps are rebuilt only when their inputs change"""
+        pytest.importorskip('folium')
+        from geographic_analysis import create_all_maps
+
+        df = make_sample_flights()
+        output_dir = str(tmp_path / 'maps')
+        arcs_cache = str(tmp_path / 'route_arcs.npz')
+        first = create_all_maps(df, airports_df, output_dir=output_dir, workers=2, arcs_cache=arcs_cache)
+        assert set(first.values()) == {'built'}
+        assert len(os.listdir(output_dir)) == 5
+
+        second = create_all_maps(df, airports_df, output_dir=output_dir, arcs_cache=arcs_cache)
+        assert set(second.values()) == {'skipped'}
+
+        # Only the arrival delays change: the heatmap (departure counts) is kept
+        changed = df.assign(ARRIVAL_DELAY=df['ARRIVAL_DELAY'] + 1)
+        status = create_all_maps(changed, airports_df, output_dir=output_dir, workers=1,
+                                 arcs_cache=arcs_cache)
+        assert status == {'airport_delay_map.html': 'built', 'route_flow_map.html': 'built',
+                          'route_network_map.html': 'built', 'traffic_heatmap.html': 'skipped'}
+
+    def test_route_network_tiers_by_zoom(self, airports_df, tmp_path):
+        """Every airport pair is drawn once, in a layer per level-of-detail tier"""
+        pytest.importorskip('folium')
+        from geographic_analysis import create_route_network_map
+
+        df = make_sample_flights()
+        m = create_route_network_map(df, airports_df, output_file=str(tmp_path / 'network.html'),
+                                     arcs_cache=None)
+        layers = self._layers(m, 'GeoJson')
+        pairs = set(frozenset(route.split('-')) for route in df['ROUTE'].unique())
+        assert sum(len(layer.data['features']) for layer in layers) == len(pairs)
+        assert all(f['geometry']['type'] == 'LineString'
+                   for layer in layers for f in layer.data['features'])
+        html = (tmp_path / 'network.html').read_text()
+        assert "map.on('zoomend', update)" in html
+
+
+class TestRouteNetwork:
+    """Tests for route bundling and great-circle arc geometry"""
+
+    @pytest.fixture
+    def airports_df(self):
+        return pd.DataFrame({
+            'IATA_CODE': ['JFK', 'LAX', 'EWR', 'HNL', 'GUM'],
+            'LATITUDE': [40.64, 33.94, 40.69, 21.32, 13.48],
+            'LONGITUDE': [-73.78, -118.41, -74.17, -157.92, 144.80],
+        })
+
+    def _pairs(self, airports_df):
+        from route_network import bundle_routes
+
+        return bundle_routes(pd.Series(['JFK', 'LAX', 'JFK', 'HNL']),
+                             pd.Series(['LAX', 'JFK', 'EWR', 'GUM']),
+                             pd.Series([300, 200, 50, 10]),
+                             pd.Series([300, 190, 50, 0]),
+                             pd.Series([3000.0, 950.0, 100.0, 0.0]),
+                             airports_df)
+
+    def test_both_directions_bundled(self, airports_df):
+        """Opposite directions of a route share one pair with combined traffic"""
+        pairs = self._pairs(airports_df).set_index('PAIR')
+        assert list(pairs.index) == ['JFK-LAX', 'EWR-JFK', 'GUM-HNL']
+        assert pairs.loc['JFK-LAX', 'flights'] == 500
+        assert pairs.loc['JFK-LAX', 'avg_delay'] == pytest.approx(3950 / 490)
+        assert np.isnan(pairs.loc['GUM-HNL', 'avg_delay'])
+
+    def test_arcs_follow_great_circle(self, airports_df):
+        """Arcs start and end at the airports, bow poleward and cross the antimeridian unbroken"""
+        from route_network import RouteArcs
+
+        pairs = self._pairs(airports_df)
+        arcs = RouteArcs.compute(pairs)
+        (jfk_lax, ewr_jfk, gum_hnl) = arcs.coordinates(pairs['PAIR'])
+
+        lats, lons = jfk_lax
+        assert (lats[0], lons[0]) == pytest.approx((40.64, -73.78), abs=1e-3)
+        assert (lats[-1], lons[-1]) == pytest.approx((33.94, -118.41), abs=1e-3)
+        assert lats.max() > 40.64
+        assert len(ewr_jfk[0]) == 2 < len(lats)
+        assert np.abs(np.diff(gum_hnl[1])).max() < 20
+
+    def test_cache_only_computes_new_pairs(self, airports_df, tmp_path):
+        """Cached arcs are reused and extended with pairs that were not cached yet"""
+        from route_network import RouteArcs, load_route_arcs
+
+        pairs = self._pairs(airports_df)
+        cache = str(tmp_path / 'arcs.npz')
+        load_route_arcs(pairs.head(2), cache)
+        assert len(RouteArcs.load(cache)) == 2
+
+        arcs = load_route_arcs(pairs, cache)
+        assert len(arcs) == 3 and len(RouteArcs.load(cache)) == 3
+        assert arcs.covers(pairs).all()
+        lats, lons = arcs.line_trace(pairs['PAIR'])
+        assert np.isnan(lats).sum() == 3
+
+
+class TestAirportIndex:
+    """Tests for the airport spatial index"""
+
+    @pytest.fixture
+    def points(self):
+        rng = np.random.default_rng(3)
+        n = 400
+        return pd.DataFrame({
+            'IATA_CODE': [f'P{i:03d}' for i in range(n)],
+            'LATITUDE': rng.uniform(15, 70, n),
+            'LONGITUDE': rng.uniform(-170, -60, n),
+        })
+
+    @staticmethod
+    def _brute(points, lat, lon):
+        from airport_index import haversine_miles
+
+        return haversine_miles(np.asarray(lat)[:, None], np.asarray(lon)[:, None],
+                               points['LATITUDE'].to_numpy()[None, :],
+                               points['LONGITUDE'].to_numpy()[None, :])
+
+    def test_radius_matches_brute_force(self, points):
+        """Radius queries return exactly the points a full distance scan finds"""
+        from airport_index import AirportIndex
+
+        index = AirportIndex(points)
+        lat, lon = np.array([40.0, 33.9, 21.3]), np.array([-75.0, -118.4, -157.9])
+        result = index.within(lat, lon, radius_miles=[150, 300, 600])
+        matrix = self._brute(points, lat, lon)
+
+        for q, radius in enumerate([150, 300, 600]):
+            expected = set(points['IATA_CODE'].to_numpy()[matrix[q] <= radius])
+            found = result[result['QUERY'] == q]
+            assert set(found['IATA_CODE']) == expected
+            assert found['DISTANCE_MILES'].is_monotonic_increasing
+
+    def test_nearest_matches_brute_force(self, points):
+        """Nearest-k returns the k closest points in order, including k above the leaf size"""
+        from airport_index import AirportIndex
+
+        index = AirportIndex(points, leaf_size=8)
+        rng = np.random.default_rng(4)
+        lat, lon = rng.uniform(20, 60, 50), rng.uniform(-160, -70, 50)
+        matrix = self._brute(points, lat, lon)
+
+        for k in [1, 5, 20]:
+            codes, distances = index.nearest(lat, lon, k=k)
+            expected = np.sort(matrix, axis=1)[:, :k]
+            np.testing.assert_allclose(distances, expected, atol=1e-6)
+            assert codes.shape == (50, k)
+        assert index.nearest(40.0, -75.0, k=1000)[0].shape == (1, len(points))
+
+    def test_flights_near_filters_by_airport_location(self):
+        """flights_near keeps flights departing from airports inside the radius"""
+        from geographic_analysis import flights_near
+
+        airports_df = pd.DataFrame({
+            'IATA_CODE': ['ATL', 'ORD', 'DFW', 'LAX', 'SFO', 'JFK'],
+            'LATITUDE': [33.64, 41.98, 32.90, 33.94, 37.62, 40.64],
+            'LONGITUDE': [-84.43, -87.90, -97.04, -118.41, -122.37, -73.78],
+        })
+        df = make_sample_flights()
+        # 400 miles around Los Angeles reaches SFO but no other airport
+        near = flights_near(df, airports_df, 34.05, -118.24, 400)
+        assert set(near['ORIGIN_AIRPORT']) == {'LAX', 'SFO'}
+        assert len(near) == df['ORIGIN_AIRPORT'].isin(['LAX', 'SFO']).sum()
+        assert (near['DISTANCE_FROM_POINT'] <= 400).all()
+
+
+class TestAirlineScorecard:
+    """Tests for the single-pass airline scorecard"""
+
+    def test_matches_per_metric_groupbys(self):
+        """Every scorecard column equals the group-by it replaces"""
+        from airline_scorecard import airline_scorecard
+
+        df = make_sample_flights()
+        scorecard = airline_scorecard(df)
+        grouped = df.groupby('AIRLINE')
+
+        assert scorecard['flights'].to_dict() == df['AIRLINE'].value_counts().to_dict()
+        np.testing.assert_allclose(scorecard['avg_arrival_delay'], grouped['ARRIVAL_DELAY'].mean())
+        np.testing.assert_allclose(scorecard['avg_departure_delay'], grouped['DEPARTURE_DELAY'].mean())
+        np.testing.assert_allclose(scorecard['on_time_pct'],
+                                   (df['ARRIVAL_DELAY'] <= 15).groupby(df['AIRLINE']).mean() * 100)
+        np.testing.assert_allclose(scorecard['cancellation_pct'], grouped['CANCELLED'].mean() * 100)
+        for q in [50, 90, 95]:
+            np.testing.assert_allclose(scorecard[f'arrival_delay_p{q}'],
+                                       grouped['ARRIVAL_DELAY'].quantile(q / 100))
+
+    def test_percentiles_with_negative_and_missing_values(self):
+        """Grouped percentiles interpolate like np.percentile and skip NaN and empty groups"""
+        from airline_scorecard import grouped_percentiles
+
+        codes = np.array([0, 0, 0, 0, 2, 2, -1, 0])
+        values = np.array([-20.0, 5.0, np.nan, 40.0, 7.5, 7.5, 100.0, -3.0])
+        result = grouped_percentiles(codes, values, 3, percentiles=(0, 50, 90))
+
+        np.testing.assert_allclose(result[0], np.percentile([-20, 5, 40, -3], [0, 50, 90]))
+        assert np.isnan(result[1]).all()
+        np.testing.assert_allclose(result[2], [7.5, 7.5, 7.5])
+
+    def test_categorical_airlines_drop_unused(self):
+        """Filtered categorical input only reports airlines that still have flights"""
+        from airline_scorecard import airline_scorecard
+
+        df = make_sample_flights()
+        df['AIRLINE'] = df['AIRLINE'].astype('category')
+        subset = df[df['AIRLINE'].isin(['AA', 'DL'])]
+        assert sorted(airline_scorecard(subset).index) == ['AA', 'DL']
+
+
+class TestDelaySketches:
+    """Tests for the mergeable delay histogram sketches"""
+
+    @pytest.fixture
+    def flights_df(self):
+        return make_sample_flights(n=20000)
+
+    def test_quantiles_close_to_exact(self, flights_df):
+        """Fine-bin percentiles are within half a minute of the exact values for any filter"""
+        from delay_sketch import DelaySketches
+
+        sketch = DelaySketches.build(flights_df)['airline_month']
+        qs = [0.0, 0.5, 0.9, 0.99, 1.0]
+        for airlines, months in [(None, None), (['AA', 'DL'], [1, 2, 3]), (['WN'], [12])]:
+            subset = flights_df
+            if airlines:
+                subset = subset[subset['AIRLINE'].isin(airlines)]
+            if months:
+                subset = subset[subset['MONTH'].isin(months)]
+            exact = subset['ARRIVAL_DELAY'].quantile(qs).to_numpy()
+            estimate = sketch.quantiles(qs, AIRLINE=airlines, MONTH=months)
+            np.testing.assert_allclose(estimate, exact, atol=0.5)
+        assert np.isnan(sketch.quantiles([0.5], AIRLINE=['XX'])).all()
+
+    def test_merge_equals_single_build(self, flights_df, tmp_path):
+        """Sketches of two halves merge into the sketch of the whole, and survive a save/load"""
+        from delay_sketch import DelaySketches
+
+        whole = DelaySketches.build(flights_df)
+        halves = DelaySketches.build(flights_df.iloc[:7000]).merge(DelaySketches.build(flights_df.iloc[7000:]))
+        halves.save(str(tmp_path / 'sketches'))
+        loaded = DelaySketches.load(str(tmp_path / 'sketches'))
+
+        for name in ['airline_month', 'route_month']:
+            np.testing.assert_array_equal(loaded[name].counts, whole[name].counts)
+            np.testing.assert_array_equal(loaded[name].low, whole[name].low)
+            assert loaded[name].keys.astype(str).equals(whole[name].keys.astype(str))
+
+    def test_histogram_matches_clipped_counts(self, flights_df):
+        """Re-binned chart counts equal a histogram of the raw delays in range"""
+        from delay_sketch import DelaySketches
+
+        display_edges = np.arange(-62.5, 185, 5)
+        sketches = DelaySketches.build(flights_df)
+        delays = flights_df['ARRIVAL_DELAY'].dropna()
+        expected, _ = np.histogram(delays, bins=display_edges)
+        for name in ['airline_month', 'route_month']:
+            np.testing.assert_array_equal(sketches[name].histogram(display_edges), expected)
+
+
+class TestChartBudget:
+    """Tests for the bounded plotly payload layer"""
+
+    def test_raw_histogram_binned_on_server(self):
+        """A histogram of raw values becomes a bounded bar trace with the same total"""
+        px = pytest.importorskip('plotly.express')
+        from chart_budget import bound_figure, max_marks, payload_bytes
+
+        values = np.random.default_rng(0).normal(5, 30, 200_000)
+        fig = px.histogram(values)
+        raw_bytes = payload_bytes(fig)
+
+        assert bound_figure(fig, width=800)
+        trace = fig.data[0]
+        assert trace.type == 'bar'
+        assert len(trace.x) <= max_marks('histogram', width=800)
+        assert trace.y.sum() == len(values)
+        assert payload_bytes(fig) < raw_bytes / 100
+
+    def test_line_decimation_keeps_extremes(self):
+        """Decimated lines stay within the point limit and keep spikes"""
+        from chart_budget import decimate_line, thin_polylines
+
+        y = np.sin(np.arange(100_000) / 500)
+        y[31_337] = 50.0
+        keep = decimate_line(np.arange(len(y)), y, 1000)
+        assert len(keep) <= 1000
+        assert 31_337 in keep and np.all(np.diff(keep) > 0)
+
+        lat = np.concatenate([np.arange(10.0), [np.nan], np.arange(20.0, 50.0)])
+        kept = lat[thin_polylines(lat, 12)]
+        assert len(kept) < len(lat)
+        assert {0.0, 9.0, 20.0, 49.0} <= set(kept[~np.isnan(kept)])
+        assert np.isnan(kept).sum() == 1
+
+    def test_bars_keep_largest_values_with_note(self):
+        """Bounded bar charts keep their largest bars in order and say how many were cut"""
+        go = pytest.importorskip('plotly.graph_objects')
+        from chart_budget import bound_figure, max_marks
+
+        limit = max_marks('bar', width=600)
+        values = np.arange(3 * limit) % 7 + np.arange(3 * limit) / 1000
+        labels = np.array([f"r{i}" for i in range(len(values))])
+        fig = go.Figure(go.Bar(y=labels, x=values, orientation='h'))
+
+        assert bound_figure(fig, width=600)
+        kept = np.asarray(fig.data[0].x)
+        assert len(kept) == limit
+        assert kept.min() >= np.sort(values)[-limit]
+        assert list(fig.data[0].y) == sorted(fig.data[0].y, key=lambda label: int(label[1:]))
+        assert fig.layout.annotations[0].text == f"Largest {limit} of {len(values)} bars shown"
+
+    def test_payload_logged_per_chart(self, caplog):
+        """plotly_chart logs bytes per chart and warns above the budget"""
+        go = pytest.importorskip('plotly.graph_objects')
+        from chart_budget import plotly_chart
+
+        fig = go.Figure(go.Bar(x=['a', 'b'], y=[1, 2]), layout={'title': 'Small chart'})
+        with caplog.at_level('INFO', logger='airfly.charts'):
+            record = plotly_chart(fig, measure=True)
+            plotly_chart(go.Figure(go.Bar(x=['a'], y=[1])), name='Tiny budget', budget=10)
+
+        assert record['chart'] == 'Small chart' and record['marks'] == 2
+        assert record['bytes'] == len(fig.to_json().encode('utf-8'))
+        levels = {r.getMessage().split()[0]: r.levelname for r in caplog.records}
+        assert levels == {"chart='Small": 'INFO', "chart='Tiny": 'WARNING'}
+
+    def test_payload_estimated_unless_measuring(self, monkeypatch):
+        """Charts are only serialised to measure them while measurement is on"""
+        go = pytest.importorskip('plotly.graph_objects')
+        import chart_budget
+
+        serialised = []
+        original = chart_budget.payload_bytes
+        monkeypatch.setattr(chart_budget, 'payload_bytes', lambda fig: serialised.append(fig) or original(fig))
+        lat = np.random.default_rng(1).uniform(25, 48, 8000)
+        fig = go.Figure(go.Scattergeo(lat=lat, lon=-lat * 2, mode='lines'))
+
+        estimated = chart_budget.plotly_chart(fig)
+        assert serialised == [] and not estimated['measured']
+        assert 0.7 < estimated['bytes'] / original(fig) < 1.4
+
+        chart_budget.measure_payloads(True)
+        try:
+            assert chart_budget.plotly_chart(fig)['measured'] and len(serialised) == 1
+        finally:
+            chart_budget.measure_payloads(False)
+
+
+class TestRenderProfile:
+    """Tests for the per-rerun render profile"""
+
+    def test_stages_and_charts_form_a_waterfall(self):
+        """Timed stages, figure builds and charts are recorded in order"""
+        go = pytest.importorskip('plotly.graph_objects')
+        from chart_budget import plotly_chart
+        from render_profile import RenderProfile
+
+        profile = RenderProfile(page='Test')
+        with profile.stage('rollup', 'aggregate'):
+            sum(range(10_000))
+        fig = go.Figure(go.Bar(x=['a', 'b'], y=[1, 2]), layout={'title': 'Counts'})
+        plotly_chart(fig, measure=True)
+        profile.close()
+        plotly_chart(go.Figure(go.Bar(x=['a'], y=[1])), name='After close')
+
+        stages = profile.frame()
+        assert list(stages['kind']) == ['aggregate', 'figure', 'chart']
+        assert list(stages['stage']) == ['rollup', 'build Counts', 'Counts']
+        assert stages['bytes'].iloc[-1] == len(fig.to_json().encode('utf-8'))
+        ends = (stages['start'] + stages['seconds']).to_numpy()
+        assert np.all(stages['start'].to_numpy()[1:] >= ends[:-1] - 1e-9)
+
+    def test_finish_appends_structured_log(self, tmp_path):
+        """Every finished rerun is appended as one JSON line"""
+        from render_profile import RenderProfile
+
+        log_path = tmp_path / 'logs' / 'profile.jsonl'
+        for page in ['Overview', 'Delays']:
+            profile = RenderProfile(page=page)
+            with profile.stage('filter', 'filter'):
+                pass
+            record = profile.finish(log_path=str(log_path), airlines=['AA'])
+
+        lines = [json.loads(line) for line in log_path.read_text().splitlines()]
+        assert [line['page'] for line in lines] == ['Overview', 'Delays']
+        assert lines[-1]['airlines'] == ['AA']
+        assert lines[-1]['stages'][0]['stage'] == 'filter'
+        assert record['total_seconds'] >= record['kinds']['filter']
+
+    def test_waterfall_figure(self):
+        """The waterfall draws one bar per stage starting at its offset"""
+        pytest.importorskip('plotly')
+        from render_profile import waterfall_figure
+
+        stages = pd.DataFrame({'stage': ['load', 'build A', 'A'], 'kind': ['data', 'figure', 'chart'],
+                               'start': [0.0, 0.01, 0.03], 'seconds': [0.01, 0.02, 0.005]})
+        fig = waterfall_figure(stages)
+        assert [trace.name for trace in fig.data] == ['data', 'figure', 'chart']
+        assert list(fig.data[1].base) == [10.0] and list(fig.data[1].x) == [20.0]
+
+
+class TestBenchmarkSuite:
+    """Tests for the headless benchmark suite"""
+
+    def test_regressions_against_baseline(self):
+        """Only increases beyond both the relative and absolute tolerance are flagged"""
+        from benchmark_suite import find_regressions
+
+        baseline = [{'benchmark': 'maps', 'rows': 1000, 'seconds': 1.0, 'peak_rss_mb': 200},
+                    {'benchmark': 'page: Overview', 'rows': 1000, 'seconds': 0.01,
+                     'warm_seconds': 0.01, 'peak_rss_mb': 300}]
+        results = [{'benchmark': 'maps', 'rows': 1000, 'seconds': 1.8, 'peak_rss_mb': 210},
+                   {'benchmark': 'page: Overview', 'rows': 1000, 'seconds': 0.2,
+                    'warm_seconds': 0.2, 'peak_rss_mb': 500},
+                   {'benchmark': 'preprocessing', 'rows': 1000, 'seconds': 9.0, 'peak_rss_mb': 900}]
+
+        assert find_regressions(results, baseline) == [
+            ('maps', 1000, 'seconds', 1.0, 1.8),
+            ('page: Overview', 1000, 'peak_rss_mb', 300, 500),
+        ]
+        assert find_regressions(results, baseline, tolerance=1.0) == []
+
+    def test_workspace_benchmark_in_subprocess(self, tmp_path):
+        """A synthetic workspace loads like the real dataset and benchmarks run isolated"""
+        from benchmark_suite import _run_isolated, build_workspace
+        from flight_store import FLIGHTS_PARQUET
+
+        build_workspace(str(tmp_path), 3000, chunk_rows=2000)
+        flights = load_flights(parquet_path=str(tmp_path / FLIGHTS_PARQUET), mmap_path=None)
+        assert len(flights) == 3000
+        assert {'ROUTE', 'DELAY_CATEGORY', 'DISTANCE_CATEGORY', 'SEASON', 'DEP_HOUR'} <= set(flights.columns)
+        with open(tmp_path / 'configuration' / 'analysis_summary.json') as f:
+            assert json.load(f)['total_flights'] == 3000
+
+        result = _run_isolated(str(tmp_path), 'generate_stats', repeat=1)
+        assert result['seconds'] > 0 and result['peak_rss_mb'] > 0
+
+
+class TestSyntheticFlights:
+    """Tests for the streaming synthetic flights generator"""
+
+    def test_processed_schema_and_codes(self):
+        """Generated flights have the processed layout and consistent codes"""
+        from preprocessing import RAW_DTYPES
+        from synthetic_flights import AIRLINES, iter_synthetic_flights, reference_airports
+
+        airports_df = reference_airports()
+        raw = next(iter_synthetic_flights(20_000, airports_df=airports_df, processed=False))
+        df = next(iter_synthetic_flights(20_000, airports_df=airports_df))
+
+        assert list(raw.columns) == list(RAW_DTYPES)
+        assert len(df.columns) == 40
+        assert {'ROUTE', 'DEP_HOUR', 'SEASON', 'DELAY_CATEGORY', 'DISTANCE_CATEGORY', 'TOTAL_DELAY'} <= set(df.columns)
+        assert set(df['ORIGIN_AIRPORT']) | set(df['DESTINATION_AIRPORT']) <= set(airports_df['IATA_CODE'])
+        assert set(df['AIRLINE']) <= set(AIRLINES)
+        assert (df['ROUTE'] == df['ORIGIN_AIRPORT'] + '-' + df['DESTINATION_AIRPORT']).all()
+        assert (df['ORIGIN_AIRPORT'] != df['DESTINATION_AIRPORT']).all()
+
+        # Rates in the range of the 2015 data
+        assert 0.005 < df['CANCELLED'].mean() < 0.03
+        assert 0.7 < (df['ARRIVAL_DELAY'] <= 15).mean() < 0.9
+        late = raw[raw['ARRIVAL_DELAY'] >= 15]
+        causes = late[['AIR_SYSTEM_DELAY', 'SECURITY_DELAY', 'AIRLINE_DELAY', 'LATE_AIRCRAFT_DELAY', 'WEATHER_DELAY']]
+        assert np.allclose(causes.sum(axis=1), late['ARRIVAL_DELAY'])
+
+    def test_batches_are_reproducible(self):
+        """Batches are bounded and do not depend on how many were consumed before"""
+        from synthetic_flights import iter_synthetic_flights
+
+        batches = list(iter_synthetic_flights(2500, batch_rows=1000, seed=5, processed=False))
+        assert [len(batch) for batch in batches] == [1000, 1000, 500]
+        again = list(iter_synthetic_flights(2500, batch_rows=1000, seed=5, processed=False))
+        pd.testing.assert_frame_equal(batches[2], again[2])
+        assert not batches[0]['DISTANCE'].equals(batches[1]['DISTANCE'])
+
+    def test_streamed_to_csv_and_parquet(self, tmp_path):
+        """Streamed output loads through the flight store"""
+        from synthetic_flights import write_reference_tables, write_synthetic_flights
+
+        csv_path = str(tmp_path / 'flights.csv')
+        parquet_path = str(tmp_path / 'flights.parquet')
+        assert write_synthetic_flights(csv_path, 3000, batch_rows=1000) == 3000
+        assert write_synthetic_flights(parquet_path, 3000, batch_rows=1000) == 3000
+
+        from_csv = load_flights(csv_path=csv_path, parquet_path=str(tmp_path / 'missing'), mmap_path=None)
+        from_parquet = load_flights(parquet_path=parquet_path, mmap_path=None)
+        assert len(from_csv) == len(from_parquet) == 3000
+        assert sorted(from_csv['ROUTE'].astype(str)) == sorted(from_parquet['ROUTE'].astype(str))
+
+        # Writing again replaces the previous output instead of adding to it
+        assert write_synthetic_flights(parquet_path, 1000, batch_rows=1000, seed=1) == 1000
+        assert write_synthetic_flights(csv_path, 1000, batch_rows=1000, seed=1) == 1000
+        assert len(load_flights(parquet_path=parquet_path, mmap_path=None)) == 1000
+        assert len(load_flights(csv_path=csv_path, parquet_path=str(tmp_path / 'missing'), mmap_path=None)) == 1000
+
+        # Reference tables only replace missing files and LFS pointers
+        (tmp_path / 'airports.csv').write_text('version https://git-lfs.github.com/spec/v1\n')
+        (tmp_path / 'airlines.csv').write_text('IATA_CODE,AIRLINE\nZZ,Kept\n')
+        assert write_reference_tables(str(tmp_path)) == [str(tmp_path / 'airports.csv')]
+        assert 'LATITUDE' in pd.read_csv(tmp_path / 'airports.csv').columns
+
+
+class TestPageWarmup:
+    """Tests for the background page warm-up"""
+
+    def test_defaults_come_before_prefetch(self):
+        """Every page's unfiltered results are scheduled before any prefetch filter"""
+        from page_warmup import warmup_tasks
+
+        tasks = warmup_tasks(['Overview', 'Delays'], print, prefetch=[(('AA',), ()), (('DL',), (1,))])
+        assert [args for _, _, args in tasks] == [
+            ('Overview', (), ()), ('Delays', (), ()),
+            ('Overview', ('AA',), ()), ('Delays', ('AA',), ()),
+            ('Overview', ('DL',), (1,)), ('Delays', ('DL',), (1,)),
+        ]
+        assert tasks[-1][0] == 'Delays [DL, 1]'
+
+    def test_runs_in_background_and_skips_failures(self):
+        """Tasks run on a daemon thread and a failing task does not stop the rest"""
+        from page_warmup import THREAD_NAME, PageWarmup
+
+        threads = []
+
+        def fail():
+            raise ValueError('no cube')
+
+        warmup = PageWarmup([('first', lambda: threads.append(threading.current_thread().name), ()),
+                             ('broken', fail, ()),
+                             ('last', threads.append, ('done',))]).start()
+        assert warmup.wait(timeout=10)
+        assert threads == [THREAD_NAME, 'done']
+        assert warmup.done == ['first', 'last']
+        assert warmup.failed == {'broken': 'no cube'}
+        assert warmup.progress() == (3, 3) and not warmup.running
+
+    def test_cancel_stops_after_running_task(self):
+        """Cancelling lets the running task finish and skips the remaining ones"""
+        from page_warmup import PageWarmup
+
+        started, release = threading.Event(), threading.Event()
+
+        def block():
+            started.set()
+            release.wait(10)
+
+        warmup = PageWarmup([('block', block, ()), ('skipped', print, ())]).start()
+        assert started.wait(10)
+        warmup.cancel()
+        release.set()
+        assert warmup.wait(timeout=10)
+        assert warmup.done == ['block']
+        assert warmup.progress() == (1, 2)
+
+    def test_cancel_all_reaches_started_warmups(self):
+        """cancel_all() stops every started warm-up before the caches are cleared"""
+        from page_warmup import PageWarmup, cancel_all
+
+        release = threading.Event()
+        warmups = [PageWarmup([('block', release.wait, (10,)), ('skipped', print, ())]).start()
+                   for _ in range(2)]
+        cancel_all()
+        release.set()
+        assert all(warmup.wait(timeout=10) for warmup in warmups)
+        assert [warmup.progress() for warmup in warmups] == [(1, 2), (1, 2)]
+
+
+class TestResultCache:
+    """Tests for the bounded page result cache"""
+
+    def test_key_normalises_filters(self):
+        """Filter order, duplicates and empty filters do not change the key"""
+        from result_cache import result_key
+
+        key = result_key('Delays', 'histogram', 'v1', AIRLINE=['DL', 'AA', 'DL'], MONTH=[])
+        assert key == result_key('Delays', 'histogram', 'v1', MONTH=(), AIRLINE=('AA', 'DL'))
+        assert key != result_key('Delays', 'histogram', 'v2', AIRLINE=['AA', 'DL'])
+        assert key != result_key('Routes', 'histogram', 'v1', AIRLINE=['AA', 'DL'])
+
+    def test_lru_eviction_and_counters(self):
+        """The least recently used result is evicted beyond the memory cap"""
+        from result_cache import ResultCache, result_nbytes
+
+        frame = pd.DataFrame({'flights': np.arange(1000)})
+        cache = ResultCache(max_bytes=int(result_nbytes(frame) * 2.5))
+        for name in ['a', 'b']:
+            cache.put(name, frame.copy())
+        assert cache.get('a') is not None  # 'b' is now least recently used
+        cache.put('c', frame.copy())
+
+        assert 'b' not in cache and 'a' in cache and 'c' in cache
+        assert cache.get('b') is None
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (1, 1, 1, 2)
+        assert stats['bytes'] <= stats['max_bytes']
+
+    def test_spilled_results_are_loaded_back(self, tmp_path):
+        """Evicted results are pickled to the spill directory and reused"""
+        from result_cache import ResultCache
+
+        cache = ResultCache(max_bytes=1, spill_dir=str(tmp_path))
+        cache.put('route', pd.Series([1.5, 2.5], index=['SFO-LAX', 'JFK-BOS']))
+        assert len(cache) == 0 and len(list(tmp_path.glob('*.pkl'))) == 1
+
+        calls = []
+        value = cache.get_or_compute('route', lambda: calls.append(1))
+        assert calls == [] and value['JFK-BOS'] == 2.5
+        assert cache.stats()['spill_loads'] == 1 and cache.stats()['hits'] == 1
+        cache.clear()
+        assert list(tmp_path.glob('*.pkl')) == []
+
+    def test_concurrent_misses_compute_once(self):
+        """Sessions asking for the same missing result share one computation"""
+        from result_cache import ResultCache
+
+        cache = ResultCache()
+        calls, release = [], threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(10)
+            return 42
+
+        threads = [threading.Thread(target=cache.get_or_compute, args=('kpis', compute)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(10)
+        assert calls == [1]
+        assert cache.stats()['misses'] == 1 and cache.stats()['hits'] == 3
+
+
+class TestDatasetManifest:
+    """Tests for dataset fingerprints and artifact provenance stamps"""
+
+    def test_manifest_counts_rows_and_reuses_fingerprints(self, tmp_path, monkeypatch):
+        """Unchanged files are not read again; appended rows change the fingerprint"""
+        pytest.importorskip('pyarrow')
+        import dataset_manifest
+        from dataset_manifest import current_manifest
+
+        df = make_sample_flights(n=3000)
+        csv_path, parquet_path = tmp_path / 'flights.csv', tmp_path / 'flights.parquet'
+        df.to_csv(csv_path, index=False)
+        df.to_parquet(parquet_path, index=False)
+        manifest_path = str(tmp_path / 'manifest.json')
+
+        # CSV rows are only counted on request; Parquet rows come from its metadata
+        first = current_manifest([str(csv_path), str(parquet_path)], manifest_path)
+        assert [entry['rows'] for entry in first['inputs'].values()] == [None, 3000]
+
+        reads = []
+        original = dataset_manifest.sampled_fingerprint
+        monkeypatch.setattr(dataset_manifest, 'sampled_fingerprint', lambda path: reads.append(path) or original(path))
+        counted = current_manifest([str(csv_path), str(parquet_path)], manifest_path, csv_rows=True)
+        assert [entry['rows'] for entry in counted['inputs'].values()] == [3000, 3000]
+        assert counted['version'] == first['version']
+        assert current_manifest([str(csv_path), str(parquet_path)], manifest_path) == counted
+        assert reads == []
+
+        df.head(10).to_csv(csv_path, mode='a', header=False, index=False)
+        changed = current_manifest([str(csv_path), str(parquet_path)], manifest_path)
+        assert reads == [str(csv_path)]
+        assert changed['inputs'][str(csv_path)]['rows'] is None
+        assert changed['version'] != first['version']
+        assert current_manifest([str(csv_path)], manifest_path, csv_rows=True)['inputs'][str(csv_path)]['rows'] == 3010
+
+    def test_artifact_stamp_tracks_its_inputs(self, tmp_path):
+        """An artifact is current until one of the inputs it was built from changes"""
+        from dataset_manifest import artifact_is_current, load_stamp, record_artifact
+
+        source, other = tmp_path / 'flights.csv', tmp_path / 'airports.csv'
+        source.write_text('MONTH\n1\n2\n')
+        other.write_text('IATA_CODE\nSFO\n')
+        artifact = tmp_path / 'cube'
+        artifact.mkdir()
+        manifest_path = str(tmp_path / 'manifest.json')
+
+        assert not artifact_is_current(str(artifact), manifest_path)  # not stamped yet
+        record_artifact(str(artifact), [str(source), str(tmp_path / 'missing.csv')], manifest_path)
+        assert list(load_stamp(str(artifact))['inputs']) == [str(source)]
+        assert artifact_is_current(str(artifact), manifest_path)
+
+        other.write_text('IATA_CODE\nLAX\n')
+        assert artifact_is_current(str(artifact), manifest_path)
+        source.write_text('MONTH\n1\n3\n')
+        assert not artifact_is_current(str(artifact), manifest_path)
+
+    def test_ingest_rebuilds_outdated_partials(self, tmp_path):
+        """Saved partials that no longer match the store are recomputed before merging"""
+        from ingest import ingest_flights
+        from summary_stats import compute_partials, finalize_summary
+
+        raw = make_raw_flights(n=3000)
+        first, second = tmp_path / 'jan_jun.csv', tmp_path / 'jul_dec.csv'
+        raw[raw['MONTH'] <= 6].to_csv(first, index=False)
+        raw[raw['MONTH'] > 6].to_csv(second, index=False)
+        kwargs = dict(csv_path=str(tmp_path / 'processed.csv'), parquet_path=str(tmp_path / 'processed.parquet'),
+                      mmap_path=str(tmp_path / 'processed.mmap'), cube_dir=str(tmp_path / 'cube'),
+                      sketch_dir=str(tmp_path / 'sketches'), partials_path=str(tmp_path / 'partials.json'),
+                      summary_path=str(tmp_path / 'summary.json'), log_path=str(tmp_path / 'ingest_log.json'),
+                      manifest_path=str(tmp_path / 'manifest.json'))
+        ingest_flights(str(first), **kwargs)
+
+        # The processed store is rewritten outside of ingest_flights
+        processed = pd.read_csv(kwargs['csv_path'])
+        processed.iloc[::2].to_csv(kwargs['csv_path'], index=False)
+        ingest_flights(str(second), **kwargs)
+
+        df = load_flights(csv_path=kwargs['csv_path'], parquet_path=kwargs['parquet_path'], mmap_path=None)
+        with open(kwargs['summary_path']) as f:
+            summary = json.load(f)
+        assert summary == json.loads(json.dumps(finalize_summary(compute_partials(df))))
+        assert summary['total_flights'] == len(df) < 3000
+
+
+class TestRouteCodes:
+    """Tests for packed integer route keys"""
+
+    def test_keys_round_trip_in_label_order(self):
+        """Keys decode to their airports and sort like the ORIGIN-DEST labels"""
+        from route_codes import encode_routes
+
+        df = make_sample_flights()
+        origin = df['ORIGIN_AIRPORT'].astype('category')
+        keys, table = encode_routes(origin, df['DESTINATION_AIRPORT'])
+        assert keys.dtype == np.int32 and len(table) == 6
+
+        labels = df['ORIGIN_AIRPORT'] + '-' + df['DESTINATION_AIRPORT']
+        assert list(table.labels(keys)) == labels.tolist()
+        assert list(table.origins(keys)) == df['ORIGIN_AIRPORT'].tolist()
+        distinct, groups = table.group(keys)
+        assert list(table.labels(distinct)) == sorted(labels.unique())
+        assert (table.labels(distinct)[groups] == labels.to_numpy()).all()
+
+    def test_missing_and_unknown_airports(self):
+        """Routes with a missing or unknown endpoint get key -1 and no category"""
+        from route_codes import RouteTable, encode_routes
+
+        keys, table = encode_routes(['SFO', None, 'JFK'], ['LAX', 'SFO', 'SFO'])
+        assert keys[1] == -1 and (keys[[0, 2]] >= 0).all()
+        route = table.categorical(keys)
+        assert list(route.astype(object)[[0, 2]]) == ['SFO-LAX', 'JFK-SFO'] and pd.isna(route[1])
+        assert list(RouteTable(['LAX', 'SFO']).encode(['SFO', 'BOS'], ['LAX', 'LAX'])) == [(1 << 16) | 0, -1]
+
+    def test_coordinates_by_airport_id(self):
+        """Per-airport coordinate arrays line up with the airport ids"""
+        from route_codes import encode_routes
+
+        airports_df = pd.DataFrame({'IATA_CODE': ['ORD', 'ATL', 'ORD'], 'LATITUDE': [41.98, 33.64, 0.0],
+                                    'LONGITUDE': [-87.90, -84.43, 0.0]})
+        keys, table = encode_routes(['ATL', 'ZZZ'], ['ORD', 'ATL'])
+        lats, lons = table.coordinates(airports_df)
+        assert lats[table.dest_ids(keys[0])] == 41.98 and lons[table.origin_ids(keys[0])] == -84.43
+        assert np.isnan(lats[table.origin_ids(keys[1])])
+
+
 def test_project_structure():
     """Test that project has proper structure"""
     required_files = [